@@ -0,0 +1,75 @@
+"""
+Per-call cost of console rendering in the custom tools.
+
+Runs the same file_read, editor and file_write calls with STRANDS_TOOL_CONSOLE_MODE set to
+"buffered" (render into an unread buffer, the previous default) and unset (headless, nothing
+is rendered), and prints the mean time per call of each.
+
+Usage:
+    python benchmarks/tool_console.py [--file path/to/large_file.py] [--iterations 20]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from typing import Callable, Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from custom_tools import editor, file_read, file_write  # noqa: E402
+
+
+def tool_calls(work_dir: str, sample: str) -> Dict[str, Callable[[], object]]:
+    target = os.path.join(work_dir, "copy" + os.path.splitext(sample)[1])
+    with open(sample, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    def read(mode: str, **extra: object) -> Callable[[], object]:
+        return lambda: file_read.file_read({"toolUseId": "bench", "input": {"path": sample, "mode": mode, **extra}})
+
+    return {
+        "file_read view": read("view"),
+        "file_read search": read("search", search_pattern="def", context_lines=2),
+        "file_read stats": read("stats"),
+        "editor view": lambda: editor.editor(command="view", path=sample),
+        "file_write": lambda: file_write.file_write(
+            {"toolUseId": "bench", "input": {"path": target, "content": content}}
+        ),
+    }
+
+
+def measure(call: Callable[[], object], iterations: int) -> float:
+    call()  # warm caches and imports
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", default=file_read.__file__, help="File the tools read and write")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ["BYPASS_TOOL_CONSENT"] = "true"
+    work_dir = tempfile.mkdtemp(prefix="tool_console_bench_")
+    try:
+        calls = tool_calls(work_dir, os.path.abspath(args.file))
+        print(f"{'call':<20}{'buffered ms':>14}{'headless ms':>14}{'saved':>8}")
+        for name, call in calls.items():
+            os.environ["STRANDS_TOOL_CONSOLE_MODE"] = "buffered"
+            buffered = measure(call, args.iterations)
+            os.environ.pop("STRANDS_TOOL_CONSOLE_MODE")
+            headless = measure(call, args.iterations)
+            saved = (1 - headless / buffered) * 100 if buffered else 0.0
+            print(f"{name:<20}{buffered:>14.2f}{headless:>14.2f}{saved:>7.0f}%")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
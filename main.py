@@ -31,7 +31,8 @@ def lambda_handler(event, context):
                 github_link=payload["github_link"],
                 jira_story=payload["jira_story"],
                 jira_story_id=payload["jira_story_id"],
-                is_data_analysis_task=payload['is_data_analysis_task']
+                is_data_analysis_task=payload['is_data_analysis_task'],
+                speculative_attempts=payload.get('speculative_attempts')
             ))
             print(f"✅ Lambda workflow complete: {output}")
             return {"statusCode": 200, "body": "Workflow complete."}
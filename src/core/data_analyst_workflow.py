@@ -5,12 +5,12 @@ from urllib.parse import urlparse
 from typing import Dict, Any, List, Optional
 
 import boto3
-from botocore.config import Config
 from bedrock_agentcore.tools.code_interpreter_client import CodeInterpreter
 from strands import Agent, tool
-from strands.models import BedrockModel
 
 from prompt.agent_prompt import data_analyst_prompt
+from custom_tools.utils.repo_inventory import get_inventory
+from src.core.model_router import model_router
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -28,20 +28,15 @@ class FileHandler:
             raise ValueError(f"Project directory does not exist: {project_dir}")
 
         files_to_create = []
-        for root, _, files in os.walk(project_dir):
-            for file in files:
-                ext = os.path.splitext(file)[1].lower()
-                if ext not in supported_extensions:
-                    continue
-                try:
-                    file_path = os.path.join(root, file)
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-
-                    relative_path = os.path.relpath(file_path, project_dir)
-                    files_to_create.append({"path": f"nemo_files/{relative_path}", "text": content})
-                except Exception as e:
-                    logger.info(f"Error reading file {file_path}: {e}")
+        for file_path in get_inventory(project_dir).files(project_dir, extensions=supported_extensions):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+
+                relative_path = os.path.relpath(file_path, project_dir)
+                files_to_create.append({"path": f"nemo_files/{relative_path}", "text": content})
+            except Exception as e:
+                logger.info(f"Error reading file {file_path}: {e}")
         return files_to_create
 
 class CodeInterpreterSession:
@@ -188,14 +183,7 @@ class DataAnalystAgent:
     
     def _setup_agent(self) -> Agent:
         """Set up the Strands agent with the model and tools."""
-        model = BedrockModel(
-            model_id = 'us.anthropic.claude-sonnet-4-20250514-v1:0',
-            boto_session = session,
-            boto_client_config = Config(
-                retries={'max_attempts': 5, 'mode': 'standard'},
-                read_timeout=180
-            )
-        )
+        model = model_router.model_for_stage('data_analyst')
         system_prompt = data_analyst_prompt.format(
             project_name=self.project_name,
             jira_story_id=self.jira_story_id
@@ -0,0 +1,291 @@
+import os
+import json
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+from strands.models import BedrockModel
+from strands.types.exceptions import ModelThrottledException
+
+from src.utils.bedrock_rate_limiter import CallPriority, RateLimitedBedrockModel
+
+logger = logging.getLogger(__name__)
+
+retry_config = Config(
+    retries={
+        'max_attempts': 5,
+        'mode': 'standard'  # or 'adaptive'
+    },
+    read_timeout=180
+)
+
+# For calls that have another candidate to fall back to: a throttled call goes to the
+# next candidate at once instead of backing off on the same model.
+fallback_config = Config(
+    retries={
+        'max_attempts': 1,
+        'mode': 'standard'
+    },
+    read_timeout=180
+)
+
+session = boto3.Session()
+
+
+@dataclass
+class ModelProfile:
+    """Cost and latency profile of a Bedrock model."""
+
+    model_id: str
+    cost_per_1k_input: float  # USD
+    cost_per_1k_output: float  # USD
+    expected_latency_seconds: float  # typical latency of an agent turn, used until observed
+
+
+@dataclass
+class StagePolicy:
+    """Routing policy of a workflow stage: candidate models in preference order and targets."""
+
+    candidates: List[str]
+    priority: CallPriority = CallPriority.NORMAL
+    max_cost_per_1k_output: Optional[float] = None
+    max_latency_seconds: Optional[float] = None
+
+
+@dataclass
+class ModelStats:
+    """Observed performance of a model in this process."""
+
+    calls: int = 0
+    throttles: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latency_ewma: Optional[float] = None
+    cooldown_until: float = 0.0
+    stage_calls: Dict[str, int] = field(default_factory=dict)
+
+
+# Known models, keyed by the name used in stage policies. Extend or override with
+# NEMO_MODEL_REGISTRY, e.g. '{"nova_micro": {"model_id": "us.amazon.nova-micro-v1:0",
+# "cost_per_1k_input": 0.000035, "cost_per_1k_output": 0.00014, "expected_latency_seconds": 2}}'
+DEFAULT_MODEL_REGISTRY = {
+    'claude_sonnet_4': ModelProfile('us.anthropic.claude-sonnet-4-20250514-v1:0', 0.003, 0.015, 20.0),
+    'claude_haiku_3_5': ModelProfile('us.anthropic.claude-3-5-haiku-20241022-v1:0', 0.0008, 0.004, 8.0),
+    'nova_pro': ModelProfile('us.amazon.nova-pro-v1:0', 0.0008, 0.0032, 10.0),
+    'nova_lite': ModelProfile('us.amazon.nova-lite-v1:0', 0.00006, 0.00024, 5.0),
+}
+
+# Stage -> policy. The first candidate is the current default of each stage; later
+# candidates are fallbacks. Override per stage with NEMO_MODEL_ROUTING, e.g.
+# '{"doc": {"candidates": ["nova_lite", "nova_pro"]}, "coding_standard": {"max_latency_seconds": 6}}'
+DEFAULT_STAGE_POLICIES = {
+    'planner': StagePolicy(['claude_sonnet_4', 'nova_pro'], CallPriority.CRITICAL),
+    'senior': StagePolicy(['claude_sonnet_4'], CallPriority.CRITICAL),
+    'data_analyst': StagePolicy(['claude_sonnet_4'], CallPriority.CRITICAL),
+    'code_reviewer': StagePolicy(['claude_sonnet_4', 'nova_pro'], CallPriority.BACKGROUND),
+    'coding_standard': StagePolicy(['nova_pro', 'nova_lite'], CallPriority.BACKGROUND),
+    'system_design': StagePolicy(['nova_pro', 'claude_haiku_3_5'], CallPriority.BACKGROUND),
+    'algorithms': StagePolicy(['nova_pro', 'claude_haiku_3_5'], CallPriority.BACKGROUND),
+    'story_scoring': StagePolicy(['nova_pro', 'claude_haiku_3_5'], CallPriority.NORMAL),
+    'doc': StagePolicy(['nova_pro', 'nova_lite'], CallPriority.NORMAL),
+}
+
+
+class ModelRouter:
+    """
+    Chooses a model per workflow stage from the registry and stage policies.
+
+    Candidates that miss the stage's cost or latency target are skipped, using
+    observed latency once a model has been called. Models that were throttled
+    cool down for `THROTTLE_COOLDOWN_SECONDS` and are only used when nothing
+    else is available.
+    """
+
+    THROTTLE_COOLDOWN_SECONDS = float(os.getenv("NEMO_MODEL_THROTTLE_COOLDOWN_SECONDS", "30"))
+    LATENCY_EWMA_WEIGHT = 0.3
+
+    def __init__(self, registry: Dict[str, ModelProfile], policies: Dict[str, StagePolicy]):
+        self.registry = registry
+        self.policies = policies
+        self.stats: Dict[str, ModelStats] = {name: ModelStats() for name in registry}
+        self._models: Dict[Tuple[str, CallPriority, bool], RateLimitedBedrockModel] = {}
+        self._stage_models: Dict[str, "RoutedBedrockModel"] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        registry = dict(DEFAULT_MODEL_REGISTRY)
+        for name, profile in json.loads(os.getenv("NEMO_MODEL_REGISTRY", "{}")).items():
+            registry[name] = ModelProfile(**profile)
+
+        policies = dict(DEFAULT_STAGE_POLICIES)
+        for stage, overrides in json.loads(os.getenv("NEMO_MODEL_ROUTING", "{}")).items():
+            base = policies.get(stage, StagePolicy(candidates=[]))
+            policies[stage] = StagePolicy(
+                candidates=overrides.get("candidates", base.candidates),
+                priority=CallPriority[overrides["priority"].upper()] if "priority" in overrides else base.priority,
+                max_cost_per_1k_output=overrides.get("max_cost_per_1k_output", base.max_cost_per_1k_output),
+                max_latency_seconds=overrides.get("max_latency_seconds", base.max_latency_seconds),
+            )
+
+        for stage, policy in policies.items():
+            if not policy.candidates:
+                raise ValueError(f"Stage {stage} has no candidate models")
+            unknown = [name for name in policy.candidates if name not in registry]
+            if unknown:
+                raise ValueError(f"Stage {stage} routes to models missing from the registry: {', '.join(unknown)}")
+        return cls(registry, policies)
+
+    def _latency(self, name: str) -> float:
+        observed = self.stats[name].latency_ewma
+        return observed if observed is not None else self.registry[name].expected_latency_seconds
+
+    def route(self, stage: str) -> List[str]:
+        """Return the model names to try for a stage, best first."""
+        policy = self.policies[stage]
+        now = time.monotonic()
+        with self._lock:
+            within_targets = [
+                name for name in policy.candidates
+                if (policy.max_cost_per_1k_output is None
+                    or self.registry[name].cost_per_1k_output <= policy.max_cost_per_1k_output)
+                and (policy.max_latency_seconds is None or self._latency(name) <= policy.max_latency_seconds)
+            ]
+            # Fall back to every candidate if none meets the targets, preferring the listed order.
+            ordered = within_targets + [name for name in policy.candidates if name not in within_targets]
+            available = [name for name in ordered if self.stats[name].cooldown_until <= now]
+            cooling = [name for name in ordered if name not in available]
+        return available + cooling
+
+    def model(self, name: str, priority: CallPriority, retry: bool = True) -> RateLimitedBedrockModel:
+        """
+        Return the shared rate-limited model client for a registry entry and priority.
+
+        Without `retry`, the client does not retry throttled calls, for candidates
+        that have a fallback.
+        """
+        with self._lock:
+            key = (name, priority, retry)
+            if key not in self._models:
+                self._models[key] = RateLimitedBedrockModel(
+                    model_id=self.registry[name].model_id,
+                    priority=priority,
+                    boto_session=session,
+                    boto_client_config=retry_config if retry else fallback_config,
+                )
+            return self._models[key]
+
+    def record_call(self, name: str, stage: str, latency: float, usage: Dict[str, Any]) -> None:
+        with self._lock:
+            stats = self.stats[name]
+            stats.calls += 1
+            stats.stage_calls[stage] = stats.stage_calls.get(stage, 0) + 1
+            stats.input_tokens += usage.get("inputTokens", 0)
+            stats.output_tokens += usage.get("outputTokens", 0)
+            stats.latency_ewma = (
+                latency if stats.latency_ewma is None
+                else self.LATENCY_EWMA_WEIGHT * latency + (1 - self.LATENCY_EWMA_WEIGHT) * stats.latency_ewma
+            )
+
+    def record_throttle(self, name: str) -> None:
+        with self._lock:
+            self.stats[name].throttles += 1
+            self.stats[name].cooldown_until = time.monotonic() + self.THROTTLE_COOLDOWN_SECONDS
+
+    def stats_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Observed calls, latency, throttles and estimated cost per model, for comparing routing policies."""
+        with self._lock:
+            summary = {}
+            for name, stats in self.stats.items():
+                if not stats.calls and not stats.throttles:
+                    continue
+                profile = self.registry[name]
+                summary[name] = {
+                    "calls": stats.calls,
+                    "stage_calls": dict(stats.stage_calls),
+                    "throttles": stats.throttles,
+                    "latency_ewma_seconds": round(stats.latency_ewma or 0.0, 2),
+                    "input_tokens": stats.input_tokens,
+                    "output_tokens": stats.output_tokens,
+                    "estimated_cost_usd": round(
+                        stats.input_tokens / 1000 * profile.cost_per_1k_input
+                        + stats.output_tokens / 1000 * profile.cost_per_1k_output, 4
+                    ),
+                }
+            return summary
+
+    def model_for_stage(self, stage: str) -> "RoutedBedrockModel":
+        """Return the shared model of the stage, which routes each call and falls back when throttled."""
+        with self._lock:
+            if stage not in self._stage_models:
+                self._stage_models[stage] = RoutedBedrockModel(router=self, stage=stage)
+            return self._stage_models[stage]
+
+
+class RoutedBedrockModel(BedrockModel):
+    """
+    BedrockModel that picks the model of every call through a `ModelRouter`.
+
+    If a model is throttled before it streamed anything, the call is retried on
+    the next candidate of the stage instead of backing off on the same model; only
+    the last candidate retries with backoff. Instances keep no per-call state and
+    no client of their own, so one per stage is shared by all agents of the stage.
+    """
+
+    def __init__(self, *, router: ModelRouter, stage: str):
+        # The router's clients make the calls; BedrockModel.__init__ would only build an unused one
+        self.router = router
+        self.stage = stage
+        primary = router.policies[stage].candidates[0]
+        self.config: Dict[str, Any] = {"model_id": router.registry[primary].model_id}
+
+    async def _routed(
+        self, call: Callable[[RateLimitedBedrockModel], AsyncGenerator[Any, None]]
+    ) -> AsyncGenerator[Any, None]:
+        """Run `call` on the best available model of the stage, falling back while nothing was streamed."""
+        candidates = self.router.route(self.stage)
+        priority = self.router.policies[self.stage].priority
+
+        for index, name in enumerate(candidates):
+            model = self.router.model(name, priority, retry=index == len(candidates) - 1)
+            started = time.perf_counter()
+            usage: Dict[str, Any] = {}
+            streamed = False
+            try:
+                async for event in call(model):
+                    streamed = True
+                    if isinstance(event, dict) and "metadata" in event:
+                        usage = event["metadata"].get("usage", usage)
+                    yield event
+            except ModelThrottledException:
+                self.router.record_throttle(name)
+                if streamed or index == len(candidates) - 1:
+                    raise
+                logger.warning(f"Model {name} throttled for stage {self.stage}, falling back to {candidates[index + 1]}")
+                continue
+
+            self.router.record_call(name, self.stage, time.perf_counter() - started, usage)
+            return
+
+    async def stream(
+        self, messages: Any, tool_specs: Any = None, system_prompt: Optional[str] = None, **kwargs: Any
+    ) -> AsyncGenerator[Any, None]:
+        """Stream a response from the best available model of the stage."""
+        async for event in self._routed(lambda model: model.stream(messages, tool_specs, system_prompt, **kwargs)):
+            yield event
+
+    async def structured_output(
+        self, output_model: Any, prompt: Any, system_prompt: Optional[str] = None, **kwargs: Any
+    ) -> AsyncGenerator[Any, None]:
+        """Get structured output from the best available model of the stage."""
+        async for event in self._routed(
+            lambda model: model.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+        ):
+            yield event
+
+
+model_router = ModelRouter.from_env()
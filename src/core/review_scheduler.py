@@ -0,0 +1,248 @@
+import os
+import re
+import asyncio
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Dict, List, Tuple
+
+# Reviewer roles known to the scheduler. `code_reviewer_agent` covers every
+# review aspect in one call and is used on its own for small diffs.
+COMBINED_REVIEWER = 'code_reviewer_agent'
+CODING_STANDARD_REVIEWER = 'coding_standard_agent'
+SYSTEM_DESIGN_REVIEWER = 'low_system_design_agent'
+ALGORITHMS_REVIEWER = 'data_structure_algorithms_agent'
+
+# Patterns that suggest an algorithm or data structure was touched.
+ALGORITHMIC_PATTERNS = re.compile(
+    r"^\s*(for|while)\b"
+    r"|\bsorted\(|\.sort\(|\bheapq\b|\bbisect\b|\bdeque\b|\bdefaultdict\b|\bCounter\b"
+    r"|\bset\(|\bfrozenset\(|\bdict\(|\blru_cache\b|@dataclass|\bNamedTuple\b|\bTypedDict\b",
+    re.MULTILINE,
+)
+
+# Patterns that suggest the structure of the code (classes, modules) changed.
+STRUCTURAL_PATTERNS = re.compile(r"^\s*class\s+\w+|^\s*(from\s+\S+\s+)?import\s", re.MULTILINE)
+
+# Cap on concurrent reviewer calls per event loop. Waiting calls wait on the loop, not in
+# executor threads, which the running reviewers need for their tools and model streams.
+_review_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# Markdown headings, bullets and code fences used by the reviewer output format.
+FEEDBACK_HEADING = re.compile(r"^\s*#{1,6}\s+(.*\S)\s*$")
+FEEDBACK_BULLET = re.compile(r"^\s*(?:[-*]|\d+\.)\s+(.*\S)\s*$")
+FEEDBACK_FENCE = re.compile(r"^\s*(```|~~~)")
+
+
+def _change_lines(change: Dict[str, Any]) -> int:
+    return max(int(change.get("end_line", 0)) - int(change.get("start_line", 0)), 1)
+
+
+@dataclass
+class ManifestScore:
+    """Size and risk of a change manifest."""
+
+    lines_changed: int
+    files_touched: int
+    algorithmic_change: bool
+    structural_change: bool
+    score: int
+
+
+@dataclass
+class ReviewPlan:
+    """Which reviewers run and how the change is split between their calls."""
+
+    mode: str  # "combined", "parallel" or "sharded"
+    reviewers: List[str]
+    shards: List[Dict[str, Any]] = field(default_factory=list)
+    score: ManifestScore | None = None
+
+
+def score_manifest(manifest: Dict[str, Any], code_diffs: str = "") -> ManifestScore:
+    """
+    Score a change manifest by lines changed, files touched and change risk.
+
+    Risk patterns are matched against the changed lines when the manifest carries
+    them, since `code_diffs` may include unchanged symbol context. Binary and
+    generated files count as touched but not by their size.
+    """
+    changes = manifest.get("changes", [])
+    lines_changed = sum(_change_lines(c) for c in changes if not c.get("skipped"))
+    files_touched = len({c["file_path"] for c in changes})
+    changed_code = "".join(c.get("content", "") for c in changes) or code_diffs
+    algorithmic_change = bool(ALGORITHMIC_PATTERNS.search(changed_code))
+    structural_change = (
+        files_touched > 1
+        or any(c.get("change_type") == "untracked_file" for c in changes)
+        or bool(STRUCTURAL_PATTERNS.search(changed_code))
+    )
+
+    file_weight = int(os.getenv("REVIEW_SCORE_FILE_WEIGHT", "20"))
+    algorithmic_weight = int(os.getenv("REVIEW_SCORE_ALGORITHMIC_WEIGHT", "50"))
+    score = lines_changed + files_touched * file_weight + (algorithmic_weight if algorithmic_change else 0)
+
+    return ManifestScore(
+        lines_changed=lines_changed,
+        files_touched=files_touched,
+        algorithmic_change=algorithmic_change,
+        structural_change=structural_change,
+        score=score,
+    )
+
+
+def shard_manifest(manifest: Dict[str, Any], max_lines: int, max_files: int = 8) -> List[Dict[str, Any]]:
+    """
+    Partition a manifest into review shards grouped by module (directory).
+
+    Files of the same module stay together while the shard fits within `max_lines`
+    and `max_files`; bigger modules are split at file boundaries. A single file is
+    never split across shards.
+    """
+    modules: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+    for change in manifest.get("changes", []):
+        module = os.path.dirname(change["file_path"])
+        modules.setdefault(module, {}).setdefault(change["file_path"], []).append(change)
+
+    shards: List[Dict[str, Any]] = []
+    current: List[Dict[str, Any]] = []
+    current_lines = 0
+    current_files = 0
+
+    def flush() -> None:
+        nonlocal current, current_lines, current_files
+        if current:
+            shards.append({"changes": current})
+        current, current_lines, current_files = [], 0, 0
+
+    for module in sorted(modules):
+        files = modules[module]
+        module_lines = sum(_change_lines(c) for changes in files.values() for c in changes)
+
+        # Start a fresh shard rather than splitting a module that would fit in one.
+        if current and (current_lines + module_lines > max_lines or current_files + len(files) > max_files):
+            flush()
+
+        for changes in files.values():
+            file_lines = sum(_change_lines(c) for c in changes)
+            if current and (current_lines + file_lines > max_lines or current_files + 1 > max_files):
+                flush()
+            current.extend(changes)
+            current_lines += file_lines
+            current_files += 1
+
+    flush()
+    return shards
+
+
+def review_concurrency_limit() -> asyncio.Semaphore:
+    """Semaphore of the running event loop, allowing REVIEW_MAX_CONCURRENCY reviewer calls at once."""
+    loop = asyncio.get_running_loop()
+    limit = _review_limits.get(loop)
+    if limit is None:
+        limit = _review_limits[loop] = asyncio.Semaphore(int(os.getenv("REVIEW_MAX_CONCURRENCY", "6")))
+    return limit
+
+
+async def gather_limited(calls: List[Awaitable[Any]]) -> List[Any]:
+    """Await reviewer calls concurrently, at most REVIEW_MAX_CONCURRENCY at a time."""
+    limit = review_concurrency_limit()
+
+    async def run(call: Awaitable[Any]) -> Any:
+        async with limit:
+            return await call
+
+    return await asyncio.gather(*[run(call) for call in calls])
+
+
+def merge_review_feedback(shard_feedback: List[Tuple[str, str]]) -> Dict[str, str]:
+    """
+    Merge per-shard feedback into one report per reviewer role.
+
+    Findings are grouped under their severity heading and de-duplicated across the
+    shards of each role, comparing bullets case- and whitespace-insensitively. Other
+    text (summaries, reasoning, code blocks) is kept as written, once per shard, and
+    lines inside code fences are never read as headings or findings.
+    """
+    seen: Dict[str, set] = {}
+    merged: Dict[str, Dict[str, List[str]]] = {}
+    other_text: Dict[str, List[str]] = {}
+
+    for role, feedback in shard_feedback:
+        sections = merged.setdefault(role, {})
+        role_seen = seen.setdefault(role, set())
+        heading = ""
+        prose: List[str] = []
+        in_fence = False
+        for line in feedback.splitlines():
+            if FEEDBACK_FENCE.match(line):
+                in_fence = not in_fence
+                prose.append(line)
+                continue
+            if in_fence:
+                prose.append(line)
+                continue
+
+            heading_match = FEEDBACK_HEADING.match(line)
+            if heading_match:
+                heading = heading_match.group(1)
+                continue
+
+            bullet_match = FEEDBACK_BULLET.match(line)
+            if not bullet_match:
+                prose.append(line)
+                continue
+
+            key = " ".join(bullet_match.group(1).lower().split())
+            if key in role_seen:
+                continue
+            role_seen.add(key)
+            sections.setdefault(heading, []).append(f"- {bullet_match.group(1)}")
+
+        text = re.sub(r"\n{3,}", "\n\n", "\n".join(prose)).strip("\n")
+        if text.strip() and text not in other_text.setdefault(role, []):
+            other_text[role].append(text)
+
+    combined: Dict[str, str] = {}
+    for role, sections in merged.items():
+        parts = list(other_text.get(role, []))
+        for heading, bullets in sections.items():
+            parts.append("\n".join(([f"### {heading}"] if heading else []) + bullets))
+        combined[role] = "\n\n".join(parts)
+    return combined
+
+
+def plan_review(manifest: Dict[str, Any], code_diffs: str = "") -> ReviewPlan:
+    """
+    Choose the reviewers for a change manifest based on its score.
+
+    - Small diffs get a single combined review call.
+    - Medium diffs run the specialised reviewers relevant to the change in parallel.
+    - Large diffs run the same reviewers, sharded across parallel calls.
+    """
+    score = score_manifest(manifest, code_diffs)
+
+    small_threshold = int(os.getenv("REVIEW_SMALL_DIFF_SCORE", "80"))
+    large_threshold = int(os.getenv("REVIEW_LARGE_DIFF_SCORE", "600"))
+    shard_max_lines = int(os.getenv("REVIEW_SHARD_MAX_LINES", "300"))
+    shard_max_files = int(os.getenv("REVIEW_SHARD_MAX_FILES", "8"))
+
+    if score.score <= small_threshold:
+        return ReviewPlan(mode="combined", reviewers=[COMBINED_REVIEWER], shards=[manifest], score=score)
+
+    reviewers = [CODING_STANDARD_REVIEWER]
+    if score.structural_change:
+        reviewers.append(SYSTEM_DESIGN_REVIEWER)
+    if score.algorithmic_change:
+        reviewers.append(ALGORITHMS_REVIEWER)
+
+    if score.score > large_threshold:
+        return ReviewPlan(
+            mode="sharded",
+            reviewers=reviewers,
+            shards=shard_manifest(manifest, shard_max_lines, shard_max_files),
+            score=score,
+        )
+
+    return ReviewPlan(mode="parallel", reviewers=reviewers, shards=[manifest], score=score)
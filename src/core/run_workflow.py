@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 
 from src.core.workflow import nemo_workflow
 from src.core.data_analyst_workflow import data_analyst_workflow
@@ -7,7 +8,13 @@ from src.utils.github_utils import GitHubRepoCloner, GitHubPRManager, parse_gith
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def run_nemo_agent_workflow(github_link: str, jira_story: str, jira_story_id: str, is_data_analysis_task: bool) -> dict:
+async def run_nemo_agent_workflow(
+    github_link: str,
+    jira_story: str,
+    jira_story_id: str,
+    is_data_analysis_task: bool,
+    speculative_attempts: Optional[int] = None
+) -> dict:
     """Runs the Agentic Workflow."""
     # Extract repo details
     clone_url, project_name = parse_github_url(github_link)
@@ -29,7 +36,8 @@ async def run_nemo_agent_workflow(github_link: str, jira_story: str, jira_story_
         result = await nemo_workflow(
             project_name=project_name,
             jira_story=jira_story,
-            jira_story_id=jira_story_id
+            jira_story_id=jira_story_id,
+            speculative_attempts=speculative_attempts
         )
 
     # Create PR
@@ -0,0 +1,164 @@
+import os
+import re
+import asyncio
+import subprocess
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from custom_tools.utils.change_tracker import change_tracker
+from src.utils.change_manifest import get_manifest, format_manifest_code_diffs
+from src.utils.lint_engine import stop_mypy_daemon
+
+SCORE_PATTERN = re.compile(r"Score\**\s*:\s*\**\s*(\d+(?:\.\d+)?)\s*/\s*10", re.IGNORECASE)
+
+
+@dataclass
+class ImplementationAttempt:
+    """One speculative senior-agent implementation, done in its own git worktree."""
+
+    index: int
+    project_name: str
+    repo_path: str
+    summary: str = ""
+    manifest: Dict[str, Any] = field(default_factory=dict)
+    lint_errors: int = 0
+    score: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def rank(self) -> tuple:
+        """Higher is better: successful, with changes, best story score, fewest lint errors."""
+        return (self.error is None, bool(self.manifest.get("changes")), self.score, -self.lint_errors)
+
+
+def run_git(args: List[str], cwd: str, input: Optional[str] = None) -> str:
+    """Run a git command and return stdout, raising on failure."""
+    result = subprocess.run(["git", *args], cwd=cwd, input=input, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def rewrite_repo_paths(text: str, from_path: str, to_path: str) -> str:
+    """Point absolute paths under `from_path` at `to_path`."""
+    return re.sub(rf"{re.escape(from_path)}(?![\w.-])", to_path, text)
+
+
+def parse_story_score(score_output: str) -> float:
+    """Extract X from the scoring agent's '**Score**: X/10' output, or 0 if missing."""
+    match = SCORE_PATTERN.search(score_output)
+    return float(match.group(1)) if match else 0.0
+
+
+def count_lint_errors(lint_results: Any) -> int:
+    """Count diagnostics and failed linters in a `lint_check` result."""
+    if not isinstance(lint_results, dict):
+        return 1
+    return len(lint_results.get("diagnostics", [])) + len(lint_results.get("errors", {}))
+
+
+def create_attempt_worktrees(project_name: str, attempts: int) -> List[ImplementationAttempt]:
+    """
+    Create one detached worktree of the cloned repo per attempt, next to it under /tmp.
+
+    If creating any of them fails, the ones already created are removed before the
+    error is raised.
+    """
+    repo_path = f"/tmp/{project_name}"
+    worktrees = []
+    try:
+        for index in range(attempts):
+            attempt_project = f"{project_name}-attempt-{index + 1}"
+            attempt_path = f"/tmp/{attempt_project}"
+            if os.path.exists(attempt_path):
+                run_git(["worktree", "remove", "--force", attempt_path], cwd=repo_path)
+            run_git(["worktree", "add", "--detach", attempt_path, "HEAD"], cwd=repo_path)
+            change_tracker.mark_clean(attempt_path)
+            worktrees.append(ImplementationAttempt(index=index, project_name=attempt_project, repo_path=attempt_path))
+    except Exception:
+        remove_attempt_worktrees(project_name, worktrees)
+        raise
+    return worktrees
+
+
+def remove_attempt_worktrees(project_name: str, attempts: List[ImplementationAttempt]) -> None:
+    repo_path = f"/tmp/{project_name}"
+    for attempt in attempts:
+        change_tracker.forget(attempt.repo_path)
+        stop_mypy_daemon(attempt.repo_path)
+        try:
+            run_git(["worktree", "remove", "--force", attempt.repo_path], cwd=repo_path)
+        except RuntimeError as e:
+            print(f"Failed to remove worktree {attempt.repo_path}: {e}")
+    run_git(["worktree", "prune"], cwd=repo_path)
+
+
+def apply_attempt(project_name: str, attempt: ImplementationAttempt) -> None:
+    """Apply the changes of an attempt to the main checkout as unstaged changes."""
+    run_git(["add", "-A"], cwd=attempt.repo_path)
+    patch = run_git(["diff", "--cached", "--binary", "HEAD"], cwd=attempt.repo_path)
+    if patch.strip():
+        run_git(["apply", "--whitespace=nowarn", "-"], cwd=f"/tmp/{project_name}", input=patch)
+        change_tracker.mark_dirty(f"/tmp/{project_name}")
+
+
+async def run_speculative_implementation(
+    project_name: str,
+    impl_task: str,
+    attempts: int,
+    build_senior_agent: Callable[[str], Any],
+    build_scoring_agent: Callable[[], Any],
+    lint: Callable[[Dict[str, Any]], Any],
+) -> str:
+    """
+    Run `attempts` senior-agent implementations concurrently and keep the best one.
+
+    Each attempt works in its own worktree, gets linted and scored by the story
+    scoring agent, and the winner's changes are applied to /tmp/{project_name}.
+    The other attempts are discarded. Returns the winner's implementation summary,
+    with its paths pointing at the main checkout.
+    """
+    repo_path = f"/tmp/{project_name}"
+    worktrees = create_attempt_worktrees(project_name, attempts)
+
+    async def run_attempt(attempt: ImplementationAttempt) -> None:
+        try:
+            task = rewrite_repo_paths(impl_task, repo_path, attempt.repo_path)
+            senior_agent = build_senior_agent(attempt.project_name)
+            attempt.summary = str(await senior_agent.invoke_async(task))
+
+            attempt.manifest = await asyncio.to_thread(get_manifest, project_name=attempt.project_name, py_only=False)
+            if not attempt.manifest.get("changes"):
+                return
+
+            attempt.lint_errors = count_lint_errors(await asyncio.to_thread(lint, attempt.manifest))
+            score_task = f"""
+            {task}
+
+            Changes Manifest: {format_manifest_code_diffs(attempt.manifest)}
+
+            Implementation Summary: {attempt.summary}
+
+            Evaluate whether the implementation fulfills the Jira story requirements.
+            """
+            attempt.score = parse_story_score(str(await build_scoring_agent().invoke_async(score_task)))
+        except Exception as e:
+            attempt.error = str(e)
+
+    try:
+        await asyncio.gather(*[run_attempt(attempt) for attempt in worktrees])
+        for attempt in worktrees:
+            print(
+                f"Attempt {attempt.index + 1}: changes={len(attempt.manifest.get('changes', []))}, "
+                f"score={attempt.score}, lint_errors={attempt.lint_errors}, error={attempt.error}"
+            )
+
+        winner = max(worktrees, key=lambda attempt: attempt.rank)
+        if winner.error is not None:
+            raise RuntimeError(f"All speculative attempts failed, last error: {winner.error}")
+
+        print(f"Selected attempt {winner.index + 1} of {attempts}")
+        apply_attempt(project_name, winner)
+        return rewrite_repo_paths(winner.summary, winner.repo_path, repo_path)
+    finally:
+        remove_attempt_worktrees(project_name, worktrees)
@@ -5,22 +5,23 @@ import logging
 import time
 import asyncio
 import traceback
-import subprocess
-from typing import Any, Dict, List
+from typing import Any, Dict, Optional
 
 import httpcore
 import httpx
-import boto3
-from botocore.config import Config
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from strands import Agent, tool
-from strands.models import BedrockModel
 from strands.tools.mcp import MCPClient
 from mcp.client.streamable_http import streamablehttp_client
 
 # from ast_reader import MemoryCodeIndex
 from custom_tools import editor, file_read, file_write, shell
 from src.utils.change_manifest import get_manifest, format_manifest_code_diffs
+from src.utils.lint_engine import lint_manifest
+from src.utils.repo_map import build_repo_map
+from src.core.model_router import model_router
+from src.core.speculative import run_speculative_implementation
+from src.core.review_scheduler import ReviewPlan, gather_limited, merge_review_feedback, plan_review
 from prompt.agent_prompt import (
     planner_prompt,
     senior_engineer_prompt,
@@ -59,47 +60,8 @@ os.environ['BYPASS_TOOL_CONSENT'] = 'True'
 # strands_telemetry = StrandsTelemetry()
 # strands_telemetry.setup_otlp_exporter()     # Send traces to OTLP endpoint
 
-retry_config = Config(
-    retries={
-        'max_attempts': 5,
-        'mode': 'standard'  # or 'adaptive'
-    },
-    read_timeout=180
-)
-
-session = boto3.Session()
-
-claude_sonnet_4 = BedrockModel(
-    model_id='us.anthropic.claude-sonnet-4-20250514-v1:0',
-    boto_session=session,
-    boto_client_config=retry_config
-)
-
-bedrock_nova_pro_model = BedrockModel(
-    model_id='us.amazon.nova-pro-v1:0',
-    boto_session=session,
-    boto_client_config=retry_config
-)
-
 # ast_index = MemoryCodeIndex(s3_bucket='nemo-ai-ast-bucket', s3_key='asts/finance_service_agent.json')
 
-def filter_files(directory: str, allowed_extensions: List[str] = ['.py', '.md', '.json', '.txt', '.yml', '.yaml']) -> str:
-    """Return JSON string of file paths excluding .bak and irrelevant files."""
-    files = []
-    exclude_dirs = {'.git', '__pycache__', 'node_modules', '.venv', 'venv', 'env'}
-    
-    for root, dirs, filenames in os.walk(directory):
-        # Remove excluded directories from traversal
-        dirs[:] = [d for d in dirs if d not in exclude_dirs]
-        
-        for filename in filenames:
-            if any(filename.endswith(ext) for ext in allowed_extensions) and not filename.endswith('.bak'):
-                files.append(os.path.join(root, filename))
-    
-    file_context = {"files": files, "total_files": len(files)}
-    print(f"Filtered {len(files)} files from {directory}")
-    return json.dumps(file_context, indent=2)
-
 def extract_manifest_from_output(output: str) -> Dict:
     """Extract the change manifest JSON from the senior agent's output."""
     # Look for the prefixed JSON block
@@ -116,57 +78,30 @@ def extract_manifest_from_output(output: str) -> Dict:
 @tool
 def lint_check(changes_manifest: dict) -> dict:
     """
-    Run linting checks (pylint and mypy) on only the Python files that were modified
-    according to the provided `changes_json`.
+    Run linting checks on only the Python files that were modified according to
+    the provided `changes_json`.
+
+    The backends come from LINT_BACKENDS (ruff, pylint, mypy); ruff is the default
+    when installed, otherwise pylint and mypy. Each backend lints all modified files
+    in one run, backends run concurrently, and results of unchanged file contents
+    are reused from previous checks.
 
-    For each `.py` file in the manifest:
-    - Runs `pylint --errors-only`
-    - Runs `mypy`
+    Only diagnostics on the changed line ranges of the manifest are returned.
 
     Returns:
-      A dictionary mapping each Python file to its linting results, including:
-        - return code (0 = success, nonzero = errors)
-        - stdout (error messages / warnings)
+      A dictionary with:
+        - backends: the linters that ran
+        - diagnostics: list of {file, line, column, code, message, backend}
+        - outside_changes: number of diagnostics outside the changed lines
+        - errors: backend -> failure message, if a linter could not run
     """
 
     try:
-        py_files = {
-            change["file_path"]
-            for change in changes_manifest.get("changes", [])
-            if change["file_path"].endswith(".py")
-        }
-        print("lint_check py_files", py_files)
-
-        results: Dict[str, Any] = {"lint_results": {}}
-
-        for f in py_files:
-            results["lint_results"][f] = {}
-
-            # Run pylint
-            pylint_res = subprocess.run(
-                ["pylint", "--errors-only", f],
-                capture_output=True, text=True
-            )
-            results["lint_results"][f]["pylint"] = {
-                "returncode": pylint_res.returncode,
-                "stdout": pylint_res.stdout.strip(),
-            }
-
-            # Run mypy
-            mypy_res = subprocess.run(
-                ["mypy", f],
-                capture_output=True, text=True
-            )
-            results["lint_results"][f]["mypy"] = {
-                "returncode": mypy_res.returncode,
-                "stdout": mypy_res.stdout.strip(),
-            }
-
-        return results
+        print("lint_check files", {change["file_path"] for change in changes_manifest.get("changes", [])})
+        return lint_manifest(changes_manifest)
     except Exception as e:
         return f"Error in lint_check: {e}"
 
-# file_context = filter_files('/tmp/finance_service_agent')
 # planner_prompt = planner_prompt.format(project_name=project_name, file_context=file_context)
 
 # planner_agent = Agent(
@@ -201,15 +136,6 @@ def lint_check(changes_manifest: dict) -> dict:
 #     callback_handler=None
 # )
 
-# Initialize single code reviewer agent (combines all review aspects)
-code_reviewer_agent = Agent(
-    name='code_reviewer',
-    model=claude_sonnet_4,  # Use Claude for better code review
-    system_prompt=code_reviewer_prompt,
-    tools=[file_read, shell],
-    callback_handler=None
-)
-
 # security_agent = Agent(
 #     name='security_engineer',
 #     model=bedrock_nova_pro_model,
@@ -218,54 +144,72 @@ code_reviewer_agent = Agent(
 #     callback_handler=None
 # )
 
-coding_standard_agent = Agent(
-    name='coding_standard_engineer',
-    model=bedrock_nova_pro_model,
-    system_prompt=coding_standard_prompt,
-    tools=[file_read, shell],
-    callback_handler=None
-)
-
-low_system_design_agent = Agent(
-    name='low_system_design_engineer',
-    model=bedrock_nova_pro_model,
-    system_prompt=low_system_design_engineer_prompt,
-    tools=[file_read, shell],
-    callback_handler=None
-)
-
-data_structure_algorithms_agent = Agent(
-    name='data_structure_algorithms_agent',
-    model=bedrock_nova_pro_model,
-    system_prompt=data_structure_algorithms_agent_prompt,
-    tools=[file_read, shell],
-    callback_handler=None
-)
-
-story_scoring_agent = Agent(
-    name='story_scoring_agent',
-    model=bedrock_nova_pro_model,
-    system_prompt=story_scoring_prompt,
-    tools=[file_read, shell],
-    callback_handler=None
-)
-
-review_agents = {
-    # 'security_agent': security_agent,
-    'coding_standard_agent': coding_standard_agent,
-    'low_system_design_agent': low_system_design_agent,
-    # 'library_compatibility_agent': library_compatibility_agent,
-    'data_structure_algorithms_agent': data_structure_algorithms_agent,   
+# Reviewer role -> (agent name, model router stage, system prompt). The single code reviewer
+# combines all review aspects and is used on its own for small diffs.
+review_agent_configs = {
+    'code_reviewer_agent': ('code_reviewer', 'code_reviewer', code_reviewer_prompt),
+    # 'security_agent': ('security_engineer', 'security', security_engineer_prompt),
+    'coding_standard_agent': ('coding_standard_engineer', 'coding_standard', coding_standard_prompt),
+    'low_system_design_agent': ('low_system_design_engineer', 'system_design', low_system_design_engineer_prompt),
+    # 'library_compatibility_agent': ...,
+    'data_structure_algorithms_agent': (
+        'data_structure_algorithms_agent', 'algorithms', data_structure_algorithms_agent_prompt
+    ),
 }
 
+def create_review_agent(role: str) -> Agent:
+    """Create a fresh reviewer agent, so concurrent review calls don't share conversation state."""
+    name, stage, system_prompt = review_agent_configs[role]
+    return Agent(
+        name=name,
+        model=model_router.model_for_stage(stage),
+        system_prompt=system_prompt,
+        tools=[file_read, shell],
+        callback_handler=None
+    )
+
+async def run_review_plan(review_plan: ReviewPlan, code_diffs: str) -> Dict[str, str]:
+    """Run the reviewers chosen by the scheduler, one call per shard and role, and merge their feedback."""
+    review_calls = []
+    for shard in review_plan.shards:
+        shard_diffs = code_diffs if len(review_plan.shards) == 1 else format_manifest_code_diffs(shard)
+        review_task = f"""Changes to review:\n{shard_diffs}"""
+        for role in review_plan.reviewers:
+            review_calls.append((role, create_review_agent(role).invoke_async(review_task)))
+
+    feedback_results = await gather_limited([call for _, call in review_calls])
+    shard_feedback = list(zip([role for role, _ in review_calls], map(str, feedback_results)))
+    if len(review_plan.shards) == 1:
+        return dict(shard_feedback)
+    return merge_review_feedback(shard_feedback)
+
+def create_story_scoring_agent() -> Agent:
+    """Create a fresh story scoring agent."""
+    return Agent(
+        name='story_scoring_agent',
+        model=model_router.model_for_stage('story_scoring'),
+        system_prompt=story_scoring_prompt,
+        tools=[file_read, shell],
+        callback_handler=None
+    )
+
 @retry(
     stop=stop_after_attempt(1),
     wait=wait_exponential(multiplier=1, min=1, max=10),
     retry=retry_if_exception_type((httpx.ReadTimeout, httpcore.ReadTimeout, Exception)),
     before_sleep=lambda retry_state: print(f"Retrying workflow, attempt {retry_state.attempt_number}...")
 )
-async def nemo_workflow(project_name: str, jira_story: str, jira_story_id: str) -> str:
-    """Entry point for the Nemo AI workflow."""
+async def nemo_workflow(
+    project_name: str, jira_story: str, jira_story_id: str, speculative_attempts: Optional[int] = None
+) -> str:
+    """
+    Entry point for the Nemo AI workflow.
+
+    With `speculative_attempts` (or NEMO_SPECULATIVE_ATTEMPTS) above 1, that many senior-agent
+    implementations run concurrently in separate worktrees and the best one is kept.
+    """
+    if speculative_attempts is None:
+        speculative_attempts = int(os.getenv("NEMO_SPECULATIVE_ATTEMPTS", "1"))
 
     print("Initializing Context7 MCP client...")
     context7_mcp = MCPClient(lambda: streamablehttp_client("https://mcp.context7.com/mcp"))
@@ -287,11 +231,11 @@ async def nemo_workflow(project_name: str, jira_story: str, jira_story_id: str)
 
             print("Step 1: Planning phase")
             repo_path = f'/tmp/{project_name}'
-            file_context = filter_files(repo_path)
+            file_context = build_repo_map(repo_path, jira_story)
             
             planner_agent = Agent(
                 name='planner_engineer',
-                model=claude_sonnet_4,
+                model=model_router.model_for_stage('planner'),
                 system_prompt=planner_prompt.format(project_name=project_name, file_context=file_context),
                 tools=[file_read, shell, *aws_documentation_tools],
                 callback_handler=None
@@ -300,13 +244,17 @@ async def nemo_workflow(project_name: str, jira_story: str, jira_story_id: str)
             print(f"Plan created:\\n{plan}")
 
             print("Step 2: Implementation phase")
-            senior_agent = Agent(
-                name='senior_software_engineer',
-                model=claude_sonnet_4,
-                system_prompt=senior_engineer_prompt.format(project_name=project_name),
-                tools=[editor, file_read, file_write, shell, *context7_tools, *aws_documentation_tools],
-                callback_handler=None
-            )
+
+            def create_senior_agent(agent_project_name: str) -> Agent:
+                return Agent(
+                    name='senior_software_engineer',
+                    model=model_router.model_for_stage('senior'),
+                    system_prompt=senior_engineer_prompt.format(project_name=agent_project_name),
+                    tools=[editor, file_read, file_write, shell, *context7_tools, *aws_documentation_tools],
+                    callback_handler=None
+                )
+
+            senior_agent = create_senior_agent(project_name)
             
             impl_task = f"""
             Jira Story: {jira_story}
@@ -320,11 +268,22 @@ async def nemo_workflow(project_name: str, jira_story: str, jira_story_id: str)
             3. Do NOT add extra features or improvements
             """
             
-            change_summary = str(senior_agent(impl_task))
+            if speculative_attempts > 1:
+                print(f"Running {speculative_attempts} speculative implementation attempts")
+                change_summary = await run_speculative_implementation(
+                    project_name=project_name,
+                    impl_task=impl_task,
+                    attempts=speculative_attempts,
+                    build_senior_agent=create_senior_agent,
+                    build_scoring_agent=create_story_scoring_agent,
+                    lint=lint_check,
+                )
+            else:
+                change_summary = str(senior_agent(impl_task))
             print(f"Implementation completed:\\n{change_summary}")
 
             print("Step 3: Capturing changes via git manifest")
-            change_manifest = get_manifest(project_name=project_name, py_only=True)
+            change_manifest = get_manifest(project_name=project_name, py_only=False)
             
             if not change_manifest.get("changes"):
                 print("No changes detected in manifest!")
@@ -335,14 +294,16 @@ async def nemo_workflow(project_name: str, jira_story: str, jira_story_id: str)
             print("Step 4: Code review phase")
             
             code_diffs = format_manifest_code_diffs(change_manifest) 
-            review_task = f"""Changes to review:\n{code_diffs}"""
-            print(f"==>> review_task: \n{review_task}")
+            print(f"==>> code_diffs: \n{code_diffs}")
+
+            review_plan = plan_review(change_manifest, code_diffs)
+            print(
+                f"Review plan: mode={review_plan.mode}, reviewers={review_plan.reviewers}, "
+                f"shards={len(review_plan.shards)}, score={review_plan.score}"
+            )
             
             start_time = time.perf_counter()
-            feedback_results = await asyncio.gather(*[
-                agent.invoke_async(review_task) for agent in review_agents.values()
-            ])
-            feedback = dict(zip(review_agents.keys(), map(str, feedback_results)))
+            feedback = await run_review_plan(review_plan, code_diffs)
             end_time = time.perf_counter()
             print(f"Review agents feedback completed in {end_time - start_time:.2f} seconds")
 
@@ -376,7 +337,7 @@ async def nemo_workflow(project_name: str, jira_story: str, jira_story_id: str)
             change_summary += f"\\n\\nRevisions based on feedback:\\n{revised_summary}"
             
             # Update manifest after revisions
-            change_manifest = get_manifest(project_name=project_name, py_only=True)
+            change_manifest = get_manifest(project_name=project_name, py_only=False)
             code_diffs = format_manifest_code_diffs(change_manifest) 
 
             print("Step 6: Story scoring phase")
@@ -393,14 +354,14 @@ async def nemo_workflow(project_name: str, jira_story: str, jira_story_id: str)
             Evaluate whether the implementation fulfills the Jira story requirements.
             Use file_read to review the actual changed code sections from the manifest.
             """
-            score = str(story_scoring_agent(score_task))
+            score = str(create_story_scoring_agent()(score_task))
             print(f"Story score: {score}")
 
             print("Step 7: Generating PR documentation")
 
             doc_agent = Agent(
                 name='doc_agent',
-                model=bedrock_nova_pro_model,
+                model=model_router.model_for_stage('doc'),
                 system_prompt=doc_prompt.format(
                     project_name=project_name,
                     jira_story_id=jira_story_id
@@ -427,6 +388,7 @@ async def nemo_workflow(project_name: str, jira_story: str, jira_story_id: str)
             doc_result = str(doc_agent(doc_task))
             print(f"doc_result", doc_result)
             print("PR documentation generated successfully")
+            print(f"Model usage: {json.dumps(model_router.stats_summary(), indent=2)}")
             
             return json.dumps({
                 "status": "success",
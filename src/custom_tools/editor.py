@@ -18,19 +18,19 @@ Key Features:
    • Create: New file creation with proper directory handling
    • Replace: Precise string and pattern-based replacement
    • Insert: Smart line finding and content insertion
-   • Undo: Automatic backup and restore capability
+   • Undo: Multi-level undo from an in-memory journal
 
 3. Smart Features:
-   • Content History: Caches file contents to reduce reads
+   • Shared File Cache: Reuses file contents across tools until they change on disk
    • Pattern Matching: Regex-based replacements
    • Smart Line Finding: Context-aware line location
    • Fuzzy Search: Flexible text matching
 
 4. Safety Features:
-   • Automatic backup creation before modifications
-   • Content caching for performance
+   • Previous content journaled in memory before modifications, no backup files
+   • Content caching for performance, invalidated by writes and shell commands
    • Error prevention and validation
-   • One-step undo functionality
+   • Multi-level undo per file
 
 Usage with Strands Agent:
 ```python
@@ -61,7 +61,7 @@ agent.tool.editor(
     new_str="    # This is a new comment"
 )
 
-# Undo the most recent change
+# Undo the most recent change (repeat to undo earlier ones)
 agent.tool.editor(command="undo_edit", path="/path/to/file.py")
 ```
 
@@ -71,7 +71,7 @@ See the editor function docstring for more details on available commands and par
 import os
 import re
 import shutil
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from rich import box
 from rich.panel import Panel
@@ -82,26 +82,21 @@ from rich.tree import Tree
 from strands import tool
 
 from custom_tools.utils import console_util
+from custom_tools.utils.anchor_match import find_anchor
+from custom_tools.utils.change_tracker import change_tracker
 from custom_tools.utils.detect_language import detect_language
+from custom_tools.utils.file_cache import file_cache
+from custom_tools.utils.undo_journal import Snapshot, undo_journal
+from custom_tools.utils.unified_patch import apply_hunks, parse_patch
 from custom_tools.utils.user_input import get_user_input
 
-# Global content history cache
-CONTENT_HISTORY = {}
-
-
-def save_content_history(path: str, content: str) -> None:
-    """Save file content to history cache."""
-    CONTENT_HISTORY[path] = content
-
-
-def get_last_content(path: str) -> Optional[str]:
-    """Get last known content for a file."""
-    return CONTENT_HISTORY.get(path)
-
 
 def find_context_line(content: str, search_text: str, fuzzy: bool = False) -> int:
     """Find line number based on contextual search.
 
+    Exact and whitespace-normalized matches are always tried; fuzzy matching adds
+    in-order word matching and token similarity. See `anchor_match.find_anchor`.
+
     Args:
         content: File content to search
         search_text: Text to find
@@ -110,20 +105,7 @@ def find_context_line(content: str, search_text: str, fuzzy: bool = False) -> in
     Returns:
         Line number (0-based) or -1 if not found
     """
-    lines = content.split("\n")
-
-    if fuzzy:
-        # Convert search text to regex pattern
-        pattern = ".*".join(map(re.escape, search_text.strip().split()))
-        for i, line in enumerate(lines):
-            if re.search(pattern, line, re.IGNORECASE):
-                return i
-    else:
-        for i, line in enumerate(lines):
-            if search_text in line:
-                return i
-
-    return -1
+    return find_anchor(content, search_text, fuzzy)
 
 
 def validate_pattern(pattern: str) -> bool:
@@ -135,6 +117,124 @@ def validate_pattern(pattern: str) -> bool:
         return False
 
 
+def apply_edit(content: str, edit: Dict[str, Any]) -> Tuple[str, str]:
+    """Apply one str_replace, pattern_replace or insert edit in memory.
+
+    Args:
+        content: Current file content
+        edit: The edit, with the parameters of the matching editor command
+
+    Returns:
+        The new content and a short description of the change
+
+    Raises:
+        ValueError: If the edit is incomplete or does not apply to the content
+    """
+    edit_command = edit.get("command")
+    new_str = edit.get("new_str")
+
+    if edit_command == "str_replace":
+        old_str = edit.get("old_str")
+        if not old_str or new_str is None:
+            raise ValueError("Both old_str and new_str are required for str_replace")
+        count = content.count(old_str)
+        if count == 0:
+            raise ValueError(f"old_str not found: {old_str!r}")
+        return content.replace(old_str, new_str), f"replaced {count} occurrence{'s' if count > 1 else ''}"
+
+    if edit_command == "pattern_replace":
+        pattern = edit.get("pattern")
+        if not pattern or new_str is None:
+            raise ValueError("Both pattern and new_str are required for pattern_replace")
+        if not validate_pattern(pattern):
+            raise ValueError(f"Invalid regex pattern: {pattern}")
+        new_content, count = re.subn(pattern, new_str, content)
+        if count == 0:
+            raise ValueError(f"pattern not found: {pattern!r}")
+        return new_content, f"replaced {count} match{'es' if count > 1 else ''} of {pattern!r}"
+
+    if edit_command == "insert":
+        insert_line = edit.get("insert_line")
+        if not new_str or insert_line is None:
+            raise ValueError("Both new_str and insert_line are required for insert")
+        lines = content.split("\n")
+        if isinstance(insert_line, str):
+            line_num = find_context_line(content, insert_line, edit.get("fuzzy", False))
+            if line_num == -1:
+                raise ValueError(f"insertion point not found: {insert_line!r}")
+            insert_line = line_num
+        if insert_line < 0 or insert_line > len(lines):
+            raise ValueError(f"insert_line {insert_line} is out of range")
+        lines.insert(insert_line, new_str)
+        return "\n".join(lines), f"inserted at line {insert_line}"
+
+    raise ValueError(f"Unsupported edit command: {edit_command}. Use str_replace, pattern_replace or insert")
+
+
+def replace_file(file_path: str, content: Union[str, bytes]) -> None:
+    """Write a file through a temporary file that then replaces it, keeping its mode."""
+    temp_path = os.path.join(os.path.dirname(file_path), f".{os.path.basename(file_path)}.{os.getpid()}.tmp")
+    try:
+        with open(temp_path, "wb" if isinstance(content, bytes) else "w") as f:
+            f.write(content)
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, temp_path)
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def restore_file(file_path: str, snapshot: Snapshot) -> None:
+    """Put a file back in the state of an undo journal snapshot."""
+    if snapshot.content is None:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+    else:
+        replace_file(file_path, snapshot.content)
+
+
+def write_files(contents: Dict[str, str]) -> None:
+    """Write several files as one change, journaling their previous content for undo.
+
+    Files that do not exist are created. If any write fails, the files already
+    written are restored, nothing is journaled, and the error is raised.
+    """
+    snapshots: Dict[str, Snapshot] = {}
+    for file_path in contents:
+        if os.path.exists(file_path):
+            with open(file_path, "rb") as f:
+                snapshots[file_path] = Snapshot(f.read())
+        else:
+            snapshots[file_path] = Snapshot(None)
+
+    written: List[str] = []
+    try:
+        for file_path, content in contents.items():
+            if snapshots[file_path].content is None:
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            replace_file(file_path, content)
+            written.append(file_path)
+    except OSError:
+        for file_path in written:
+            restore_file(file_path, snapshots[file_path])
+        raise
+
+    for file_path, snapshot in snapshots.items():
+        undo_journal.record(file_path, snapshot.content)
+
+
+def resolve_patch_path(base: str, patch_path: Optional[str]) -> str:
+    """Resolve a path from a patch header against the editor's `path`."""
+    if not patch_path:
+        if os.path.isdir(base):
+            raise ValueError("Patch has no file headers; use the target file as path")
+        return base
+    if os.path.isabs(patch_path):
+        return patch_path
+    return os.path.join(base if os.path.isdir(base) else os.path.dirname(base), patch_path)
+
+
 def format_code(code: str, language: str) -> Syntax:
     """Format code using Rich syntax highlighting."""
     syntax = Syntax(code, language, theme="monokai", line_numbers=True)
@@ -192,19 +292,23 @@ def editor(
     search_text: Optional[str] = None,
     fuzzy: bool = False,
     view_range: Optional[List[int]] = None,
+    edits: Optional[List[Dict[str, Any]]] = None,
+    patch: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Editor tool designed to do changes iteratively on multiple files.
 
     This tool provides a comprehensive interface for file operations, including viewing,
     creating, modifying, and searching files with rich output formatting. It features
-    syntax highlighting, smart line finding, and automatic backups for safety.
+    syntax highlighting, smart line finding, and multi-level undo for safety.
 
     IMPORTANT ERROR PREVENTION:
     1. Required Parameters:
        • file_text: REQUIRED for 'create' command - content of file to create
        • search_text: REQUIRED for 'find_line' command - text to search
        • insert command: BOTH new_str AND insert_line REQUIRED
+       • edits: REQUIRED for 'apply_edits' command - list of edits to apply together
+       • patch: REQUIRED for 'apply_patch' command - unified diff to apply
 
     2. Command-Specific Requirements:
        • create: Must provide file_text, file_text is required for create command
@@ -212,6 +316,8 @@ def editor(
        • pattern_replace: Both pattern and new_str required
        • insert: Both new_str and insert_line required
        • find_line: search_text required
+       • apply_edits: edits required, each with the parameters of its command
+       • apply_patch: patch required
 
     3. Path Handling:
        • Use absolute paths (e.g., /Users/name/file.txt)
@@ -229,16 +335,17 @@ def editor(
        • Creates new files with specified content
        • Creates parent directories if they don't exist
        • Caches content for subsequent operations
+       • Undoing the creation of a new file removes it
 
     3. str_replace:
        • Replaces exact string matches in a file
-       • Creates automatic backup before modification
+       • Journals the previous content for undo_edit
        • Returns details about number of replacements
 
     4. pattern_replace:
        • Uses regex patterns for advanced text replacement
        • Validates patterns before execution
-       • Creates automatic backup before modification
+       • Journals the previous content for undo_edit
 
     5. insert:
        • Inserts text after a specified line
@@ -251,20 +358,36 @@ def editor(
        • Shows context around found line
 
     7. undo_edit:
-       • Reverts to the most recent backup
-       • Removes the backup file after restoration
+       • Reverts the most recent change to the file, byte for byte
+       • Repeat to undo earlier changes (the last 10 per file, within 32 MB in total)
        • Updates content cache with restored version
 
+    8. apply_edits:
+       • Applies a list of str_replace, pattern_replace and insert edits in one call
+       • Edits may target several files; each edit uses `path` unless it sets its own
+       • Edits apply in order, so later edits see the result of earlier ones
+       • All edits are validated in memory first: if any fails, no file is changed
+       • Each changed file is written once; undo_edit reverts it per file
+
+    9. apply_patch:
+       • Applies a unified diff (`diff -u` / `git diff` format) to one or more files
+       • Header paths are relative to `path` (the repo root), or to the directory of `path`
+         when it is a file; a patch without headers applies to the file `path`
+       • Hunks apply near their line numbers, tolerating moved code, whitespace differences
+         and up to 2 mismatched context lines at each end
+       • Reports where each hunk applied; if any hunk fails, no file is changed
+       • Supports creating files (`--- /dev/null`); deleting files is not supported
+
     Smart Features:
     ------------
     • Content caching improves performance by reducing file reads
     • Fuzzy search allows finding lines with approximate matches
-    • Automatic backups before modifications ensure safety
+    • An in-memory undo journal replaces backup files next to the sources
     • Rich output formatting enhances readability of results
 
     Args:
         command: The commands to run: `view`, `create`, `str_replace`, `pattern_replace`,
-                `insert`, `find_line`, `undo_edit`.
+                `insert`, `find_line`, `undo_edit`, `apply_edits`, `apply_patch`.
         path: Absolute path to file or directory, e.g. `/repo/file.py` or `/repo`.
                 User paths with tilde (~) are automatically expanded.
         file_text: Required parameter of `create` command, with the content of the file to be created.
@@ -275,9 +398,15 @@ def editor(
         old_str: Required parameter of `str_replace` command containing the exact string to replace.
         pattern: Required parameter of `pattern_replace` command containing the regex pattern to match.
         search_text: Text to search for in `find_line` command. Supports fuzzy matching.
-        fuzzy: Enable fuzzy matching for `find_line` command.
+        fuzzy: Enable fuzzy matching for `find_line` and `insert` commands: words in order, then
+                the line sharing most tokens. Whitespace differences are always tolerated.
         view_range: Optional parameter of `view` command. Line range to show [start, end].
                 Supports negative indices.
+        edits: Required parameter of `apply_edits` command. List of edits, each a dict with
+                `command` (`str_replace`, `pattern_replace` or `insert`), an optional `path`, and
+                the parameters of that command (`old_str`, `new_str`, `pattern`, `insert_line`, `fuzzy`).
+        patch: Required parameter of `apply_patch` command. Unified diff text, with `---`/`+++`
+                file headers and `@@ -start,count +start,count @@` hunks.
 
     Returns:
         Dict containing status and response content in the format:
@@ -310,6 +439,16 @@ def editor(
 
         7. Undo recent change:
            editor(command="undo_edit", path="/path/to/file.py")
+
+        8. Apply several edits at once:
+           editor(command="apply_edits", path="/path/to/file.py", edits=[
+               {"command": "str_replace", "old_str": "old_name(", "new_str": "new_name("},
+               {"command": "insert", "insert_line": "import os", "new_str": "import sys"},
+               {"command": "str_replace", "path": "/path/to/other.py", "old_str": "old", "new_str": "new"},
+           ])
+
+        9. Apply a patch to files of a repository:
+           editor(command="apply_patch", path="/path/to/repo", patch="--- a/app.py\n+++ b/app.py\n@@ -3,3 +3,3 @@\n...")
     """
     console = console_util.create()
 
@@ -320,7 +459,10 @@ def editor(
             raise ValueError("Command is required")
 
         # Validate command
-        valid_commands = ["view", "create", "str_replace", "pattern_replace", "insert", "find_line", "undo_edit"]
+        valid_commands = [
+            "view", "create", "str_replace", "pattern_replace", "insert", "find_line", "undo_edit", "apply_edits",
+            "apply_patch",
+        ]
         if command not in valid_commands:
             raise ValueError(f"Unknown command: {command}. Valid commands: {', '.join(valid_commands)}")
 
@@ -333,7 +475,7 @@ def editor(
         strands_dev = os.environ.get("BYPASS_TOOL_CONSENT", "").lower() == "true"
 
         # For modifying operations, show confirmation dialog unless in BYPASS_TOOL_CONSENT mode
-        modifying_commands = {"create", "str_replace", "pattern_replace", "insert"}
+        modifying_commands = {"create", "str_replace", "pattern_replace", "insert", "apply_edits", "apply_patch"}
         needs_confirmation = command in modifying_commands and not strands_dev
 
         if needs_confirmation:
@@ -429,6 +571,31 @@ def editor(
                     Syntax(new_str, language, theme="monokai", line_numbers=True),
                 )
                 console.print(table)
+            elif command == "apply_edits":
+                if not edits:
+                    raise ValueError("edits is required for apply_edits command")
+                table = Table(title="Edits Preview", show_header=True)
+                table.add_column("#", style="cyan", justify="right")
+                table.add_column("File", style="yellow")
+                table.add_column("Edit", style="white")
+                table.add_column("New Content", style="green")
+                for index, edit in enumerate(edits, start=1):
+                    target = edit.get("old_str") or edit.get("pattern") or edit.get("insert_line")
+                    table.add_row(
+                        str(index), edit.get("path") or path, f"{edit.get('command')}: {target}", str(edit.get("new_str"))
+                    )
+                console.print(table)
+            elif command == "apply_patch":
+                if not patch:
+                    raise ValueError("patch is required for apply_patch command")
+                console.print(
+                    Panel(
+                        Syntax(patch, "diff", theme="monokai", line_numbers=True),
+                        title=f"[bold blue]Patch Preview ({path})",
+                        border_style="blue",
+                        box=box.ROUNDED,
+                    )
+                )
 
             # Get user confirmation
             user_input = get_user_input(
@@ -456,12 +623,8 @@ def editor(
 
         if command == "view":
             if os.path.isfile(path):
-                # Check content history first
-                content = get_last_content(path)
-                if content is None:
-                    with open(path, "r") as f:
-                        content = f.read()
-                    save_content_history(path, content)
+                # Read through the shared file cache
+                content = file_cache.read(path)
 
                 if view_range:
                     lines = content.split("\n")
@@ -492,10 +655,11 @@ def editor(
                 result = f"File content displayed in console.\nContent: {content}"
 
             elif os.path.isdir(path):
-                # Directory visualization
-                tree = format_directory_tree(path, editor_dir_tree_max_depth)
-                formatted_output = format_output(f"📁 Directory: {path}", tree, "blue")
-                console.print(formatted_output)
+                # Directory visualization, only walked when the console is shown
+                if not console_util.is_headless():
+                    tree = format_directory_tree(path, editor_dir_tree_max_depth)
+                    formatted_output = format_output(f"📁 Directory: {path}", tree, "blue")
+                    console.print(formatted_output)
                 result = f"Directory structure displayed in console.\nDirectory tree: {path}"
             else:
                 raise ValueError(f"Path {path} does not exist")
@@ -507,9 +671,10 @@ def editor(
             os.makedirs(os.path.dirname(path), exist_ok=True)
 
             # Write the file and cache content
+            undo_journal.record_file(path)
             with open(path, "w") as f:
                 f.write(file_text)
-            save_content_history(path, file_text)
+            change_tracker.record_write(path, file_text)
 
             # Just return success message
             result = f"File {path} created successfully"
@@ -518,12 +683,8 @@ def editor(
             if not old_str or new_str is None:
                 raise ValueError("Both old_str and new_str are required for str_replace command")
 
-            # Check content history first
-            content = get_last_content(path)
-            if content is None:
-                with open(path, "r") as f:
-                    content = f.read()
-                save_content_history(path, content)
+            # Read through the shared file cache
+            content = file_cache.read(path)
 
             # Count occurrences
             count = content.count(old_str)
@@ -534,15 +695,14 @@ def editor(
                     "content": [{"text": f"Note: old_str not found in {path}. Current content:\n{content}"}],
                 }
 
-            # Make replacements and backup
+            # Make replacements and journal the previous content
             new_content = content.replace(old_str, new_str)
-            backup_path = f"{path}.bak"
-            shutil.copy2(path, backup_path)
+            undo_journal.record_file(path)
 
             # Write new content and update cache
             with open(path, "w") as f:
                 f.write(new_content)
-            save_content_history(path, new_content)
+            change_tracker.record_write(path, new_content)
 
             result = (
                 f"Text replacement complete and details displayed in console.\nFile: {path}\n"
@@ -558,12 +718,8 @@ def editor(
             if not validate_pattern(pattern):
                 raise ValueError(f"Invalid regex pattern: {pattern}")
 
-            # Check content history
-            content = get_last_content(path)
-            if content is None:
-                with open(path, "r") as f:
-                    content = f.read()
-                save_content_history(path, content)
+            # Read through the shared file cache
+            content = file_cache.read(path)
 
             # Compile pattern and find matches
             regex = re.compile(pattern)
@@ -604,15 +760,14 @@ def editor(
             if len(matches) > 5:
                 preview_table.add_row("...", f"({len(matches) - 5} more matches)", "→", "...")
 
-            # Make replacements and backup
+            # Make replacements and journal the previous content
             new_content = regex.sub(new_str, content)
-            backup_path = f"{path}.bak"
-            shutil.copy2(path, backup_path)
+            undo_journal.record_file(path)
 
             # Write new content and update cache
             with open(path, "w") as f:
                 f.write(new_content)
-            save_content_history(path, new_content)
+            change_tracker.record_write(path, new_content)
 
             # Show summary info
             info_table = Table(show_header=False, border_style="blue")
@@ -623,7 +778,7 @@ def editor(
             info_table.add_row("Replacement:", new_str)
             info_table.add_row("Total Matches:", str(len(matches)))
             info_table.add_row("File:", path)
-            info_table.add_row("Backup:", backup_path)
+            info_table.add_row("Undo steps:", str(undo_journal.steps(path)))
 
             # Render the UI
             console.print("")
@@ -647,12 +802,8 @@ def editor(
             if not new_str or insert_line is None:
                 raise ValueError("Both new_str and insert_line are required for insert command")
 
-            # Get content
-            content = get_last_content(path)
-            if content is None:
-                with open(path, "r") as f:
-                    content = f.read()
-                save_content_history(path, content)
+            # Read through the shared file cache
+            content = file_cache.read(path)
 
             lines = content.split("\n")
 
@@ -677,16 +828,15 @@ def editor(
             if insert_line < 0 or insert_line > len(lines):
                 raise ValueError(f"insert_line {insert_line} is out of range")
 
-            # Make backup
-            backup_path = f"{path}.bak"
-            shutil.copy2(path, backup_path)
+            # Journal the previous content
+            undo_journal.record_file(path)
 
             # Insert and write
             lines.insert(insert_line, new_str)
             new_content = "\n".join(lines)
             with open(path, "w") as f:
                 f.write(new_content)
-            save_content_history(path, new_content)
+            change_tracker.record_write(path, new_content)
 
             # Show context
             context_start = max(0, insert_line - 2)
@@ -717,12 +867,8 @@ def editor(
             if not search_text:
                 raise ValueError("search_text is required for find_line command")
 
-            # Get content
-            content = get_last_content(path)
-            if content is None:
-                with open(path, "r") as f:
-                    content = f.read()
-                save_content_history(path, content)
+            # Read through the shared file cache
+            content = file_cache.read(path)
 
             # Find line
             line_num = find_context_line(content, search_text, fuzzy)
@@ -764,23 +910,109 @@ def editor(
             result = f"Line found in file.\nFile: {path}\nLine number: {line_num + 1}"
 
         elif command == "undo_edit":
-            backup_path = f"{path}.bak"
+            # Restore the content from before the last edit
+            snapshot = undo_journal.pop(path)
+            restore_file(path, snapshot)
+
+            # Update the change tracker and file cache
+            if snapshot.content is None:
+                change_tracker.mark_dirty(path)
+                reverted = f"Successfully reverted changes to {path} (file removed)"
+            else:
+                change_tracker.record_write(path, snapshot.content.decode("utf-8", errors="replace"))
+                reverted = f"Successfully reverted changes to {path}"
+            steps = undo_journal.steps(path)
+            if steps:
+                reverted += f"\n{steps} earlier change{'s' if steps > 1 else ''} can still be undone"
 
-            if not os.path.exists(backup_path):
-                raise ValueError(f"No backup file found for {path}")
+            formatted_output = format_output("↩️ Undo Complete", reverted, "yellow")
+            console.print(formatted_output)
+            result = reverted
+
+        elif command == "apply_edits":
+            if not edits:
+                raise ValueError("edits is required for apply_edits command")
+
+            # Apply every edit in memory first, so a failing edit leaves all files untouched
+            originals: Dict[str, str] = {}
+            updated: Dict[str, str] = {}
+            summaries = []
+            for index, edit in enumerate(edits, start=1):
+                edit_path = os.path.expanduser(edit.get("path") or path)
+                if edit_path not in updated:
+                    if not os.path.isfile(edit_path):
+                        raise ValueError(f"Edit {index}: file not found: {edit_path}. No file was changed")
+                    originals[edit_path] = updated[edit_path] = file_cache.read(edit_path)
+                try:
+                    updated[edit_path], summary = apply_edit(updated[edit_path], edit)
+                except ValueError as e:
+                    raise ValueError(
+                        f"Edit {index} ({edit.get('command')} in {edit_path}) failed: {e}. No file was changed"
+                    )
+                summaries.append((index, edit_path, summary))
 
-            # Restore from backup
-            shutil.copy2(backup_path, path)
-            os.remove(backup_path)
+            # Write each changed file once
+            changed = {p: content for p, content in updated.items() if content != originals[p]}
+            write_files(changed)
+            for file_path, content in changed.items():
+                change_tracker.record_write(file_path, content)
 
-            # Update cache from backup
-            with open(path, "r") as f:
-                content = f.read()
-            save_content_history(path, content)
+            table = Table(show_header=True, header_style="bold magenta")
+            table.add_column("#", style="cyan", justify="right")
+            table.add_column("File", style="yellow")
+            table.add_column("Change", style="green")
+            for index, edit_path, summary in summaries:
+                table.add_row(str(index), edit_path, summary)
+            console.print(format_output("✏️ Edits Applied", f"{len(edits)} edits in {len(changed)} files", "green"))
+            console.print(table)
 
-            formatted_output = format_output("↩️ Undo Complete", f"Successfully reverted changes to {path}", "yellow")
-            console.print(formatted_output)
-            result = f"Successfully reverted changes to {path}"
+            result = f"Applied {len(edits)} edits to {len(changed)} files:\n" + "\n".join(
+                f"{index}. {edit_path}: {summary}" for index, edit_path, summary in summaries
+            )
+
+        elif command == "apply_patch":
+            if not patch:
+                raise ValueError("patch is required for apply_patch command")
+
+            # Apply all hunks in memory first, so a failing hunk leaves all files untouched
+            contents: Dict[str, str] = {}
+            reports = []
+            hunk_total = 0
+            failed = False
+            for file_patch in parse_patch(patch):
+                if file_patch.new_path == "/dev/null":
+                    raise ValueError(f"Deleting files is not supported by apply_patch: {file_patch.old_path}")
+                created = file_patch.old_path == "/dev/null"
+                file_path = resolve_patch_path(path, file_patch.new_path if created else file_patch.old_path)
+                if created:
+                    if os.path.exists(file_path):
+                        raise ValueError(f"Patch creates {file_path}, which already exists")
+                    content = ""
+                elif file_path in contents:
+                    content = contents[file_path]
+                elif os.path.isfile(file_path):
+                    content = file_cache.read(file_path)
+                else:
+                    raise ValueError(f"File not found: {file_path}")
+
+                contents[file_path], hunk_results = apply_hunks(content, file_patch.hunks)
+                hunk_total += len(hunk_results)
+                failed = failed or not all(r.applied for r in hunk_results)
+                reports.append(f"{file_path}: " + "; ".join(r.describe() for r in hunk_results))
+
+            if failed:
+                return {
+                    "status": "error",
+                    "content": [{"text": "Patch not applied, no file was changed:\n" + "\n".join(reports)}],
+                }
+
+            # Write each file once
+            write_files(contents)
+            for file_path, content in contents.items():
+                change_tracker.record_write(file_path, content)
+
+            console.print(format_output("🩹 Patch Applied", "\n".join(reports), "green"))
+            result = f"Applied {hunk_total} hunks to {len(contents)} files:\n" + "\n".join(reports)
 
         else:
             raise ValueError(f"Unknown command: {command}")
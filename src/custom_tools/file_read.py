@@ -14,8 +14,10 @@ Key Features:
    • lines: Show specific line ranges with context
    • chunk: Read byte chunks from specific offsets
    • search: Pattern searching with context highlighting
+   • grep: Repo-wide literal or regex search with structured matches
    • stats: File statistics and metrics
    • preview: Quick content preview
+   • outline: Classes and functions of a Python file with signatures and line ranges
    • diff: Compare files or directories
    • time_machine: View version history
    • document: Generate Bedrock document blocks
@@ -28,7 +30,7 @@ Key Features:
    • Beautiful console output with panels and tables
 
 3. Advanced Capabilities:
-   • Multi-file support with comma-separated paths
+   • Multi-file support with comma-separated paths, read concurrently within a response size limit
    • Wildcard pattern matching
    • Recursive directory traversal
    • Git integration for version history
@@ -71,6 +73,19 @@ agent.tool.file_read(
     context_lines=3
 )
 
+# Outline a large file before reading parts of it
+agent.tool.file_read(path="/path/to/module.py", mode="outline")
+
+# Search a whole repository
+agent.tool.file_read(
+    path="/path/to/project",
+    mode="grep",
+    search_pattern=r"def [a-z_]+_handler",
+    regex=True,
+    file_glob="*.py",
+    max_results=50
+)
+
 # Compare files
 agent.tool.file_read(
     path="/path/to/file1.txt",
@@ -101,8 +116,10 @@ import json
 import os
 import time as time_module
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
 from os.path import expanduser
-from typing import Any, Dict, List, Optional, Union, cast
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
 from rich import box
 from rich.console import Console
@@ -121,6 +138,13 @@ from strands.types.tools import (
 
 from custom_tools.utils import console_util
 from custom_tools.utils.detect_language import detect_language
+from custom_tools.utils.file_cache import file_cache
+from custom_tools.utils.git_history import blame_summary, get_history
+from custom_tools.utils.line_index import line_count, read_lines
+from custom_tools.utils.repo_inventory import get_inventory
+from custom_tools.utils.symbol_index import get_symbols
+from custom_tools.utils.text_search import search_files
+from custom_tools.utils.tree_diff import diff_files, diff_trees
 
 # Document format mapping
 FORMAT_EXTENSIONS = {
@@ -232,6 +256,62 @@ def split_path_list(path: str) -> List[str]:
     return [expanduser(p) for p in paths]
 
 
+def dedupe_files(file_paths: List[str]) -> List[str]:
+    """
+    Sort file paths and keep one path per file.
+
+    Paths that resolve to the same file (through symlinks, `./` or `..` segments,
+    or a file listed both directly and by a pattern) are read only once.
+    """
+    seen = set()
+    unique = []
+    for file_path in sorted(set(file_paths)):
+        real_path = os.path.realpath(file_path)
+        if real_path not in seen:
+            seen.add(real_path)
+            unique.append(file_path)
+    return unique
+
+
+def apply_response_budget(
+    file_results: List[Tuple[str, List[ToolResultContent]]], max_bytes: int
+) -> List[ToolResultContent]:
+    """
+    Flatten per-file results, keeping their total text within `max_bytes` (UTF-8).
+
+    The result that crosses the budget is cut, and it and every later result get a
+    marker naming the file, so the caller knows what is missing and can read it alone.
+    """
+    content: List[ToolResultContent] = []
+    remaining = max_bytes
+    for file_path, results in file_results:
+        for item in results:
+            text = item.get("text")
+            if text is None:
+                content.append(item)
+                continue
+            encoded = text.encode("utf-8")
+            if len(encoded) <= remaining:
+                content.append(item)
+                remaining -= len(encoded)
+                continue
+            if remaining == 0:
+                content.append({"text": f"[... {file_path}: {len(encoded)} bytes left out, response limit reached]"})
+                continue
+            kept = encoded[:remaining].decode("utf-8", errors="ignore")
+            remaining = 0
+            content.append(
+                {
+                    "text": (
+                        f"{kept}\n[... truncated {file_path}: {len(encoded) - len(kept.encode('utf-8'))} of "
+                        f"{len(encoded)} bytes left out, response limit of {max_bytes} bytes reached. "
+                        "Read fewer files per call, or use lines mode for part of a file]"
+                    )
+                }
+            )
+    return content
+
+
 TOOL_SPEC = {
     "name": "file_read",
     "description": (
@@ -249,8 +329,11 @@ TOOL_SPEC = {
         "- lines: Show specific line ranges\n"
         "- chunk: Read byte chunks\n"
         "- search: Pattern searching\n"
+        "- grep: Search whole directories at once (literal or regex, file glob, result limit)\n"
         "- stats: File statistics\n"
         "- preview: Quick content preview\n"
+        "- outline: Classes/functions of Python files with signatures and line ranges, to read only "
+        "the needed lines next\n"
         "- diff: Compare files/directories\n"
         "- time_machine: Version history\n"
         "- document: Generate Bedrock document blocks"
@@ -269,7 +352,8 @@ TOOL_SPEC = {
                 "mode": {
                     "type": "string",
                     "description": (
-                        "Reading mode: find, view, lines, chunk, search, stats, preview, diff, time_machine, document"
+                        "Reading mode: find, view, lines, chunk, search, grep, stats, preview, outline, diff, "
+                        "time_machine, document"
                     ),
                     "enum": [
                         "find",
@@ -277,8 +361,10 @@ TOOL_SPEC = {
                         "lines",
                         "chunk",
                         "search",
+                        "grep",
                         "stats",
                         "preview",
+                        "outline",
                         "diff",
                         "time_machine",
                         "document",
@@ -323,6 +409,11 @@ TOOL_SPEC = {
                     "description": "Number of revisions to show in time_machine mode",
                     "default": 5,
                 },
+                "blame": {
+                    "type": "boolean",
+                    "description": "Add the number of lines per author at HEAD in time_machine mode",
+                    "default": False,
+                },
                 "start_line": {
                     "type": "integer",
                     "description": "Starting line number (for lines mode)",
@@ -341,7 +432,34 @@ TOOL_SPEC = {
                 },
                 "search_pattern": {
                     "type": "string",
-                    "description": "Pattern to search for (for search mode)",
+                    "description": "Pattern to search for (for search and grep modes)",
+                },
+                "regex": {
+                    "type": "boolean",
+                    "description": "Treat search_pattern as a regular expression (for grep mode, default: false)",
+                    "default": False,
+                },
+                "case_sensitive": {
+                    "type": "boolean",
+                    "description": "Match case exactly (for grep mode, default: false)",
+                    "default": False,
+                },
+                "file_glob": {
+                    "type": "string",
+                    "description": "Only search files matching this glob, e.g. '*.py' or 'src/**/*.ts' (for grep mode)",
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "Maximum number of matches to return (for grep mode, default: 100)",
+                    "default": 100,
+                },
+                "max_response_bytes": {
+                    "type": "integer",
+                    "description": (
+                        "Maximum total size of the returned text over all files; longer results are cut "
+                        "with a marker naming the file (default: 200000)"
+                    ),
+                    "default": 200000,
                 },
                 "context_lines": {
                     "type": "integer",
@@ -371,8 +489,15 @@ def find_files(console: Console, pattern: str, recursive: bool = True) -> List[s
         recursive: Whether to search recursively through subdirectories
 
     Returns:
-        List[str]: List of matching file paths
+        List[str]: List of matching file paths, relative or absolute like the pattern
     """
+
+    def as_given(prefix: str, directory: str, paths: List[str]) -> List[str]:
+        # The inventory returns absolute paths; keep the form of the caller's pattern
+        directory = os.path.abspath(directory)
+        relative_paths = [os.path.relpath(path, directory) for path in paths]
+        return [os.path.join(prefix, path) if prefix else path for path in relative_paths]
+
     try:
         # Consistent path normalization
         pattern = expanduser(pattern)
@@ -382,17 +507,9 @@ def find_files(console: Console, pattern: str, recursive: bool = True) -> List[s
             if os.path.isfile(pattern):
                 return [pattern]
             elif os.path.isdir(pattern):
-                matching_files = []
-
-                for root, _dirs, files in os.walk(pattern):
-                    if not recursive and root != pattern:
-                        continue
-
-                    for file in sorted(files):
-                        if not file.startswith("."):  # Skip hidden files
-                            matching_files.append(os.path.join(root, file))
-
-                return sorted(matching_files)
+                # Listed from the repo inventory, honouring .gitignore and skipping hidden files
+                files = get_inventory(pattern).files(pattern, recursive=recursive, include_hidden=False)
+                return as_given(pattern, pattern, files)
 
         # Handle glob patterns
         if recursive and "**" not in pattern:
@@ -401,6 +518,23 @@ def find_files(console: Console, pattern: str, recursive: bool = True) -> List[s
             file_pattern = os.path.basename(pattern)
             pattern = os.path.join(base_dir if base_dir else ".", "**", file_pattern)
 
+        # Match against the inventory of the pattern's fixed leading directory
+        parts = pattern.split("/")
+        fixed = 0
+        while fixed < len(parts) - 1 and not any(c in parts[fixed] for c in "*?["):
+            fixed += 1
+        prefix = "/".join(parts[:fixed]) or ("/" if pattern.startswith("/") else "")
+        base_dir = prefix or "."
+        relative_pattern = "/".join(parts[fixed:])
+        if os.path.isdir(base_dir):
+            files = get_inventory(base_dir).files(
+                base_dir,
+                pattern=relative_pattern,
+                recursive="/" in relative_pattern or "**" in relative_pattern,
+                include_hidden=any(part.startswith(".") for part in parts[fixed:]),
+            )
+            return as_given(prefix, base_dir, files)
+
         try:
             matching_files = glob.glob(pattern, recursive=recursive)
             return sorted(matching_files)
@@ -451,12 +585,46 @@ def create_rich_panel(content: str, title: Optional[str] = None, file_path: Opti
     )
 
 
+def file_outline(file_path: str) -> str:
+    """
+    Compact symbol tree of a Python file, one definition per line.
+
+    Each line holds the 1-based line range and signature of a class, function or
+    method, indented by nesting. Symbols come from the shared symbol index, which
+    caches them per file content.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        str: The outline, headed by the file path and line count
+    """
+    if not file_path.endswith((".py", ".pyi")):
+        raise ValueError(
+            f"Outline is only available for Python files: {file_path}. Use search or preview mode instead"
+        )
+
+    content = file_cache.read(file_path, errors="replace")
+    total_lines = content.count("\n") + (0 if content.endswith("\n") or not content else 1)
+    symbols = get_symbols(content)
+    if not symbols:
+        return f"{file_path} ({total_lines} lines): no classes or functions found, or the file does not parse"
+
+    width = len(f"L{total_lines}-{total_lines}")
+    outline = [f"{file_path} ({total_lines} lines; read Lstart-end with lines mode, start_line=start-1, end_line=end):"]
+    for symbol in symbols:
+        line_range = f"L{symbol.start_line}-{symbol.end_line}"
+        outline.append(f"{line_range:<{width}}  {'  ' * symbol.name.count('.')}{symbol.signature}")
+    return "\n".join(outline)
+
+
 def get_file_stats(console, file_path: str) -> Dict[str, Any]:
     """
     Get file statistics including size, line count, and preview.
 
     Analyzes a file to gather key metrics like size and line count,
-    and generates a preview of the first 50 lines.
+    and generates a preview of the first 50 lines. The line count comes
+    from the cached line index, so repeated calls do not rescan the file.
 
     Args:
         file_path: Path to the file
@@ -468,16 +636,11 @@ def get_file_stats(console, file_path: str) -> Dict[str, Any]:
     file_path = expanduser(file_path)
     stats: Dict[str, Any] = {
         "size_bytes": os.path.getsize(file_path),
-        "line_count": 0,
+        "line_count": line_count(file_path),
         "preview": "",
     }
 
-    with open(file_path, "r") as f:
-        preview_lines = []
-        for i, line in enumerate(f):
-            stats["line_count"] += 1
-            if i < 50:  # First 50 lines as preview
-                preview_lines.append(line)
+    preview_lines = read_lines(file_path, 0, 50)  # First 50 lines as preview
 
     stats["preview"] = "\n".join(preview_lines)
     stats["size_human"] = f"{stats['size_bytes'] / 1024:.2f} KB"
@@ -499,7 +662,8 @@ def read_file_lines(console: Console, file_path: str, start_line: int = 0, end_l
     Read specific lines from file.
 
     Extracts and returns a specific range of lines from a file,
-    with validation of line range parameters.
+    with validation of line range parameters. Only the bytes of the
+    requested lines are read, using the cached line offsets of the file.
 
     Args:
         file_path: Path to the file
@@ -522,21 +686,20 @@ def read_file_lines(console: Console, file_path: str, start_line: int = 0, end_l
         raise ValueError(f"Path is not a file: {file_path}")
 
     try:
-        with open(file_path, "r") as f:
-            all_lines = f.readlines()
+        total_lines = line_count(file_path)
 
         # Validate line numbers
         start_line = max(start_line, 0)
 
         if end_line is not None:
-            end_line = min(end_line, len(all_lines))
+            end_line = min(end_line, total_lines)
             if end_line < start_line:
                 raise ValueError(f"end_line ({end_line}) cannot be less than start_line ({start_line})")
 
-        lines = all_lines[start_line:end_line]
+        lines = read_lines(file_path, start_line, end_line)
 
         # Create a preview panel
-        line_range = f"{start_line + 1}-{end_line if end_line else len(all_lines)}"
+        line_range = f"{start_line + 1}-{end_line if end_line else total_lines}"
         panel = Panel(
             escape("".join(lines)),
             title=f"[bold green]Lines {line_range} from {os.path.basename(file_path)}",
@@ -636,6 +799,7 @@ def search_file(console: Console, file_path: str, pattern: str, context_lines: i
 
     Searches for a text pattern within a file and returns matching lines
     with the specified number of context lines before and after each match.
+    The file is streamed line by line; context is read back by line offset.
 
     Args:
         file_path: Path to the file
@@ -662,44 +826,45 @@ def search_file(console: Console, file_path: str, pattern: str, context_lines: i
 
     results = []
     try:
-        with open(file_path, "r") as f:
-            lines = f.readlines()
+        # Lines are split on '\n' only, like the line index that serves the context
+        with open(file_path, "rb") as f:
+            match_lines = [
+                i for i, line in enumerate(f) if pattern.lower() in line.decode("utf-8", errors="replace").lower()
+            ]
 
         total_matches = 0
-        for i, line in enumerate(lines):
-            if pattern.lower() in line.lower():
-                total_matches += 1
-                start = max(0, i - context_lines)
-                end = min(len(lines), i + context_lines + 1)
-
-                context_text = []
-                for ctx_idx in range(start, end):
-                    prefix = "  "
-                    if ctx_idx == i:
-                        prefix = "→ "  # Highlight the matching line
-                    line_text = lines[ctx_idx].rstrip()
-                    # Highlight the matching pattern in the line
-                    if ctx_idx == i:
-                        pattern_idx = line_text.lower().find(pattern.lower())
-                        if pattern_idx != -1:
-                            line_text = (
-                                line_text[:pattern_idx]
-                                + f"[bold yellow]{line_text[pattern_idx : pattern_idx + len(pattern)]}[/bold yellow]"
-                                + line_text[pattern_idx + len(pattern) :]
-                            )
-                    context_text.append(f"{prefix}{ctx_idx + 1}: {line_text}")
-
-                match_text = "\n".join(context_text)
-                # Create a panel for each match
-                panel = Panel(
-                    escape(match_text),
-                    title=f"[bold green]Match at line {i + 1}",
-                    border_style="blue",
-                    expand=False,
-                )
-                console.print(panel)
+        for i in match_lines:
+            total_matches += 1
+            start = max(0, i - context_lines)
+            window = read_lines(file_path, start, i + context_lines + 1)
+            context_text = []
+            for ctx_idx, ctx_line in enumerate(window, start):
+                prefix = "  "
+                if ctx_idx == i:
+                    prefix = "→ "  # Highlight the matching line
+                line_text = ctx_line.rstrip()
+                # Highlight the matching pattern in the line
+                if ctx_idx == i:
+                    pattern_idx = line_text.lower().find(pattern.lower())
+                    if pattern_idx != -1:
+                        line_text = (
+                            line_text[:pattern_idx]
+                            + f"[bold yellow]{line_text[pattern_idx : pattern_idx + len(pattern)]}[/bold yellow]"
+                            + line_text[pattern_idx + len(pattern) :]
+                        )
+                context_text.append(f"{prefix}{ctx_idx + 1}: {line_text}")
+
+            match_text = "\n".join(context_text)
+            # Create a panel for each match
+            panel = Panel(
+                escape(match_text),
+                title=f"[bold green]Match at line {i + 1}",
+                border_style="blue",
+                expand=False,
+            )
+            console.print(panel)
 
-                results.append({"line_number": i + 1, "context": match_text})
+            results.append({"line_number": i + 1, "context": match_text})
 
         # Print summary
         summary = Panel(
@@ -727,7 +892,10 @@ def create_diff(file_path: str, comparison_path: str, diff_type: str = "unified"
     Create a diff between two files or directories.
 
     Compares two files or directories and generates a diff output showing
-    the differences between them.
+    the differences between them. Directories are walked in step and files
+    are only read when their size and mtime do not already tell whether they
+    differ; large files are diffed by git, and the output is capped with a
+    summary of what was compared.
 
     Args:
         file_path: Path to the first file/directory
@@ -741,60 +909,17 @@ def create_diff(file_path: str, comparison_path: str, diff_type: str = "unified"
         Exception: If there's an error during diff creation or paths are invalid
     """
     try:
-        import difflib
-        from pathlib import Path
-
         file_path = expanduser(file_path)
         comparison_path = expanduser(comparison_path)
 
-        # Function to read file content
-        def read_file(path: str) -> List[str]:
-            with open(path, "r", encoding="utf-8") as f:
-                return f.readlines()
-
         # Handle directory comparison
         if os.path.isdir(file_path) and os.path.isdir(comparison_path):
-            diff_results = []
-
-            # Get all files in both directories
-            def get_files(path: str) -> set:
-                return set(str(p.relative_to(path)) for p in Path(path).rglob("*") if p.is_file())
-
-            files1 = get_files(file_path)
-            files2 = get_files(comparison_path)
-
-            # Compare files
-            all_files = sorted(files1 | files2)
-            for file in all_files:
-                path1 = os.path.join(file_path, file)
-                path2 = os.path.join(comparison_path, file)
-
-                if file in files1 and file in files2:
-                    # Both files exist - compare content
-                    diff = create_diff(path1, path2, diff_type)
-                    if diff.strip():  # Only include if there are differences
-                        diff_results.append(f"\n=== {file} ===\n{diff}")
-                elif file in files1:
-                    diff_results.append(f"\n=== {file} ===\nOnly in {file_path}")
-                else:
-                    diff_results.append(f"\n=== {file} ===\nOnly in {comparison_path}")
-
-            return "\n".join(diff_results)
+            diff_output, summary = diff_trees(file_path, comparison_path)
+            return f"{diff_output}\n\n{summary.describe(file_path, comparison_path)}".lstrip("\n")
 
         # Handle single file comparison
         elif os.path.isfile(file_path) and os.path.isfile(comparison_path):
-            lines1 = read_file(file_path)
-            lines2 = read_file(comparison_path)
-
-            # Create unified diff
-            diff_iter = difflib.unified_diff(
-                lines1,
-                lines2,
-                fromfile=os.path.basename(file_path),
-                tofile=os.path.basename(comparison_path),
-                lineterm="",
-            )
-            return "\n".join(list(diff_iter))
+            return diff_files(file_path, comparison_path)
         else:
             raise ValueError("Both paths must be either files or directories")
 
@@ -802,17 +927,21 @@ def create_diff(file_path: str, comparison_path: str, diff_type: str = "unified"
         raise Exception(f"Error creating diff: {str(e)}") from e
 
 
-def time_machine_view(file_path: str, use_git: bool = True, num_revisions: int = 5) -> str:
+def time_machine_view(
+    file_path: str, use_git: bool = True, num_revisions: int = 5, blame: bool = False
+) -> str:
     """
     Show file history using git or filesystem metadata.
 
     Retrieves and displays the version history of a file using either
-    git history (if available) or filesystem metadata.
+    git history (if available) or filesystem metadata. The git history comes
+    from a single `git log -p --follow` call and is cached until HEAD moves.
 
     Args:
         file_path: Path to the file
         use_git: Whether to use git history if available
         num_revisions: Number of revisions to show
+        blame: Whether to add the number of lines per author at HEAD
 
     Returns:
         str: Formatted history output
@@ -824,91 +953,27 @@ def time_machine_view(file_path: str, use_git: bool = True, num_revisions: int =
         file_path = os.path.expanduser(file_path)
 
         if use_git:
-            import subprocess
-
-            # Check if file is in a git repository
-            try:
-                repo_root = subprocess.check_output(
-                    ["git", "rev-parse", "--show-toplevel"],
-                    cwd=os.path.dirname(file_path),
-                    stderr=subprocess.PIPE,
-                    text=True,
-                ).strip()
-            except subprocess.CalledProcessError:
-                raise ValueError("File is not in a git repository") from None
-
-            # Get relative path from repo root
-            rel_path = os.path.relpath(file_path, repo_root)
-
-            # Get git log
-            log_output = subprocess.check_output(
-                [
-                    "git",
-                    "log",
-                    "-n",
-                    str(num_revisions),
-                    "--pretty=format:%h|%an|%ar|%s",
-                    "--",
-                    rel_path,
-                ],
-                cwd=repo_root,
-                text=True,
-            ).split("\n")
-
-            # Get blame information
-            subprocess.check_output(["git", "blame", "--line-porcelain", rel_path], cwd=repo_root, text=True)
-
-            # Process git information
-            history = []
-            current_commit = None
-
-            for line in log_output:
-                if line:
-                    commit_hash, author, time, message = line.split("|")
-
-                    if not current_commit:
-                        current_commit = commit_hash
-
-                    # Get changes in this commit
-                    try:
-                        changes = subprocess.check_output(
-                            [
-                                "git",
-                                "show",
-                                "--format=",
-                                "--patch",
-                                commit_hash,
-                                "--",
-                                rel_path,
-                            ],
-                            cwd=repo_root,
-                            text=True,
-                        )
-                    except subprocess.CalledProcessError:
-                        changes = "Unable to retrieve changes"
-
-                    history.append(
-                        {
-                            "commit": commit_hash,
-                            "author": author,
-                            "time": time,
-                            "message": message,
-                            "changes": changes,
-                        }
-                    )
+            history = get_history(file_path, num_revisions)
 
             # Format output
             output = []
             output.append(f"=== Time Machine View for {os.path.basename(file_path)} ===\n")
+
+            if blame:
+                output.append("Lines per Author:")
+                for author, lines in blame_summary(history):
+                    output.append(f"{author}: {lines}")
+                output.append("")
+
             output.append("Git History:\n")
 
-            for entry in history:
-                output.append(f"Commit: {entry['commit']}")
-                output.append(f"Author: {entry['author']}")
-                output.append(f"Time: {entry['time']}")
-                output.append(f"Message: {entry['message']}")
+            for revision in history.revisions:
+                output.append(f"Commit: {revision.commit}")
+                output.append(f"Author: {revision.author}")
+                output.append(f"Time: {revision.time}")
+                output.append(f"Message: {revision.message}")
                 output.append("\nChanges:")
-                output.append(entry["changes"])
+                output.append(revision.changes)
                 output.append("-" * 40 + "\n")
 
             return "\n".join(output)
@@ -957,8 +1022,10 @@ def file_read(tool: ToolUse, **kwargs: Any) -> ToolResult:
     - lines: Shows specific line ranges from files
     - chunk: Reads binary chunks from files at specific offsets
     - search: Searches for patterns with context highlighting
+    - grep: Searches whole directories in one call and returns structured matches
     - stats: Displays file statistics like size and line count
     - preview: Shows a quick preview of file content
+    - outline: Lists the classes and functions of Python files with signatures and line ranges
     - diff: Compares two files or directories and shows differences
     - time_machine: Shows version history from git or filesystem
     - document: Generates Bedrock document blocks for file content
@@ -991,10 +1058,12 @@ def file_read(tool: ToolUse, **kwargs: Any) -> ToolResult:
 
     Notes:
         - Document mode returns document blocks for Bedrock compatibility
-        - Multiple files can be processed in a single call with comma-separated paths
+        - Multiple files can be processed in a single call with comma-separated paths; they
+          are read concurrently, each file once, within a total response size limit
         - The tool supports various wildcard patterns for matching multiple files
         - Document format is auto-detected from file extension or can be specified
         - For diff mode, both paths must be either files or directories
+        - Grep mode uses ripgrep when installed and skips ignored, hidden and binary files
     """
     console = console_util.create()
 
@@ -1009,6 +1078,9 @@ def file_read(tool: ToolUse, **kwargs: Any) -> ToolResult:
     file_read_diff_type_default = os.getenv("FILE_READ_DIFF_TYPE_DEFAULT", "unified")
     file_read_use_git_default = os.getenv("FILE_READ_USE_GIT_DEFAULT", "true").lower() == "true"
     file_read_num_revisions_default = int(os.getenv("FILE_READ_NUM_REVISIONS_DEFAULT", "5"))
+    file_read_max_results_default = int(os.getenv("FILE_READ_MAX_RESULTS_DEFAULT", "100"))
+    file_read_max_response_bytes_default = int(os.getenv("FILE_READ_MAX_RESPONSE_BYTES_DEFAULT", "200000"))
+    file_read_max_workers = int(os.getenv("FILE_READ_MAX_WORKERS", "8"))
 
     try:
         # Validate required parameters
@@ -1023,13 +1095,71 @@ def file_read(tool: ToolUse, **kwargs: Any) -> ToolResult:
         paths = split_path_list(tool_input["path"])  # Handle comma-separated paths
         recursive = tool_input.get("recursive", file_read_recursive_default)
 
+        # Grep mode searches the given files and directories as a whole
+        if mode == "grep":
+            query = tool_input.get("search_pattern", "")
+            matches, truncated, backend = search_files(
+                paths,
+                query,
+                regex=tool_input.get("regex", False),
+                case_sensitive=tool_input.get("case_sensitive", False),
+                file_glob=tool_input.get("file_glob"),
+                max_results=tool_input.get("max_results", file_read_max_results_default),
+                context_lines=tool_input.get("context_lines", 0),
+            )
+
+            table = Table(title=f"Matches for '{escape(query)}'", box=box.SIMPLE)
+            table.add_column("Location", style="cyan")
+            table.add_column("Line")
+            for match in matches:
+                table.add_row(escape(f"{match.file}:{match.line}:{match.column}"), escape(match.text.strip()))
+            console.print(table)
+            summary = f"{len(matches)} matches{' (truncated)' if truncated else ''} via {backend}"
+            console.print(Panel(escape(summary), title="[bold yellow]Search Summary", border_style="yellow"))
+
+            result = {
+                # Context lists are left out when empty, to keep the result compact
+                "matches": [{k: v for k, v in asdict(match).items() if v != []} for match in matches],
+                "total_matches": len(matches),
+                "truncated": truncated,
+            }
+            return {
+                "toolUseId": tool_use_id,
+                "status": "success",
+                "content": [{"text": json.dumps(result)}],
+            }
+
+        # Diff mode compares a directory with the comparison directory as a whole
+        if mode == "diff" and len(paths) == 1 and os.path.isdir(paths[0]):
+            comparison_path = tool_input.get("comparison_path")
+            if not comparison_path:
+                raise ValueError("comparison_path is required for diff mode")
+
+            diff_output = create_diff(
+                paths[0],
+                os.path.expanduser(comparison_path),
+                tool_input.get("diff_type", file_read_diff_type_default),
+            )
+            console.print(
+                create_rich_panel(
+                    diff_output,
+                    f"Diff: {os.path.basename(paths[0].rstrip(os.sep))} vs "
+                    f"{os.path.basename(comparison_path.rstrip(os.sep))}",
+                )
+            )
+            return {
+                "toolUseId": tool_use_id,
+                "status": "success",
+                "content": [{"text": f"Diff between {paths[0]} and {comparison_path}:\n{diff_output}"}],
+            }
+
         # Find all matching files across all paths
         matching_files = []
         for path_pattern in paths:
             files = find_files(console, path_pattern, recursive)
             matching_files.extend(files)
 
-        matching_files = sorted(set(matching_files))  # Remove duplicates
+        matching_files = dedupe_files(matching_files)  # Remove duplicates, including aliases of the same file
 
         if not matching_files:
             error_msg = f"No files found matching pattern(s): {', '.join(paths)}"
@@ -1082,8 +1212,6 @@ def file_read(tool: ToolUse, **kwargs: Any) -> ToolResult:
                     "content": [{"text": error_msg}],
                 }
 
-        response_content: List[ToolResultContent] = []
-
         # Handle find mode
         if mode == "find":
             tree = Tree("🔍 Found Files")
@@ -1119,12 +1247,12 @@ def file_read(tool: ToolUse, **kwargs: Any) -> ToolResult:
             }
 
         # Process each file for other modes
-        for file_path in matching_files:
+        def process_file(file_path: str) -> List[ToolResultContent]:
+            response_content: List[ToolResultContent] = []
             try:
                 if mode == "view":
                     try:
-                        with open(file_path, "r") as f:
-                            content = f.read()
+                        content = file_cache.read(file_path)
 
                         # Create rich panel with syntax highlighting
                         view_panel = create_rich_panel(
@@ -1141,8 +1269,7 @@ def file_read(tool: ToolUse, **kwargs: Any) -> ToolResult:
 
                 elif mode == "preview":
                     stats = get_file_stats(console, file_path)
-                    with open(file_path, "r") as f:
-                        content = "".join(f.readlines()[:50])
+                    content = "".join(read_lines(file_path, 0, 50))
 
                     preview_panel = create_rich_panel(
                         content,
@@ -1162,6 +1289,17 @@ def file_read(tool: ToolUse, **kwargs: Any) -> ToolResult:
                         }
                     )
 
+                elif mode == "outline":
+                    outline = file_outline(file_path)
+                    console.print(
+                        Panel(
+                            escape(outline),
+                            title=f"[bold green]🧭 Outline: {escape(os.path.basename(file_path))}",
+                            border_style="blue",
+                        )
+                    )
+                    response_content.append({"text": outline})
+
                 elif mode == "stats":
                     stats = get_file_stats(console, file_path)
                     response_content.append({"text": json.dumps(stats, indent=2)})
@@ -1217,6 +1355,7 @@ def file_read(tool: ToolUse, **kwargs: Any) -> ToolResult:
                         file_path,
                         tool_input.get("git_history", file_read_use_git_default),
                         tool_input.get("num_revisions", file_read_num_revisions_default),
+                        tool_input.get("blame", False),
                     )
 
                     history_panel = create_rich_panel(
@@ -1231,6 +1370,20 @@ def file_read(tool: ToolUse, **kwargs: Any) -> ToolResult:
                 error_msg = f"Error processing file {file_path}: {str(e)}"
                 console.print(Panel(escape(error_msg), title="[bold red]Error", border_style="red"))
                 response_content.append({"text": error_msg})
+            return response_content
+
+        # Files are read concurrently, as most of the time goes into waiting on I/O and git
+        max_workers = min(file_read_max_workers, len(matching_files))
+        if max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                file_results = list(executor.map(process_file, matching_files))
+        else:
+            file_results = [process_file(file_path) for file_path in matching_files]
+
+        response_content = apply_response_budget(
+            list(zip(matching_files, file_results)),
+            tool_input.get("max_response_bytes", file_read_max_response_bytes_default),
+        )
 
         return {
             "toolUseId": tool_use_id,
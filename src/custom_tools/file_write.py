@@ -65,6 +65,7 @@ from rich.text import Text
 from strands.types.tools import ToolResult, ToolUse
 
 from custom_tools.utils import console_util
+from custom_tools.utils.change_tracker import change_tracker
 from custom_tools.utils.user_input import get_user_input
 
 TOOL_SPEC = {
@@ -259,6 +260,7 @@ def file_write(tool: ToolUse, **kwargs: Any) -> ToolResult:
         # Write the file
         with open(path, "w") as file:
             file.write(content)
+        change_tracker.record_write(path, content)
 
         success_message = f"File written successfully to {path}"
         success_panel = Panel(
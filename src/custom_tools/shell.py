@@ -52,7 +52,9 @@ import logging
 import os
 import pty
 import queue
+import re
 import select
+import shlex
 import signal
 import sys
 import termios
@@ -69,11 +71,29 @@ from rich.table import Table
 from strands import tool
 
 from custom_tools.utils import console_util
+from custom_tools.utils.change_tracker import change_tracker
 from custom_tools.utils.user_input import get_user_input
 
 # Initialize logging
 logger = logging.getLogger(__name__)
 
+# Commands that never modify files. Any other command marks the repositories followed
+# by the change tracker as dirty, so the next change manifest is reconciled with git.
+READ_ONLY_COMMANDS = {
+    "cd", "ls", "cat", "head", "tail", "grep", "rg", "wc", "pwd", "echo", "find", "tree", "file", "stat", "du",
+    "diff", "which", "sort", "uniq", "cut",
+}
+# Options that make an otherwise read-only command write its output to a file.
+OUTPUT_OPTIONS = {
+    "sort": re.compile(r"^(-[A-Za-z]*o|--output)"),
+    "tree": re.compile(r"^-o"),
+}
+READ_ONLY_GIT_SUBCOMMANDS = {"status", "diff", "log", "show", "blame", "rev-parse", "ls-files", "grep"}
+# Options of `git branch` that only list branches; anything else may create, move or delete one.
+GIT_BRANCH_LIST_OPTIONS = {
+    "-a", "--all", "-r", "--remotes", "-l", "--list", "-v", "-vv", "--verbose", "--show-current", "--no-color",
+}
+
 
 def read_output(fd: int) -> str:
     """Read output from fd, handling both UTF-8 and other encodings."""
@@ -190,14 +210,73 @@ class CommandExecutor:
                 termios.tcsetattr(sys.stdin, termios.TCSAFLUSH, old_tty)
 
 
+def _is_read_only_git(args: List[str]) -> bool:
+    while args and args[0] in ("--no-pager", "-P"):
+        args = args[1:]
+    if not args:
+        return False
+    subcommand, options = args[0], args[1:]
+    if any(option.startswith("--output") for option in options):
+        return False
+    if subcommand in READ_ONLY_GIT_SUBCOMMANDS:
+        return True
+    if subcommand == "branch":
+        if "-l" in options or "--list" in options:
+            # Remaining arguments are patterns, unless a write option is mixed in
+            return all(not o.startswith("-") or o in GIT_BRANCH_LIST_OPTIONS for o in options)
+        return all(o in GIT_BRANCH_LIST_OPTIONS for o in options)
+    if subcommand == "tag":
+        return not options or options[0] in ("-l", "--list")
+    if subcommand == "remote":
+        return not options or options in (["-v"], ["--verbose"]) or (
+            len(options) == 2 and options[0] in ("show", "get-url")
+        )
+    return False
+
+
+def _is_read_only_part(part: str) -> bool:
+    try:
+        args = shlex.split(part)
+    except ValueError:
+        return False
+    if not args:
+        return False
+    program, options = args[0], args[1:]
+    if program == "git":
+        return _is_read_only_git(options)
+    if program not in READ_ONLY_COMMANDS:
+        return False
+    if program in OUTPUT_OPTIONS and any(OUTPUT_OPTIONS[program].match(o) for o in options):
+        return False
+    # `uniq INPUT OUTPUT` writes OUTPUT
+    return program != "uniq" or len([o for o in options if not o.startswith("-")]) <= 1
+
+
+def is_read_only_command(command: str) -> bool:
+    """
+    Whether a command (optionally a pipeline) only reads files.
+
+    Output options (`sort -o`, `--output`) count as writes, and of the git commands
+    that can also write, only the listing forms of `git branch`, `git tag` and
+    `git remote` are read-only. Unknown commands and git subcommands are not.
+    """
+    if re.search(r"[;&`>]|\$\(|\s-(delete|exec|execdir|fprint)\b", command):
+        return False
+    return all(_is_read_only_part(part) for part in command.split("|"))
+
+
 def execute_single_command(
     command: Union[str, Dict], work_dir: str, timeout: int, non_interactive_mode: bool
 ) -> Dict[str, Any]:
     """Execute a single command and return its results."""
     cmd_str, cmd_opts = validate_command(command)
     executor = CommandExecutor(timeout=timeout)
+    read_only = is_read_only_command(cmd_str)
 
     try:
+        if not read_only:
+            change_tracker.mark_dirty()
+
         exit_code, output, error = executor.execute_with_pty(
             cmd_str, work_dir, non_interactive_mode=non_interactive_mode
         )
@@ -223,6 +302,10 @@ def execute_single_command(
             "error": str(e),
             "status": "error",
         }
+    finally:
+        if not read_only:
+            # A manifest reconciled while the command ran may have missed its writes.
+            change_tracker.mark_dirty()
 
 
 class CommandContext:
@@ -0,0 +1,140 @@
+import os
+import re
+import hashlib
+import difflib
+import threading
+from collections import OrderedDict
+from functools import cached_property, lru_cache
+from typing import Dict, List
+
+# Number of file contents whose line index is kept in memory.
+ANCHOR_INDEX_CACHE_SIZE = 32
+# Share of the anchor's tokens a line must contain to match by tokens.
+TOKEN_MATCH_THRESHOLD = float(os.getenv("EDITOR_TOKEN_MATCH_THRESHOLD", "0.6"))
+# Lines with the most shared tokens that are compared by similarity to break a tie.
+MAX_SIMILARITY_CANDIDATES = 50
+
+# Identifiers and numbers; punctuation is left to the similarity tie-break.
+TOKEN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+
+
+def normalize_whitespace(text: str) -> str:
+    return " ".join(text.split())
+
+
+def tokens(text: str) -> List[str]:
+    return [token.lower() for token in TOKEN.findall(text)]
+
+
+class AnchorIndex:
+    """Lines of one file content, with whitespace-normalized forms and a token index built on first use."""
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+
+    @cached_property
+    def normalized(self) -> List[str]:
+        return [normalize_whitespace(line) for line in self.lines]
+
+    @cached_property
+    def token_lines(self) -> Dict[str, List[int]]:
+        """Lines containing each token."""
+        token_lines: Dict[str, List[int]] = {}
+        for i, line in enumerate(self.lines):
+            for token in set(tokens(line)):
+                token_lines.setdefault(token, []).append(i)
+        return token_lines
+
+
+_cache: "OrderedDict[str, AnchorIndex]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_anchor_index(content: str) -> AnchorIndex:
+    """Line index of a content, cached by content hash."""
+    digest = hashlib.sha1(content.encode("utf-8", errors="replace")).hexdigest()
+    with _cache_lock:
+        if digest in _cache:
+            _cache.move_to_end(digest)
+            return _cache[digest]
+
+    index = AnchorIndex(lines=content.split("\n"))
+    with _cache_lock:
+        _cache[digest] = index
+        while len(_cache) > ANCHOR_INDEX_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
+
+
+@lru_cache(maxsize=256)
+def fuzzy_pattern(search_text: str) -> "re.Pattern[str]":
+    """The words of the search text in order, with anything in between, ignoring case."""
+    return re.compile(".*".join(map(re.escape, search_text.strip().split())), re.IGNORECASE)
+
+
+def _line_of_offset(content: str, offset: int) -> int:
+    return content.count("\n", 0, offset)
+
+
+def _token_match(index: AnchorIndex, search_text: str) -> int:
+    search_tokens = set(tokens(search_text))
+    if not search_tokens:
+        return -1
+    overlap: Dict[int, int] = {}
+    for token in search_tokens:
+        for i in index.token_lines.get(token, []):
+            overlap[i] = overlap.get(i, 0) + 1
+    best = max(overlap.values(), default=0)
+    if best / len(search_tokens) < TOKEN_MATCH_THRESHOLD:
+        return -1
+    candidates = sorted(i for i, count in overlap.items() if count == best)[:MAX_SIMILARITY_CANDIDATES]
+    normalized_search = normalize_whitespace(search_text)
+
+    def similarity(i: int) -> tuple:
+        ratio = difflib.SequenceMatcher(None, normalized_search, index.normalized[i], autojunk=False).ratio()
+        return (ratio, -i)
+
+    return max(candidates, key=similarity)
+
+
+def find_anchor(content: str, search_text: str, fuzzy: bool = False) -> int:
+    """
+    Find the 0-based line of an anchor text, or -1.
+
+    Tries, in order, and returns the first line that matches:
+    1. the exact text within a line (or across lines when it spans several)
+    2. the text with whitespace normalized, so indentation drift still matches
+    With `fuzzy`, also:
+    3. the words of the text in order, ignoring case and what is between them
+    4. the line sharing the most identifier and number tokens with the text (at least
+       TOKEN_MATCH_THRESHOLD of them), ties broken by overall similarity
+    """
+    if not search_text or not search_text.strip():
+        return -1
+    # The first occurrence in the content is in the first line containing the text
+    offset = content.find(search_text.strip("\n"))
+    if offset != -1:
+        return _line_of_offset(content, offset)
+
+    index = get_anchor_index(content)
+    normalized_search = normalize_whitespace(search_text)
+    if "\n" in search_text.strip("\n"):
+        # Match the normalized lines of a multi-line anchor as a block
+        search_lines = [normalize_whitespace(line) for line in search_text.strip("\n").split("\n")]
+        for i in range(len(index.normalized) - len(search_lines) + 1):
+            if index.normalized[i:i + len(search_lines)] == search_lines:
+                return i
+    else:
+        for i, line in enumerate(index.normalized):
+            if normalized_search in line:
+                return i
+
+    if not fuzzy:
+        return -1
+
+    pattern = fuzzy_pattern(search_text)
+    for i, line in enumerate(index.lines):
+        if pattern.search(line):
+            return i
+
+    return _token_match(index, search_text)
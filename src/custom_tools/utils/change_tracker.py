@@ -0,0 +1,179 @@
+import os
+import difflib
+import threading
+import subprocess
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Manifest ordering of change types, matching the order git-based manifests list them in.
+CHANGE_TYPE_ORDER = {"modified_file": 0, "staged_new_file": 1, "untracked_file": 2}
+
+
+@dataclass
+class TrackedFile:
+    """A file written by the editing tools since the repo was last reconciled with git."""
+
+    baseline: Optional[List[str]]  # lines at HEAD, None if the file is not in HEAD
+    ignored: bool
+    lines: List[str] = field(default_factory=list)
+    changes: Optional[List[Dict[str, Any]]] = None  # computed lazily, reset on every write
+
+
+@dataclass
+class RepoState:
+    """Change state of one repository."""
+
+    dirty: bool = False
+    reconciled: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)  # file -> changes from git
+    files: Dict[str, TrackedFile] = field(default_factory=dict)
+
+
+def line_changes(file_path: str, baseline: List[str], lines: List[str]) -> List[Dict[str, Any]]:
+    """
+    Changed line ranges of a file, in the format of `change_manifest.parse_diff`.
+
+    Each changed block corresponds to a `git diff --unified=0` hunk, whose new-side
+    start and count become start_line = start - 1 and end_line = start_line + count.
+    A pure deletion (count 0) is anchored on the line after the deleted block, which
+    git gives as the old-side start: start_line = end_line = that line's 0-based index.
+    The new lines of the block are its `content`, the baseline lines it replaces `removed`.
+    """
+    changes = []
+    matcher = difflib.SequenceMatcher(None, baseline, lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        count = j2 - j1
+        start_line = j1
+        changes.append({
+            "file_path": file_path,
+            "change_type": "modified_file",
+            "mode": "lines",
+            "start_line": start_line,
+            "end_line": start_line + count,
+            "content": "".join(lines[j1:j2]),
+            "removed": "".join(baseline[i1:i2]),
+        })
+    return changes
+
+
+class ChangeTracker:
+    """
+    In-process change manifest, maintained from the writes of the editing tools.
+
+    Repositories are tracked once they are known to match git: right after a
+    clone, or after a manifest was reconciled with git. From then on, `editor`
+    and `file_write` report every write and the manifest is computed from those
+    writes only. Anything the tracker cannot see, like shell commands that may
+    modify files, marks the repository dirty until it is reconciled again.
+
+    Other in-process indexes follow the same events through `add_listener`.
+    """
+
+    def __init__(self) -> None:
+        self._repos: Dict[str, RepoState] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Tuple[Callable[[str, str], None], Callable[[Optional[str]], None]]] = []
+
+    def add_listener(self, on_write: Callable[[str, str], None], on_dirty: Callable[[Optional[str]], None]) -> None:
+        """
+        Call `on_write(path, content)` on every tool write and `on_dirty(path or None)` when
+        files may have changed.
+        """
+        self._listeners.append((on_write, on_dirty))
+
+    def _repo_of(self, path: str) -> Optional[str]:
+        for repo_path in self._repos:
+            if path.startswith(repo_path + os.sep):
+                return repo_path
+        return None
+
+    def mark_clean(self, repo_path: str, changes: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Start tracking a repository whose uncommitted changes are exactly `changes`."""
+        state = RepoState()
+        for change in changes or []:
+            state.reconciled.setdefault(change["file_path"], []).append(change)
+        with self._lock:
+            self._repos[os.path.abspath(repo_path)] = state
+
+    def mark_dirty(self, path: Optional[str] = None) -> None:
+        """Mark the repository containing `path`, or every tracked repository, as out of sync."""
+        for _, on_dirty in self._listeners:
+            on_dirty(path)
+        with self._lock:
+            if path is None:
+                for state in self._repos.values():
+                    state.dirty = True
+                return
+            path = os.path.abspath(path)
+            repo_path = path if path in self._repos else self._repo_of(path)
+            if repo_path:
+                self._repos[repo_path].dirty = True
+
+    def forget(self, repo_path: str) -> None:
+        with self._lock:
+            self._repos.pop(os.path.abspath(repo_path), None)
+
+    def record_write(self, path: str, content: str) -> None:
+        """Record that a tool wrote `content` to `path`."""
+        path = os.path.abspath(path)
+        for on_write, _ in self._listeners:
+            on_write(path, content)
+        with self._lock:
+            repo_path = self._repo_of(path)
+            if repo_path is None:
+                return
+            tracked = self._repos[repo_path].files.get(path)
+
+        if tracked is None:
+            relative_path = os.path.relpath(path, repo_path)
+            head = subprocess.run(
+                ["git", "show", f"HEAD:{relative_path}"], cwd=repo_path, capture_output=True, text=True, errors="replace"
+            )
+            baseline = head.stdout.splitlines(keepends=True) if head.returncode == 0 else None
+            ignored = baseline is None and subprocess.run(
+                ["git", "check-ignore", "-q", relative_path], cwd=repo_path
+            ).returncode == 0
+        else:
+            baseline, ignored = tracked.baseline, tracked.ignored
+
+        tracked = TrackedFile(baseline=baseline, ignored=ignored, lines=content.splitlines(keepends=True))
+        with self._lock:
+            state = self._repos.get(repo_path)
+            if state is not None:
+                state.files[path] = tracked
+
+    def changes(self, repo_path: str) -> Optional[List[Dict[str, Any]]]:
+        """Manifest changes of a tracked repository, or None if it must be reconciled with git."""
+        with self._lock:
+            state = self._repos.get(os.path.abspath(repo_path))
+            if state is None or state.dirty:
+                return None
+
+            changes: List[Dict[str, Any]] = []
+            for file_path in set(state.reconciled) | set(state.files):
+                tracked = state.files.get(file_path)
+                if tracked is None:
+                    changes.extend(dict(c) for c in state.reconciled[file_path])
+                    continue
+                if tracked.changes is None:
+                    if tracked.ignored:
+                        tracked.changes = []
+                    elif tracked.baseline is None:
+                        tracked.changes = [{
+                            "file_path": file_path,
+                            "change_type": "untracked_file",
+                            "mode": "full",
+                            "start_line": 1,
+                            "end_line": len(tracked.lines),
+                            "content": "".join(tracked.lines),
+                        }]
+                    else:
+                        tracked.changes = line_changes(file_path, tracked.baseline, tracked.lines)
+                changes.extend(dict(c) for c in tracked.changes)
+
+        changes.sort(key=lambda c: (CHANGE_TYPE_ORDER.get(c["change_type"], 3), c["file_path"], c["start_line"]))
+        return changes
+
+
+change_tracker = ChangeTracker()
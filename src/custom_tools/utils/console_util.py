@@ -1,18 +1,52 @@
 import io
 import os
+from typing import Any, Optional
 
 from rich.console import Console
 
 
+class NullConsole(Console):
+    """Console that drops everything printed to it without rendering, for headless tool runs."""
+
+    def __init__(self) -> None:
+        super().__init__(file=io.StringIO())
+
+    def print(self, *objects: Any, **kwargs: Any) -> None:
+        pass
+
+    def log(self, *objects: Any, **kwargs: Any) -> None:
+        pass
+
+    def rule(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+
+_null_console: Optional[NullConsole] = None
+
+
+def is_headless() -> bool:
+    """Whether tool output is discarded, so rendering it is wasted work."""
+    return os.getenv("STRANDS_TOOL_CONSOLE_MODE") not in ("enabled", "buffered")
+
+
 def create() -> Console:
     """Create rich console instance.
 
     If STRANDS_TOOL_CONSOLE_MODE environment variable is set to "enabled", output is directed to stdout.
+    If it is set to "buffered", output is rendered into an in-memory buffer. Otherwise the tools run
+    headless: a shared console that skips rendering is returned.
 
     Returns
         Console instance.
     """
-    if os.getenv("STRANDS_TOOL_CONSOLE_MODE") != "enabled":
+    global _null_console
+
+    mode = os.getenv("STRANDS_TOOL_CONSOLE_MODE")
+    if mode == "enabled":
+        return Console()
+    if mode == "buffered":
         return Console(file=io.StringIO())
 
-    return Console()
\ No newline at end of file
+    if _null_console is None:
+        _null_console = NullConsole()
+    return _null_console
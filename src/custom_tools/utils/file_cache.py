@@ -0,0 +1,119 @@
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from custom_tools.utils.change_tracker import change_tracker
+
+# Total size of the cached files, by their size on disk. Larger files than a quarter of it are not cached.
+FILE_CACHE_MAX_BYTES = int(os.getenv("FILE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+@dataclass
+class CachedFile:
+    """Text content of a file, valid while its mtime and size are unchanged."""
+
+    mtime_ns: int
+    size: int
+    content: str
+
+
+def _text_mode(content: str) -> str:
+    # What reading the written content back in text mode returns
+    return content.replace("\r\n", "\n").replace("\r", "\n") if "\r" in content else content
+
+
+class FileCache:
+    """
+    Process-wide LRU cache of file contents, as a text-mode `open()` reads them.
+
+    Entries are checked against the file's mtime and size on every read, so files
+    changed behind the tools' back are read again. Tool writes replace the entry with
+    the written content, and shell commands that may change files drop the entries
+    under their repository.
+    """
+
+    def __init__(self, max_bytes: int = FILE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedFile]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _store(self, path: str, entry: CachedFile) -> None:
+        self._drop(path)
+        if entry.size > self.max_bytes // 4:
+            return
+        self._entries[path] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+
+    def _drop(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def read(self, path: str, errors: str = "strict") -> str:
+        """
+        Content of a file, from the cache when it is unchanged on disk.
+
+        Files that are not valid UTF-8 raise UnicodeDecodeError, unless `errors` is
+        "replace" or "ignore"; such content is then decoded accordingly but not cached.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                self._entries.move_to_end(path)
+                return entry.content
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read()
+        except UnicodeDecodeError:
+            if errors == "strict":
+                raise
+            with open(path, "r", encoding="utf-8", errors=errors) as f:
+                return f.read()
+
+        with self._lock:
+            # Only cache what was read if the file did not change meanwhile
+            if os.stat(path).st_mtime_ns == stat.st_mtime_ns:
+                self._store(path, CachedFile(stat.st_mtime_ns, stat.st_size, content))
+        return content
+
+    def put(self, path: str, content: str) -> None:
+        """Record `content` as just written to `path`."""
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.invalidate(path)
+            return
+        with self._lock:
+            self._store(path, CachedFile(stat.st_mtime_ns, stat.st_size, _text_mode(content)))
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Drop the entry of `path`, every entry under it when it is a directory, or everything."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            path = os.path.abspath(path)
+            for cached_path in [p for p in self._entries if p == path or p.startswith(path + os.sep)]:
+                self._drop(cached_path)
+
+
+file_cache = FileCache()
+
+
+def _on_dirty(path: Optional[str]) -> None:
+    # Without a path, the shell may have changed any file
+    file_cache.invalidate(path)
+
+
+change_tracker.add_listener(on_write=file_cache.put, on_dirty=_on_dirty)
@@ -0,0 +1,147 @@
+import os
+import threading
+import subprocess
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Number of (file, HEAD) histories kept in memory.
+GIT_HISTORY_CACHE_SIZE = 64
+
+# Separators of the log format: one record per commit, fields within it.
+RECORD = "\x1e"
+FIELD = "\x1f"
+
+
+@dataclass
+class Revision:
+    """A commit that changed a file, with the file's patch in it."""
+
+    commit: str
+    author: str
+    time: str
+    message: str
+    changes: str = ""
+
+
+@dataclass
+class FileHistory:
+    """Recent revisions of a file at one HEAD; the blame summary is computed when first asked for."""
+
+    repo_root: str
+    rel_path: str
+    head: Optional[str]
+    revisions: List[Revision] = field(default_factory=list)
+    blame: Optional[List[Tuple[str, int]]] = None
+
+
+_cache: "OrderedDict[Tuple[str, int, Optional[str]], FileHistory]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _repo_of(file_path: str) -> Tuple[str, Optional[str]]:
+    """Root of the repository containing a file, and its HEAD commit (None before the first commit)."""
+    cwd = os.path.dirname(file_path) or "."
+    try:
+        output = subprocess.check_output(
+            ["git", "rev-parse", "--show-toplevel", "HEAD"], cwd=cwd, stderr=subprocess.PIPE, text=True
+        )
+        repo_root, head = output.split("\n")[:2]
+        return repo_root, head
+    except subprocess.CalledProcessError:
+        pass
+    try:
+        repo_root = subprocess.check_output(
+            ["git", "rev-parse", "--show-toplevel"], cwd=cwd, stderr=subprocess.PIPE, text=True
+        ).strip()
+    except subprocess.CalledProcessError:
+        raise ValueError("File is not in a git repository") from None
+    return repo_root, None
+
+
+def _read_log(repo_root: str, rel_path: str, num_revisions: int) -> List[Revision]:
+    """Revisions of a file and their patches, parsed from a single streamed `git log -p --follow`."""
+    command = [
+        "git", "log", "-p", "--follow", "-n", str(num_revisions),
+        f"--format={RECORD}%h{FIELD}%an{FIELD}%ar{FIELD}%s",
+        "--", rel_path,
+    ]
+    revisions: List[Revision] = []
+    patch: List[str] = []
+
+    def flush() -> None:
+        if revisions:
+            # Like `git show --patch`: no blank lines around the patch, but its final newline
+            changes = "".join(patch).strip("\n")
+            revisions[-1].changes = changes + "\n" if changes else ""
+        patch.clear()
+
+    process = subprocess.Popen(
+        command, cwd=repo_root, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, errors="replace"
+    )
+    try:
+        assert process.stdout is not None
+        for line in process.stdout:
+            if line.startswith(RECORD):
+                flush()
+                commit, author, time, message = line[1:].rstrip("\n").split(FIELD, 3)
+                revisions.append(Revision(commit=commit, author=author, time=time, message=message))
+            else:
+                patch.append(line)
+        flush()
+    finally:
+        process.stdout.close()
+        process.wait()
+    return revisions
+
+
+def get_history(file_path: str, num_revisions: int = 5) -> FileHistory:
+    """
+    Last `num_revisions` revisions of a file, following renames.
+
+    Histories are cached per file, revision count and HEAD, so repeated calls cost
+    one `git rev-parse` until a new commit is made.
+
+    Raises:
+        ValueError: If the file is not in a git repository
+    """
+    file_path = os.path.abspath(file_path)
+    repo_root, head = _repo_of(file_path)
+    key = (file_path, num_revisions, head)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    rel_path = os.path.relpath(file_path, repo_root)
+    history = FileHistory(repo_root=repo_root, rel_path=rel_path, head=head)
+    if head is not None:
+        history.revisions = _read_log(repo_root, rel_path, num_revisions)
+
+    with _cache_lock:
+        _cache[key] = history
+        while len(_cache) > GIT_HISTORY_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return history
+
+
+def blame_summary(history: FileHistory) -> List[Tuple[str, int]]:
+    """Line count per author of the file at HEAD, most lines first; computed once per history."""
+    if history.blame is None:
+        authors: Dict[str, int] = Counter()
+        if history.head is not None:
+            try:
+                output = subprocess.check_output(
+                    ["git", "blame", "--line-porcelain", history.head, "--", history.rel_path],
+                    cwd=history.repo_root,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                    errors="replace",
+                )
+            except subprocess.CalledProcessError:
+                output = ""  # not in HEAD yet
+            for line in output.split("\n"):
+                if line.startswith("author "):
+                    authors[line[len("author "):]] += 1
+        history.blame = sorted(authors.items(), key=lambda item: (-item[1], item[0]))
+    return history.blame
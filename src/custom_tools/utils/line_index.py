@@ -0,0 +1,83 @@
+import io
+import os
+import mmap
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Number of files whose line offsets are kept in memory.
+LINE_INDEX_CACHE_SIZE = int(os.getenv("LINE_INDEX_CACHE_SIZE", "64"))
+
+
+@dataclass
+class LineIndex:
+    """Byte offsets of the lines of a file, valid while its mtime and size are unchanged."""
+
+    path: str
+    mtime_ns: int
+    size: int
+    offsets: "array[int]"  # start of every line, followed by the file size
+
+    @property
+    def line_count(self) -> int:
+        return len(self.offsets) - 1
+
+
+_cache: "OrderedDict[str, LineIndex]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def build_line_index(path: str) -> LineIndex:
+    """Scan a file once for newlines. Lines end at '\\n'; a last line without one still counts."""
+    stat = os.stat(path)
+    offsets = array("q", [0] if stat.st_size else [])
+    if stat.st_size:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            position = data.find(b"\n")
+            while position != -1 and position + 1 < stat.st_size:
+                offsets.append(position + 1)
+                position = data.find(b"\n", position + 1)
+    offsets.append(stat.st_size)
+    return LineIndex(path=path, mtime_ns=stat.st_mtime_ns, size=stat.st_size, offsets=offsets)
+
+
+def get_line_index(path: str) -> LineIndex:
+    """Line index of a file, cached by path and rebuilt when its mtime or size changes."""
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+    with _cache_lock:
+        index = _cache.get(path)
+        if index is not None and index.mtime_ns == stat.st_mtime_ns and index.size == stat.st_size:
+            _cache.move_to_end(path)
+            return index
+
+    index = build_line_index(path)
+    with _cache_lock:
+        _cache[path] = index
+        while len(_cache) > LINE_INDEX_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
+
+
+def read_lines(path: str, start: int = 0, end: Optional[int] = None) -> List[str]:
+    """
+    Lines [start, end) of a file (0-based), reading only their bytes.
+
+    Lines are decoded as UTF-8 with '\r\n' read as '\n', like a text-mode `open()`,
+    but split on '\n' only so that they line up with the index.
+    """
+    index = get_line_index(path)
+    start = min(max(start, 0), index.line_count)
+    end = index.line_count if end is None else min(max(end, start), index.line_count)
+    if start == end:
+        return []
+    with open(path, "rb") as f:
+        f.seek(index.offsets[start])
+        data = f.read(index.offsets[end] - index.offsets[start])
+    return io.StringIO(data.decode("utf-8").replace("\r\n", "\n"), newline="\n").readlines()
+
+
+def line_count(path: str) -> int:
+    return get_line_index(path).line_count
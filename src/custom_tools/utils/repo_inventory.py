@@ -0,0 +1,219 @@
+import os
+import re
+import fnmatch
+import threading
+import subprocess
+from typing import Dict, Iterable, List, Optional, Set
+
+from custom_tools.utils.change_tracker import change_tracker
+
+# Directories never listed, even when a repo does not ignore them.
+EXCLUDED_DIRS = {'.git', '__pycache__', 'node_modules', '.venv', 'venv', 'env'}
+
+
+def glob_to_regex(pattern: str) -> "re.Pattern[str]":
+    """
+    Compile a glob pattern, matched against whole '/'-separated paths.
+
+    `**` matches any number of directories (including none), `*` and `?` stay within
+    one path component, and `[...]` classes are passed through.
+    """
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                regex += re.escape(pattern[i])
+                i += 1
+            else:
+                regex += fnmatch.translate(pattern[i:end + 1])[4:-3]
+                i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return re.compile(regex + r"\Z")
+
+
+def _is_excluded(relative_path: str) -> bool:
+    return any(part in EXCLUDED_DIRS for part in relative_path.split("/")[:-1])
+
+
+class RepoInventory:
+    """
+    In-memory list of the files of a directory tree, honouring `.gitignore`.
+
+    Git work trees are listed once with `git ls-files` (tracked plus untracked, not
+    ignored) and then kept current from the editing tools' writes; shell commands
+    that may change files make the next query list the repo again. Other
+    directories are walked with `os.walk` on every query.
+    """
+
+    def __init__(self, root: str, is_git: bool):
+        self.root = root
+        self.is_git = is_git
+        self._files: Optional[Set[str]] = None  # paths relative to root, None when stale
+        self._root_inode: Optional[int] = None  # detects a root that was deleted and cloned again
+        self._lock = threading.Lock()
+
+    def _list_files(self) -> Set[str]:
+        if self.is_git:
+            listed = subprocess.run(
+                ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+                cwd=self.root, capture_output=True, text=True, errors="replace"
+            )
+            deleted = subprocess.run(
+                ["git", "ls-files", "-z", "--deleted"], cwd=self.root, capture_output=True, text=True, errors="replace"
+            )
+            if listed.returncode == 0:
+                files = set(filter(None, listed.stdout.split("\0"))) - set(filter(None, deleted.stdout.split("\0")))
+                return {f for f in files if not _is_excluded(f)}
+        return self._walk(self.root, recursive=True)
+
+    def _walk(self, directory: str, recursive: bool) -> Set[str]:
+        """Files under `directory`, relative to the root; only its own files unless `recursive`."""
+        files = set()
+        for current_root, dirs, filenames in os.walk(directory):
+            dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS] if recursive else []
+            relative_root = os.path.relpath(current_root, self.root)
+            for filename in filenames:
+                files.add(filename if relative_root == "." else f"{relative_root}/{filename}")
+        return files
+
+    def _current(self) -> Set[str]:
+        with self._lock:
+            try:
+                root_inode: Optional[int] = os.stat(self.root).st_ino
+            except OSError:
+                root_inode = None
+            if self._files is None or not self.is_git or root_inode != self._root_inode:
+                self._files = self._list_files() if root_inode is not None else set()
+                self._root_inode = root_inode
+            return self._files
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._files = None
+
+    def add(self, path: str) -> None:
+        """Record a file written by a tool, unless it is ignored."""
+        relative_path = os.path.relpath(os.path.abspath(path), self.root)
+        with self._lock:
+            if self._files is None or relative_path in self._files or _is_excluded(relative_path):
+                return
+        ignored = subprocess.run(["git", "check-ignore", "-q", relative_path], cwd=self.root).returncode == 0
+        with self._lock:
+            if self._files is not None and not ignored:
+                self._files.add(relative_path)
+
+    def remove(self, path: str) -> None:
+        relative_path = os.path.relpath(os.path.abspath(path), self.root)
+        with self._lock:
+            if self._files is not None:
+                self._files.discard(relative_path)
+
+    def files(
+        self,
+        directory: Optional[str] = None,
+        extensions: Optional[Iterable[str]] = None,
+        pattern: Optional[str] = None,
+        recursive: bool = True,
+        include_hidden: bool = True,
+    ) -> List[str]:
+        """
+        Absolute paths of the files under `directory` (default: the root), sorted.
+
+        Args:
+            extensions: Keep only these extensions, e.g. ['.py', '.md'] (case-insensitive)
+            pattern: Glob matched against the path relative to `directory`, e.g. '**/*.py'
+            recursive: Include files in subdirectories of `directory`
+            include_hidden: Include files with a path component starting with '.'
+        """
+        directory = os.path.abspath(directory or self.root)
+        prefix = "" if directory == self.root else os.path.relpath(directory, self.root) + "/"
+        suffixes = tuple(e.lower() for e in extensions) if extensions else None
+        regex = glob_to_regex(pattern) if pattern else None
+        # Outside git, walk only what the query can match instead of the whole tree
+        listed = self._current() if self.is_git else self._walk(directory, recursive)
+
+        matches = []
+        for relative_path in listed:
+            if not relative_path.startswith(prefix):
+                continue
+            sub_path = relative_path[len(prefix):]
+            if not recursive and "/" in sub_path:
+                continue
+            if suffixes and not sub_path.lower().endswith(suffixes):
+                continue
+            if not include_hidden and any(part.startswith(".") for part in sub_path.split("/")):
+                continue
+            if regex and not regex.match(sub_path):
+                continue
+            matches.append(os.path.join(self.root, relative_path))
+        return sorted(matches)
+
+
+_inventories: Dict[str, RepoInventory] = {}
+_git_roots: Dict[str, str] = {}
+_inventories_lock = threading.Lock()
+
+
+def _git_root(directory: str) -> Optional[str]:
+    """Git toplevel of a directory. Only found roots are cached, as a directory may be cloned into later."""
+    if directory not in _git_roots:
+        if not os.path.isdir(directory):
+            return None
+        result = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel"], cwd=directory, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            return None
+        _git_roots[directory] = os.path.abspath(result.stdout.strip())
+    return _git_roots[directory]
+
+
+def get_inventory(path: str) -> RepoInventory:
+    """
+    Inventory covering `path`: the shared one of its git work tree, or an uncached walk of
+    the directory when it is not in a repo.
+    """
+    directory = os.path.abspath(path if os.path.isdir(path) else os.path.dirname(path))
+    with _inventories_lock:
+        root = _git_root(directory)
+        if root is None:
+            return RepoInventory(directory, is_git=False)
+        if root not in _inventories:
+            _inventories[root] = RepoInventory(root, is_git=True)
+        return _inventories[root]
+
+
+def _on_write(path: str, content: str) -> None:
+    path = os.path.abspath(path)
+    with _inventories_lock:
+        inventories = [inv for root, inv in _inventories.items() if path.startswith(root + os.sep)]
+    for inventory in inventories:
+        inventory.add(path)
+
+
+def _on_dirty(path: Optional[str]) -> None:
+    path = os.path.abspath(path) if path is not None else None
+    with _inventories_lock:
+        inventories = list(_inventories.values())
+    for inventory in inventories:
+        if path is None or path == inventory.root or path.startswith(inventory.root + os.sep):
+            inventory.invalidate()
+
+
+change_tracker.add_listener(on_write=_on_write, on_dirty=_on_dirty)
@@ -0,0 +1,92 @@
+import ast
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Number of parsed sources kept in memory.
+SYMBOL_CACHE_SIZE = 256
+
+
+@dataclass
+class Symbol:
+    """A class or function definition in a Python source."""
+
+    name: str  # qualified, e.g. "ClassName.method"
+    kind: str  # "class", "function", "async_function" or "method"
+    signature: str
+    start_line: int  # 1-based, including decorators
+    end_line: int  # 1-based, inclusive
+    parent: Optional[str] = None
+
+
+_cache: "OrderedDict[str, List[Symbol]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _signature(node: ast.AST) -> str:
+    if isinstance(node, ast.ClassDef):
+        bases = [ast.unparse(base) for base in node.bases] + [ast.unparse(k) for k in node.keywords]
+        return f"class {node.name}({', '.join(bases)})" if bases else f"class {node.name}"
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+
+
+def parse_symbols(source: str) -> List[Symbol]:
+    """Parse the classes and functions of a Python source, outermost first. Invalid sources have none."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+
+    symbols: List[Symbol] = []
+
+    def visit(node: ast.AST, parent: Optional[Symbol]) -> None:
+        for child in ast.iter_child_nodes(node):
+            if not isinstance(child, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                visit(child, parent)
+                continue
+            if isinstance(child, ast.ClassDef):
+                kind = "class"
+            elif parent is not None and parent.kind == "class":
+                kind = "method"
+            else:
+                kind = "async_function" if isinstance(child, ast.AsyncFunctionDef) else "function"
+            start_line = min([d.lineno for d in child.decorator_list] + [child.lineno])
+            symbol = Symbol(
+                name=f"{parent.name}.{child.name}" if parent else child.name,
+                kind=kind,
+                signature=_signature(child),
+                start_line=start_line,
+                end_line=child.end_lineno or child.lineno,
+                parent=parent.name if parent else None,
+            )
+            symbols.append(symbol)
+            visit(child, symbol)
+
+    visit(tree, None)
+    return symbols
+
+
+def get_symbols(source: str) -> List[Symbol]:
+    """Symbols of a Python source, cached by content hash."""
+    digest = hashlib.sha1(source.encode("utf-8", errors="replace")).hexdigest()
+    with _cache_lock:
+        if digest in _cache:
+            _cache.move_to_end(digest)
+            return _cache[digest]
+
+    symbols = parse_symbols(source)
+    with _cache_lock:
+        _cache[digest] = symbols
+        while len(_cache) > SYMBOL_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return symbols
+
+
+def enclosing_symbol(symbols: List[Symbol], start_line: int, end_line: int) -> Optional[Symbol]:
+    """Innermost symbol containing the 1-based line range, if any."""
+    containing = [s for s in symbols if s.start_line <= start_line and end_line <= s.end_line]
+    return min(containing, key=lambda s: s.end_line - s.start_line) if containing else None
@@ -0,0 +1,173 @@
+import os
+import re
+import json
+import shutil
+import subprocess
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from custom_tools.utils.repo_inventory import get_inventory
+
+# Files larger than this are skipped by the Python fallback, like minified bundles and data dumps.
+MAX_SEARCHED_FILE_BYTES = 2 * 1024 * 1024
+# Matched lines longer than this are cut in results.
+MAX_MATCH_LINE_LENGTH = 500
+
+
+@dataclass
+class SearchMatch:
+    """A line matching a search query."""
+
+    file: str
+    line: int  # 1-based
+    column: int  # 1-based
+    text: str
+    before: List[str] = field(default_factory=list)
+    after: List[str] = field(default_factory=list)
+
+
+def _clip(text: str) -> str:
+    text = text.rstrip("\r\n")
+    return text if len(text) <= MAX_MATCH_LINE_LENGTH else text[:MAX_MATCH_LINE_LENGTH] + "..."
+
+
+def compile_query(query: str, regex: bool = False, case_sensitive: bool = False) -> "re.Pattern[str]":
+    """Compile a literal or regex query; raises ValueError for an empty query or invalid regex."""
+    if not query:
+        raise ValueError("Search pattern cannot be empty")
+    try:
+        return re.compile(query if regex else re.escape(query), 0 if case_sensitive else re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f"Invalid regex '{query}': {e}")
+
+
+def _search_with_ripgrep(
+    roots: List[str], query: str, regex: bool, case_sensitive: bool, file_glob: Optional[str],
+    max_results: int, context_lines: int,
+) -> Tuple[List[SearchMatch], bool]:
+    command = ["rg", "--json", "--no-messages", "--context", str(context_lines)]
+    command += [] if regex else ["--fixed-strings"]
+    command += [] if case_sensitive else ["--ignore-case"]
+    command += ["--glob", file_glob] if file_glob else []
+    command += ["--regexp", query, "--", *roots]
+
+    # Matched and context lines per file, collected until the file's "end" message.
+    file_lines: Dict[int, str] = {}
+    file_matches: List[Tuple[int, int, str]] = []
+    matches: List[SearchMatch] = []
+    truncated = False
+
+    def flush(path: str) -> None:
+        for line, column, text in file_matches:
+            matches.append(SearchMatch(
+                file=path,
+                line=line,
+                column=column,
+                text=text,
+                before=[file_lines[n] for n in range(line - context_lines, line) if n in file_lines],
+                after=[file_lines[n] for n in range(line + 1, line + context_lines + 1) if n in file_lines],
+            ))
+        file_lines.clear()
+        file_matches.clear()
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, errors="replace")
+    try:
+        assert process.stdout is not None
+        for raw in process.stdout:
+            message = json.loads(raw)
+            data = message.get("data", {})
+            if message["type"] in ("match", "context"):
+                text = _clip(data["lines"].get("text", ""))
+                file_lines[data["line_number"]] = text
+                if message["type"] == "match":
+                    if len(matches) + len(file_matches) >= max_results:
+                        truncated = True
+                        flush(data["path"]["text"])
+                        break
+                    column = data["submatches"][0]["start"] + 1 if data.get("submatches") else 1
+                    file_matches.append((data["line_number"], column, text))
+            elif message["type"] == "end":
+                flush(data["path"]["text"])
+    finally:
+        process.kill()
+        process.wait()
+    if process.returncode not in (0, 1, -9) and not matches:
+        raise OSError(f"rg exited with {process.returncode}")
+    return matches, truncated
+
+
+def _search_in_python(
+    roots: List[str], pattern: "re.Pattern[str]", file_glob: Optional[str], max_results: int, context_lines: int,
+) -> Tuple[List[SearchMatch], bool]:
+    files: List[str] = []
+    for root in roots:
+        if os.path.isfile(root):
+            files.append(root)
+        else:
+            glob = file_glob if file_glob is None or "/" in file_glob else f"**/{file_glob}"
+            files.extend(get_inventory(root).files(root, pattern=glob, include_hidden=False))
+
+    matches: List[SearchMatch] = []
+    for path in files:
+        try:
+            if os.path.getsize(path) > MAX_SEARCHED_FILE_BYTES:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        if b"\0" in data[:8192]:
+            continue
+        lines = data.decode("utf-8", errors="replace").splitlines()
+        for i, line in enumerate(lines):
+            found = pattern.search(line)
+            if not found:
+                continue
+            if len(matches) >= max_results:
+                return matches, True
+            matches.append(SearchMatch(
+                file=path,
+                line=i + 1,
+                column=found.start() + 1,
+                text=_clip(line),
+                before=[_clip(l) for l in lines[max(0, i - context_lines):i]],
+                after=[_clip(l) for l in lines[i + 1:i + 1 + context_lines]],
+            ))
+    return matches, False
+
+
+def search_files(
+    roots: List[str],
+    query: str,
+    regex: bool = False,
+    case_sensitive: bool = False,
+    file_glob: Optional[str] = None,
+    max_results: int = 100,
+    context_lines: int = 0,
+) -> Tuple[List[SearchMatch], bool, str]:
+    """
+    Search files and directory trees for a literal or regex query.
+
+    Uses ripgrep when it is installed, otherwise scans the repo inventory in Python;
+    both skip ignored, hidden and binary files. `file_glob` (e.g. '*.py' or
+    'src/**/*.ts') limits the files searched.
+
+    Returns:
+        (matches, whether max_results cut the results short, backend name)
+    """
+    pattern = compile_query(query, regex, case_sensitive)
+    roots = [os.path.abspath(os.path.expanduser(root)) for root in roots]
+    missing = [root for root in roots if not os.path.exists(root)]
+    if missing:
+        raise FileNotFoundError(f"Path not found: {', '.join(missing)}")
+
+    if shutil.which("rg"):
+        try:
+            matches, truncated = _search_with_ripgrep(
+                roots, query, regex, case_sensitive, file_glob, max_results, context_lines
+            )
+            return matches, truncated, "ripgrep"
+        except (OSError, ValueError, KeyError):
+            pass
+    matches, truncated = _search_in_python(roots, pattern, file_glob, max_results, context_lines)
+    return matches, truncated, "python"
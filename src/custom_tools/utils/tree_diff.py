@@ -0,0 +1,204 @@
+import os
+import difflib
+import hashlib
+import threading
+import subprocess
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+# Files up to this size are diffed with difflib; larger ones with `git diff --no-index`.
+PYTHON_DIFF_MAX_BYTES = 256 * 1024
+# Size of the diff text of a directory comparison; later differences are only counted.
+DIFF_MAX_OUTPUT_BYTES = int(os.getenv("FILE_READ_DIFF_MAX_BYTES", "100000"))
+# Number of file hashes kept in memory.
+HASH_CACHE_SIZE = 4096
+
+# Directories of version control metadata, which are not compared.
+SKIPPED_DIRS = {".git", ".hg", ".svn"}
+
+_hashes: "OrderedDict[Tuple[str, int, int], bytes]" = OrderedDict()
+_hashes_lock = threading.Lock()
+
+
+@dataclass
+class TreeDiffSummary:
+    """Counts of a directory comparison."""
+
+    compared: int = 0
+    identical: int = 0
+    modified: int = 0
+    only_in_first: int = 0
+    only_in_second: int = 0
+    omitted: int = 0  # differences left out of the output once it reached its size limit
+
+    def describe(self, first: str, second: str) -> str:
+        text = (
+            f"{self.compared} files compared: {self.modified} modified, {self.identical} identical, "
+            f"{self.only_in_first} only in {first}, {self.only_in_second} only in {second}"
+        )
+        if self.omitted:
+            text += f"; {self.omitted} differences not shown (output limit reached), compare those paths directly"
+        return text
+
+
+def file_hash(path: str, stat: os.stat_result) -> bytes:
+    """Content hash of a file, cached while its size and mtime are unchanged."""
+    key = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+    with _hashes_lock:
+        if key in _hashes:
+            _hashes.move_to_end(key)
+            return _hashes[key]
+
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+
+    with _hashes_lock:
+        _hashes[key] = digest.digest()
+        while len(_hashes) > HASH_CACHE_SIZE:
+            _hashes.popitem(last=False)
+    return _hashes[key]
+
+
+def files_equal(path1: str, path2: str, stat1: Optional[os.stat_result] = None,
+                stat2: Optional[os.stat_result] = None, trust_mtime: bool = False) -> bool:
+    """
+    Whether two files have the same content.
+
+    Different sizes differ without reading anything. With `trust_mtime`, same size and
+    mtime count as equal, as for a copy that kept its timestamps; this is only a
+    heuristic for walking whole trees. Otherwise the cached hashes decide.
+    """
+    stat1 = stat1 or os.stat(path1)
+    stat2 = stat2 or os.stat(path2)
+    if stat1.st_size != stat2.st_size:
+        return False
+    if trust_mtime and stat1.st_mtime_ns == stat2.st_mtime_ns:
+        return True
+    return file_hash(path1, stat1) == file_hash(path2, stat2)
+
+
+def _git_diff(path1: str, path2: str) -> str:
+    # Exits with 1 when the files differ
+    result = subprocess.run(
+        ["git", "diff", "--no-index", "--no-color", "--", path1, path2],
+        capture_output=True,
+        text=True,
+        errors="replace",
+    )
+    if result.returncode not in (0, 1):
+        raise OSError(result.stderr.strip() or f"git diff exited with {result.returncode}")
+    return result.stdout.rstrip("\n")
+
+
+def diff_files(path1: str, path2: str) -> str:
+    """
+    Unified diff of two files; empty when their contents are equal.
+
+    Small text files are diffed with difflib, files over PYTHON_DIFF_MAX_BYTES with
+    `git diff --no-index` when git is available, and binary files are only reported.
+    """
+    stat1, stat2 = os.stat(path1), os.stat(path2)
+    if files_equal(path1, path2, stat1, stat2):
+        return ""
+
+    if max(stat1.st_size, stat2.st_size) > PYTHON_DIFF_MAX_BYTES:
+        try:
+            return _git_diff(path1, path2)
+        except FileNotFoundError:
+            pass  # no git, diff in Python
+
+    try:
+        with open(path1, "r", encoding="utf-8") as f:
+            lines1 = f.readlines()
+        with open(path2, "r", encoding="utf-8") as f:
+            lines2 = f.readlines()
+    except UnicodeDecodeError:
+        return f"Binary files {path1} and {path2} differ"
+
+    diff_iter = difflib.unified_diff(
+        lines1,
+        lines2,
+        fromfile=os.path.basename(path1),
+        tofile=os.path.basename(path2),
+        lineterm="",
+    )
+    return "\n".join(diff_iter)
+
+
+def _walk(root: str, parts: Tuple[str, ...] = ()) -> Iterator[Tuple[Tuple[str, ...], os.DirEntry]]:
+    """Files under a directory with their path components, in sorted order, without listing all of them first."""
+    try:
+        entries = sorted(os.scandir(os.path.join(root, *parts)), key=lambda e: e.name)
+    except OSError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if entry.name not in SKIPPED_DIRS:
+                yield from _walk(root, parts + (entry.name,))
+        elif entry.is_file():
+            yield parts + (entry.name,), entry
+
+
+def diff_trees(first: str, second: str, max_bytes: int = DIFF_MAX_OUTPUT_BYTES) -> Tuple[str, TreeDiffSummary]:
+    """
+    Compare two directories file by file.
+
+    Both trees are walked in step, so files only in one of them are reported as they
+    are met, and files in both are diffed only if `files_equal` finds they differ,
+    trusting equal size and mtime. The difference that crosses `max_bytes` is cut
+    with a marker, and further differences are only counted.
+
+    Returns:
+        The per-file differences, each headed by "=== relative/path ===", and the counts
+    """
+    summary = TreeDiffSummary()
+    results: List[str] = []
+    size = 0
+
+    def add(rel_path: str, text: str) -> None:
+        nonlocal size
+        if size >= max_bytes:
+            summary.omitted += 1
+            return
+        entry = f"\n=== {rel_path} ===\n{text}"
+        encoded = entry.encode("utf-8")
+        if size + len(encoded) > max_bytes:
+            kept = encoded[:max_bytes - size].decode("utf-8", errors="ignore")
+            entry = (
+                f"{kept}\n[... truncated {rel_path}: {len(encoded) - len(kept.encode('utf-8'))} of "
+                f"{len(encoded)} bytes left out, output limit reached]"
+            )
+            size = max_bytes
+        else:
+            size += len(encoded)
+        results.append(entry)
+
+    walk1, walk2 = _walk(first), _walk(second)
+    item1, item2 = next(walk1, None), next(walk2, None)
+    while item1 is not None or item2 is not None:
+        if item2 is None or (item1 is not None and item1[0] < item2[0]):
+            assert item1 is not None
+            summary.only_in_first += 1
+            add(os.path.join(*item1[0]), f"Only in {first}")
+            item1 = next(walk1, None)
+        elif item1 is None or item2[0] < item1[0]:
+            summary.only_in_second += 1
+            add(os.path.join(*item2[0]), f"Only in {second}")
+            item2 = next(walk2, None)
+        else:
+            summary.compared += 1
+            entry1, entry2 = item1[1], item2[1]
+            if files_equal(entry1.path, entry2.path, entry1.stat(), entry2.stat(), trust_mtime=True):
+                summary.identical += 1
+            else:
+                summary.modified += 1
+                if size < max_bytes:
+                    add(os.path.join(*item1[0]), diff_files(entry1.path, entry2.path))
+                else:
+                    summary.omitted += 1
+            item1, item2 = next(walk1, None), next(walk2, None)
+
+    return "\n".join(results), summary
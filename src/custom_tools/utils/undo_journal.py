@@ -0,0 +1,109 @@
+import os
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+# Total size of the kept snapshots. The oldest snapshots of any file are dropped first.
+UNDO_JOURNAL_MAX_BYTES = int(os.getenv("UNDO_JOURNAL_MAX_BYTES", str(32 * 1024 * 1024)))
+# Number of undo steps kept per file.
+UNDO_JOURNAL_DEPTH = int(os.getenv("UNDO_JOURNAL_DEPTH", "10"))
+
+
+@dataclass
+class Snapshot:
+    """Content of a file before an edit; None if the edit created the file."""
+
+    content: Optional[bytes]
+
+    @property
+    def size(self) -> int:
+        return len(self.content) if self.content is not None else 0
+
+
+class UndoJournal:
+    """
+    Process-wide, in-memory undo history of the files changed by the editing tools.
+
+    Every edit records the file's previous bytes, so undoing restores it exactly, with
+    nothing written next to the file. Each file keeps its last UNDO_JOURNAL_DEPTH
+    snapshots, and when all of them exceed `max_bytes`, the oldest snapshots of the
+    least recently edited files are dropped.
+    """
+
+    def __init__(self, max_bytes: int = UNDO_JOURNAL_MAX_BYTES, depth: int = UNDO_JOURNAL_DEPTH):
+        self.max_bytes = max_bytes
+        self.depth = depth
+        self._history: "OrderedDict[str, Deque[Snapshot]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def record(self, path: str, content: Optional[bytes]) -> None:
+        """Record `content` as the state of `path` before an edit."""
+        path = os.path.abspath(path)
+        snapshot = Snapshot(content)
+        with self._lock:
+            if snapshot.size > self.max_bytes:
+                # Undoing past this edit would restore an older state, so forget the file
+                self._discard(path)
+                return
+            history = self._history.setdefault(path, deque())
+            self._history.move_to_end(path)
+            history.append(snapshot)
+            self._bytes += snapshot.size
+            if len(history) > self.depth:
+                self._bytes -= history.popleft().size
+            while self._bytes > self.max_bytes:
+                oldest_path, oldest = next(iter(self._history.items()))
+                self._bytes -= oldest.popleft().size
+                if not oldest:
+                    del self._history[oldest_path]
+
+    def record_file(self, path: str) -> None:
+        """Record the current content of `path`, or that it does not exist yet."""
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                self.record(path, f.read())
+        else:
+            self.record(path, None)
+
+    def pop(self, path: str) -> Snapshot:
+        """
+        Take the most recent snapshot of `path`.
+
+        Raises:
+            ValueError: If there is nothing to undo for the file
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            history = self._history.get(path)
+            if not history:
+                raise ValueError(f"No edit to undo for {path}")
+            snapshot = history.pop()
+            self._bytes -= snapshot.size
+            if not history:
+                del self._history[path]
+            return snapshot
+
+    def steps(self, path: str) -> int:
+        """Number of edits of `path` that can be undone."""
+        with self._lock:
+            return len(self._history.get(os.path.abspath(path), ()))
+
+    def _discard(self, path: str) -> None:
+        for snapshot in self._history.pop(path, ()):
+            self._bytes -= snapshot.size
+
+    def discard(self, path: Optional[str] = None) -> None:
+        """Forget the history of `path`, of every file under it when it is a directory, or of everything."""
+        with self._lock:
+            if path is None:
+                self._history.clear()
+                self._bytes = 0
+                return
+            path = os.path.abspath(path)
+            for journaled_path in [p for p in self._history if p == path or p.startswith(path + os.sep)]:
+                self._discard(journaled_path)
+
+
+undo_journal = UndoJournal()
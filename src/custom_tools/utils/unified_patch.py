@@ -0,0 +1,220 @@
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+# Context lines that may be dropped from each end of a hunk that does not match as is.
+DEFAULT_MAX_FUZZ = 2
+
+
+@dataclass
+class Hunk:
+    """A hunk of a unified diff; `lines` keep their ' ', '-' or '+' prefix."""
+
+    old_start: int
+    old_count: int
+    lines: List[str] = field(default_factory=list)
+
+
+@dataclass
+class FilePatch:
+    """The hunks of one file. Paths are None for a patch without file headers, '/dev/null' for none."""
+
+    old_path: Optional[str] = None
+    new_path: Optional[str] = None
+    hunks: List[Hunk] = field(default_factory=list)
+
+
+@dataclass
+class HunkResult:
+    """Where a hunk applied, or why it did not."""
+
+    index: int  # 1-based within its file
+    old_start: int
+    applied: bool
+    expected_line: int = 0  # 1-based, after the line count changes of the hunks before
+    line: int = 0  # 1-based line of the file the hunk applied at
+    fuzz: int = 0
+    whitespace: bool = False  # matched only when ignoring whitespace
+    error: str = ""
+
+    def describe(self) -> str:
+        if not self.applied:
+            return f"hunk {self.index} (-{self.old_start}) FAILED: {self.error}"
+        notes = []
+        if self.line != self.expected_line:
+            notes.append(f"offset {self.line - self.expected_line:+d}")
+        if self.fuzz:
+            notes.append(f"fuzz {self.fuzz}")
+        if self.whitespace:
+            notes.append("whitespace ignored")
+        return f"hunk {self.index} at line {self.line}" + (f" ({', '.join(notes)})" if notes else "")
+
+
+def _strip_prefix(path: str) -> str:
+    path = path.split("\t")[0].strip()
+    return path[2:] if path.startswith(("a/", "b/")) else path
+
+
+def parse_patch(patch: str) -> List[FilePatch]:
+    """
+    Parse a unified diff, as produced by `diff -u` or `git diff`.
+
+    Hunk line counts are not trusted: a hunk runs until the next hunk or file header.
+    They only tell removed `-- ` and added `++ ` lines (SQL comments, `--flag` lines)
+    from a file header: while a hunk still expects lines, a `---`/`+++` pair is only
+    a header if a hunk header follows it. Empty lines inside a hunk are read as empty
+    context lines, as they often lose their leading space when a diff is copied around.
+
+    Raises:
+        ValueError: If the text contains no hunk, or a hunk without lines
+    """
+    files: List[FilePatch] = []
+    current: Optional[FilePatch] = None
+    hunk: Optional[Hunk] = None
+    old_left = new_left = 0  # lines the current hunk's header still expects
+    lines = patch.splitlines()
+
+    for i, line in enumerate(lines):
+        next_line = lines[i + 1] if i + 1 < len(lines) else ""
+        is_header = line.startswith("--- ") and next_line.startswith("+++ ")
+        if is_header and hunk is not None and (old_left > 0 or new_left > 0):
+            is_header = i + 2 < len(lines) and bool(HUNK_HEADER.match(lines[i + 2]))
+        if is_header:
+            current = FilePatch(old_path=_strip_prefix(line[4:]))
+            files.append(current)
+            hunk = None
+        elif line.startswith("+++ ") and current is not None and current.new_path is None and not current.hunks:
+            current.new_path = _strip_prefix(line[4:])
+        elif HUNK_HEADER.match(line):
+            match = HUNK_HEADER.match(line)
+            assert match is not None
+            if current is None:
+                current = FilePatch()
+                files.append(current)
+            old_count = int(match.group(2)) if match.group(2) is not None else 1
+            old_left = old_count
+            new_left = int(match.group(4)) if match.group(4) is not None else 1
+            hunk = Hunk(old_start=int(match.group(1)), old_count=old_count)
+            current.hunks.append(hunk)
+        elif hunk is not None:
+            if line.startswith((" ", "-", "+")) or line == "":
+                hunk.lines.append(line or " ")
+                old_left -= line[:1] != "+"
+                new_left -= line[:1] != "-"
+            elif line.startswith("\\"):
+                continue  # "\ No newline at end of file"
+            else:
+                hunk = None  # "diff --git", "index ..." and other lines between files
+
+    # Trailing empty lines of a hunk are usually the end of the text, not context
+    for file_patch in files:
+        for index, parsed in enumerate(file_patch.hunks, start=1):
+            while parsed.lines and parsed.lines[-1] == " ":
+                parsed.lines.pop()
+            if not parsed.lines:
+                raise ValueError(
+                    f"Hunk {index} (-{parsed.old_start}) of {file_patch.old_path or 'the patch'} has no lines"
+                )
+
+    if not any(file_patch.hunks for file_patch in files):
+        raise ValueError(
+            "No hunks found in patch. Expected unified diff hunks starting with '@@ -start,count +start,count @@'"
+        )
+    return files
+
+
+def _normalize(line: str) -> str:
+    return " ".join(line.split())
+
+
+def _find(lines: List[str], old: List[str], expected: int, ignore_whitespace: bool) -> Optional[int]:
+    """Start index of `old` in `lines` nearest to `expected`, if any."""
+    if ignore_whitespace:
+        lines = [_normalize(line) for line in lines]
+        old = [_normalize(line) for line in old]
+    last_start = len(lines) - len(old)
+    if last_start < 0:
+        return None
+    expected = min(max(expected, 0), last_start)
+    for distance in range(0, max(expected, last_start - expected) + 1):
+        for start in (expected - distance, expected + distance):
+            if 0 <= start <= last_start and lines[start:start + len(old)] == old:
+                return start
+    return None
+
+
+def _trim_context(hunk_lines: List[str], fuzz: int) -> Tuple[List[str], int]:
+    """Drop up to `fuzz` context lines from each end; returns the lines and how many were dropped in front."""
+    leading = 0
+    while leading < fuzz and leading < len(hunk_lines) and hunk_lines[leading][0] == " ":
+        leading += 1
+    trailing = 0
+    while trailing < fuzz and trailing < len(hunk_lines) - leading and hunk_lines[-1 - trailing][0] == " ":
+        trailing += 1
+    return hunk_lines[leading:len(hunk_lines) - trailing], leading
+
+
+def apply_hunks(
+    content: str, hunks: List[Hunk], max_fuzz: int = DEFAULT_MAX_FUZZ
+) -> Tuple[str, List[HunkResult]]:
+    """
+    Apply hunks to a file's content in memory.
+
+    Each hunk is looked up nearest to its expected line (shifted by the line count
+    changes of the hunks before it), first exactly, then ignoring whitespace, then
+    with up to `max_fuzz` context lines dropped from each end. Matched context keeps
+    the file's own text.
+
+    Returns:
+        The new content and one result per hunk; content is only meaningful if all applied
+    """
+    lines = content.split("\n")
+    results: List[HunkResult] = []
+    delta = 0
+
+    for index, hunk in enumerate(hunks, start=1):
+        expected = (hunk.old_start if hunk.old_count == 0 else hunk.old_start - 1) + delta
+        result = HunkResult(index=index, old_start=hunk.old_start, applied=False, expected_line=max(expected, 0) + 1)
+        results.append(result)
+
+        placement = None
+        for fuzz in range(0, max_fuzz + 1):
+            body, dropped = _trim_context(hunk.lines, fuzz)
+            if fuzz and len(body) == len(hunk.lines):
+                break  # nothing left to drop
+            old = [line[1:] for line in body if line[0] in " -"]
+            if not old:
+                if hunk.old_count == 0 or fuzz == 0:
+                    placement = (min(max(expected, 0), len(lines)), body, dropped, fuzz, False)
+                break
+            for ignore_whitespace in (False, True):
+                start = _find(lines, old, expected + dropped, ignore_whitespace)
+                if start is not None:
+                    placement = (start, body, dropped, fuzz, ignore_whitespace)
+                    break
+            if placement:
+                break
+
+        if placement is None:
+            result.error = f"context not found near line {result.expected_line}"
+            continue
+
+        start, body, dropped, result.fuzz, result.whitespace = placement
+        replacement: List[str] = []
+        position = start
+        for line in body:
+            if line[0] == " ":
+                replacement.append(lines[position])
+                position += 1
+            elif line[0] == "-":
+                position += 1
+            else:
+                replacement.append(line[1:])
+        lines[start:position] = replacement
+        delta += len(replacement) - (position - start)
+        result.applied = True
+        result.line = max(start - dropped, 0) + 1  # where the untrimmed hunk would start
+
+    return "\n".join(lines), results
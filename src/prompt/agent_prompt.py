@@ -42,7 +42,9 @@ Responsibilities:
    - Each step should clearly describe what needs to be done to implement the story.
    - Use short, action-oriented descriptions (e.g., “Add helper to parse GitHub link”).
 3. Identify Relevant Files:
-   - Use the provided file context ({file_context}) to suggest files likely to be modified or created.
+   - Use the provided repository map to suggest files likely to be modified or created. It lists the most relevant files first with their top-level classes and functions, and summarises the rest per directory; use file_read to look into summarised directories.
+   - Repository map:
+{file_context}
    - Provide absolute paths in the format: /tmp/{project_name}/...
    - If uncertain, annotate with “(tentative)” to indicate the file is a guess.
 4. Clarify Ambiguities:
@@ -274,7 +276,7 @@ lint_fix_prompt = """
 You are the Lint Fix Agent.
 
 Your responsibilities:
-1. Use the `lint_check` tool on the manifest to detect linting/type errors (pylint & mypy).
+1. Use the `lint_check` tool on the manifest to detect linting/type errors on the changed lines.
 2. If errors are found:
    - Read the relevant file(s) using `file_read`.
    - Fix only the reported issues (syntax errors, type errors, undefined variables, etc.).
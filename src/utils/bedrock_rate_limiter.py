@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import heapq
+import fcntl
+import asyncio
+import itertools
+import threading
+from enum import IntEnum
+from contextlib import contextmanager
+from typing import Any, AsyncGenerator, Dict, Iterator, List, Optional, Tuple
+
+from strands.models import BedrockModel
+from strands.types.exceptions import ModelThrottledException
+
+# Default quotas per model id, overridable per model through BEDROCK_RATE_LIMITS, e.g.
+# '{"us.amazon.nova-pro-v1:0": {"rpm": 100, "tpm": 400000}}'
+DEFAULT_RPM = int(os.getenv("BEDROCK_DEFAULT_RPM", "50"))
+DEFAULT_TPM = int(os.getenv("BEDROCK_DEFAULT_TPM", "200000"))
+
+# Bucket capacity in seconds of quota. Small bursts keep throughput smooth instead
+# of spending a whole minute of quota at once and getting throttled.
+BURST_SECONDS = float(os.getenv("BEDROCK_RATE_BURST_SECONDS", "10"))
+
+# Output tokens reserved for a call before its real usage is known.
+ESTIMATED_OUTPUT_TOKENS = int(os.getenv("BEDROCK_ESTIMATED_OUTPUT_TOKENS", "1000"))
+
+# Longest single sleep while waiting, so waiters notice freed capacity quickly.
+MAX_WAIT_SECONDS = 0.5
+
+
+class CallPriority(IntEnum):
+    """Priority of a model call; lower values are served first."""
+
+    CRITICAL = 0  # planner and senior engineer
+    NORMAL = 1  # story scoring and documentation
+    BACKGROUND = 2  # reviewers
+
+
+class TokenBucket:
+    """Token bucket that refills continuously at `rate_per_second` up to `capacity`."""
+
+    def __init__(self, capacity: float, rate_per_second: float):
+        self.capacity = capacity
+        self.rate_per_second = rate_per_second
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate_per_second)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available. Requests above capacity only need a full bucket."""
+        missing = min(amount, self.capacity) - self.level
+        return max(missing / self.rate_per_second, 0.0)
+
+
+class ModelRateLimiter:
+    """
+    Request and token rate control for one Bedrock model id.
+
+    Callers wait in a priority queue and only the head of the queue may consume
+    capacity, so high-priority calls are never starved by a stream of reviewers.
+    Token usage is reserved from an estimate and settled with the real usage
+    once the response metadata arrives.
+
+    When `shared_dir` is set, bucket levels are stored in a locked file so that
+    several processes on the same host share one quota.
+    """
+
+    def __init__(self, model_id: str, rpm: int, tpm: int, shared_dir: Optional[str] = None):
+        self.model_id = model_id
+        self.requests = TokenBucket(max(rpm * BURST_SECONDS / 60, 1), rpm / 60)
+        self.tokens = TokenBucket(max(tpm * BURST_SECONDS / 60, 1), tpm / 60)
+        self.shared_path = (
+            os.path.join(shared_dir, f"{model_id.replace(':', '_').replace('/', '_')}.json") if shared_dir else None
+        )
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+
+    @contextmanager
+    def _buckets(self) -> Iterator[None]:
+        """Refill both buckets, syncing their levels with the shared state file if configured."""
+        if not self.shared_path:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            yield
+            return
+
+        os.makedirs(os.path.dirname(self.shared_path), exist_ok=True)
+        with open(self.shared_path, "a+") as state_file:
+            fcntl.flock(state_file, fcntl.LOCK_EX)
+            try:
+                state_file.seek(0)
+                raw = state_file.read()
+                state = json.loads(raw) if raw else {}
+                now = time.time()
+                for name, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+                    bucket.level = state.get(name, bucket.capacity)
+                    bucket.updated = state.get("updated", now)
+                    bucket.refill(now)
+                yield
+                state_file.seek(0)
+                state_file.truncate()
+                json.dump({"requests": self.requests.level, "tokens": self.tokens.level, "updated": now}, state_file)
+            finally:
+                fcntl.flock(state_file, fcntl.LOCK_UN)
+
+    def _try_consume(self, tokens: int) -> float:
+        """Consume one request and `tokens` if available; otherwise return the seconds to wait."""
+        with self._buckets():
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if wait == 0:
+                self.requests.level -= 1
+                self.tokens.level -= tokens
+        return wait
+
+    async def acquire(self, tokens: int, priority: int = CallPriority.NORMAL) -> None:
+        """Wait until this call is at the head of the queue and capacity is available."""
+        ticket = (int(priority), next(self._sequence))
+        with self._lock:
+            heapq.heappush(self._waiters, ticket)
+
+        acquired = False
+        try:
+            while True:
+                with self._lock:
+                    if self._waiters[0] == ticket:
+                        wait = self._try_consume(tokens)
+                        if wait == 0:
+                            heapq.heappop(self._waiters)
+                            acquired = True
+                            return
+                    else:
+                        wait = MAX_WAIT_SECONDS
+                await asyncio.sleep(min(wait, MAX_WAIT_SECONDS))
+        finally:
+            if not acquired:
+                with self._lock:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """
+        Correct the token bucket once the real usage of a call is known.
+
+        A call that reported no usage (it failed or was throttled before its metadata)
+        is taken to have used no tokens, so its estimate is given back.
+        """
+        used = actual_tokens if actual_tokens is not None else 0
+        with self._lock, self._buckets():
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + estimated_tokens - used)
+
+    def penalize(self) -> None:
+        """Drain the buckets after Bedrock throttled a call, so waiters back off together."""
+        with self._lock, self._buckets():
+            self.requests.level = min(self.requests.level, 0)
+            self.tokens.level = min(self.tokens.level, 0)
+
+
+_rate_limiters: Dict[str, ModelRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model_id: str) -> ModelRateLimiter:
+    """Return the process-wide rate limiter for a model id."""
+    with _rate_limiters_lock:
+        if model_id not in _rate_limiters:
+            limits = json.loads(os.getenv("BEDROCK_RATE_LIMITS", "{}")).get(model_id, {})
+            _rate_limiters[model_id] = ModelRateLimiter(
+                model_id=model_id,
+                rpm=int(limits.get("rpm", DEFAULT_RPM)),
+                tpm=int(limits.get("tpm", DEFAULT_TPM)),
+                shared_dir=os.getenv("BEDROCK_RATE_LIMIT_SHARED_DIR"),
+            )
+        return _rate_limiters[model_id]
+
+
+def estimate_tokens(messages: Any, system_prompt: Optional[str] = None) -> int:
+    """Rough token estimate (4 characters per token) of a request plus its reserved output."""
+    characters = len(json.dumps(messages, default=str)) + len(system_prompt or "")
+    return characters // 4 + ESTIMATED_OUTPUT_TOKENS
+
+
+class RateLimitedBedrockModel(BedrockModel):
+    """BedrockModel whose calls go through the process-wide rate limiter of its model id."""
+
+    def __init__(self, *, priority: CallPriority = CallPriority.NORMAL, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.priority = priority
+
+    async def stream(
+        self, messages: Any, tool_specs: Any = None, system_prompt: Optional[str] = None, **kwargs: Any
+    ) -> AsyncGenerator[Any, None]:
+        """Stream a response once the rate limiter admits the call."""
+        rate_limiter = get_rate_limiter(self.get_config()["model_id"])
+        estimated_tokens = estimate_tokens(messages, system_prompt)
+        await rate_limiter.acquire(estimated_tokens, self.priority)
+
+        actual_tokens = None
+        try:
+            async for event in super().stream(messages, tool_specs, system_prompt, **kwargs):
+                if "metadata" in event:
+                    actual_tokens = event["metadata"].get("usage", {}).get("totalTokens", actual_tokens)
+                yield event
+        except ModelThrottledException:
+            rate_limiter.penalize()
+            raise
+        finally:
+            rate_limiter.settle(estimated_tokens, actual_tokens)
@@ -1,10 +1,34 @@
+import io
 import subprocess
 import re
 import os
-from typing import List, Dict, Any, Optional
+import json
+from typing import List, Dict, Any, Optional, Tuple
 
-from custom_tools import file_read
-from custom_tools.utils import console_util
+from custom_tools.utils.change_tracker import change_tracker
+from custom_tools.utils.detect_language import detect_language
+from custom_tools.utils.file_cache import file_cache
+from custom_tools.utils.symbol_index import enclosing_symbol, get_symbols
+
+# Largest enclosing symbol that is shown in full around a hunk, and the total number of
+# lines such expansions may add to a formatted manifest.
+SYMBOL_MAX_LINES = int(os.getenv("MANIFEST_SYMBOL_MAX_LINES", "120"))
+SYMBOL_CONTEXT_BUDGET_LINES = int(os.getenv("MANIFEST_SYMBOL_CONTEXT_BUDGET_LINES", "1500"))
+
+# Lines of content inlined per language in a formatted manifest; the rest of that
+# language's changes are listed without content. Override with MANIFEST_LANGUAGE_BUDGETS,
+# e.g. '{"python": 5000, "json": 100}'.
+DEFAULT_LANGUAGE_BUDGETS = {"python": 3000, "json": 300, "yaml": 600, "markdown": 600, "text": 300, "default": 1500}
+
+# Files whose changes are listed but never inlined.
+GENERATED_FILE_NAMES = {
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "Pipfile.lock", "uv.lock",
+    "Cargo.lock", "Gemfile.lock", "composer.lock", "go.sum",
+}
+GENERATED_FILE_PATTERN = re.compile(r"(\.min\.(js|css)|\.map|\.lock|_pb2(_grpc)?\.py|\.pb\.go)$")
+GENERATED_MARKER = re.compile(r"@generated|DO NOT EDIT|auto-?generated", re.IGNORECASE)
+# A line this long in the head of a file means it is minified or machine written.
+MINIFIED_LINE_LENGTH = 1000
 
 def run_cmd(cmd: List[str], cwd: Optional[str] = None) -> str:
     """Run a shell command inside the given cwd and return stdout."""
@@ -13,34 +37,116 @@ def run_cmd(cmd: List[str], cwd: Optional[str] = None) -> str:
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         text=True,
+        errors="replace",
         cwd=cwd
     )
     if result.returncode != 0:
         return ""
     return result.stdout.strip()
 
-def parse_diff(diff_text: str, change_type: str, project_name: str) -> List[Dict[str, Any]]:
+def parse_diff(diff_text: str, project_name: str) -> List[Dict[str, Any]]:
+    """
+    Parse `git diff HEAD --unified=0` output into manifest changes, one per hunk.
+
+    Each change carries the hunk's new lines as `content` and its old lines as
+    `removed`, so formatting the manifest does not need to read the files again. Files added to the index are reported as
+    `staged_new_file`, every other file as `modified_file`. Binary files get a single
+    `binary` change without content.
+    """
     changes: List[Dict[str, Any]] = []
     current_file: Optional[str] = None
+    change_type = "modified_file"
+    hunk: Optional[Dict[str, Any]] = None
+    hunk_lines: List[str] = []
+    removed_lines: List[str] = []
+
+    def close_hunk() -> None:
+        if hunk is not None:
+            hunk["content"] = "".join(hunk_lines)
+            hunk["removed"] = "".join(removed_lines)
+            changes.append(hunk)
 
     for line in diff_text.splitlines():
-        if line.startswith("+++ b/"):
-            current_file = line[6:]
+        if line.startswith("diff --git "):
+            close_hunk()
+            hunk, hunk_lines, removed_lines = None, [], []
+            current_file, change_type = None, "modified_file"
+        elif hunk is None and line.startswith("Binary files ") and not line.endswith(" /dev/null differ"):
+            match = re.match(r"Binary files .* b/(.*) differ$", line)
+            if match:
+                changes.append({
+                    "file_path": f"/tmp/{project_name}/{match.group(1)}",
+                    "change_type": change_type,
+                    "mode": "binary",
+                    "start_line": 0,
+                    "end_line": 0,
+                    "skipped": "binary"
+                })
+        elif hunk is None and line.startswith("new file mode"):
+            change_type = "staged_new_file"
+        elif hunk is None and line.startswith("+++ "):
+            current_file = line[6:] if line.startswith("+++ b/") else None
         elif line.startswith("@@") and current_file:
+            close_hunk()
+            hunk, hunk_lines, removed_lines = None, [], []
             match = re.search(r"\+(\d+)(?:,(\d+))?", line)
             if match:
-                start_line = max(int(match.group(1)) - 1, 0)
-                length = int(match.group(2) or 1) + 1
-                end_line = start_line + length - 1
-                changes.append({
+                count = int(match.group(2) or 1)
+                # A deletion (count 0) has the line before it as start; anchor on the line after it
+                start_line = int(match.group(1)) if count == 0 else int(match.group(1)) - 1
+                end_line = start_line + count
+                hunk = {
                     "file_path": f"/tmp/{project_name}/{current_file}",
                     "change_type": change_type,
                     "mode": "lines",
                     "start_line": start_line,
                     "end_line": end_line
-                })
+                }
+        elif hunk is not None and line.startswith("+"):
+            hunk_lines.append(line[1:] + "\n")
+        elif hunk is not None and line.startswith("-"):
+            removed_lines.append(line[1:] + "\n")
+
+    close_hunk()
     return changes
 
+def is_binary_file(file_path: str) -> bool:
+    """Whether a file looks binary (has a NUL byte in its first 8 KB)."""
+    try:
+        with open(file_path, "rb") as f:
+            return b"\0" in f.read(8192)
+    except OSError:
+        return False
+
+def is_generated_file(file_path: str, head: str) -> bool:
+    """Whether a file is a lockfile, minified asset or marked as generated, judging by name and first lines."""
+    name = os.path.basename(file_path)
+    if name in GENERATED_FILE_NAMES or GENERATED_FILE_PATTERN.search(name):
+        return True
+    head_lines = head.splitlines()
+    return bool(GENERATED_MARKER.search("\n".join(head_lines[:5]))) or any(
+        len(line) > MINIFIED_LINE_LENGTH for line in head_lines
+    )
+
+def classify_changes(changes: List[Dict[str, Any]]) -> None:
+    """Tag changes with their language, and drop the content of generated files."""
+    heads: Dict[str, str] = {}
+    for change in changes:
+        file_path = change["file_path"]
+        change["language"] = detect_language(file_path)
+        if change.get("skipped"):
+            continue
+        if file_path not in heads:
+            try:
+                with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+                    heads[file_path] = f.read(16384)
+            except OSError:
+                heads[file_path] = ""
+        if is_generated_file(file_path, heads[file_path]):
+            change["skipped"] = "generated"
+            change.pop("content", None)
+            change.pop("removed", None)
+
 def get_untracked_files(cwd: str, project_name: str) -> List[Dict[str, Any]]:
     out = run_cmd(["git", "ls-files", "--others", "--exclude-standard"], cwd=cwd)
     files = out.splitlines() if out else []
@@ -49,35 +155,97 @@ def get_untracked_files(cwd: str, project_name: str) -> List[Dict[str, Any]]:
     for f in files:
         abs_path = os.path.join(cwd, f)
         if os.path.isfile(abs_path):
+            if is_binary_file(abs_path):
+                entries.append({
+                    "file_path": f"/tmp/{project_name}/{f}",
+                    "change_type": "untracked_file",
+                    "mode": "binary",
+                    "start_line": 0,
+                    "end_line": 0,
+                    "skipped": "binary"
+                })
+                continue
             try:
-                with open(abs_path, "r", encoding="utf-8", errors="ignore") as fh:
-                    num_lines = sum(1 for _ in fh)
+                content = file_cache.read(abs_path, errors="ignore")
             except Exception:
-                num_lines = 0
+                content = ""
 
             entries.append({
                 "file_path": f"/tmp/{project_name}/{f}",
                 "change_type": "untracked_file",
                 "mode": "full",
                 "start_line": 1,
-                "end_line": num_lines
+                "end_line": len(content.splitlines()),
+                "content": content
             })
     return entries
 
-def get_manifest(project_name: str, py_only: bool = True) -> Dict[str, Any]:
-    repo_path = os.path.join("/tmp", project_name)
-    manifest: Dict[str, Any] = {"changes": []}
+def read_lines(file_path: str, cache: Dict[str, List[str]]) -> List[str]:
+    """Read a file's lines once per cache, through the shared file cache."""
+    if file_path not in cache:
+        try:
+            cache[file_path] = io.StringIO(file_cache.read(file_path, errors="replace")).readlines()
+        except OSError:
+            cache[file_path] = []
+    return cache[file_path]
 
-    # Gather diffs and untracked files
-    manifest["changes"].extend(
-        parse_diff(run_cmd(["git", "diff", "--unified=0"], cwd=repo_path), "modified_file", project_name)
-    )
-    manifest["changes"].extend(
-        parse_diff(run_cmd(["git", "diff", "--cached", "--unified=0"], cwd=repo_path), "staged_new_file", project_name)
+def changed_lines(change: Dict[str, Any]) -> Tuple[int, int]:
+    """1-based inclusive lines of a hunk; a deletion maps to the line before it."""
+    first = int(change.get("start_line", 0)) + 1
+    return first, max(int(change.get("end_line", 0)), first)
+
+def annotate_symbols(changes: List[Dict[str, Any]]) -> None:
+    """Add the enclosing class or function of each Python hunk to its change entry."""
+    file_lines: Dict[str, List[str]] = {}
+    for change in changes:
+        if change.get("mode") != "lines" or change.get("skipped") or not change["file_path"].endswith(".py"):
+            continue
+        symbols = get_symbols("".join(read_lines(change["file_path"], file_lines)))
+        symbol = enclosing_symbol(symbols, *changed_lines(change))
+        if symbol is not None:
+            change.update({
+                "symbol": symbol.name,
+                "symbol_kind": symbol.kind,
+                "signature": symbol.signature,
+                "symbol_start_line": symbol.start_line,
+                "symbol_end_line": symbol.end_line,
+            })
+
+def get_git_changes(repo_path: str, project_name: str) -> List[Dict[str, Any]]:
+    """Collect the changes of a repo against HEAD, staged or not, plus untracked files."""
+    changes: List[Dict[str, Any]] = []
+    changes.extend(
+        parse_diff(
+            run_cmd(["git", "diff", "HEAD", "--patch", "--unified=0", "--no-color", "--no-ext-diff"], cwd=repo_path),
+            project_name
+        )
     )
-    manifest["changes"].extend(
+    changes.extend(
         get_untracked_files(cwd=repo_path, project_name=project_name)
     )
+    return changes
+
+def get_manifest(project_name: str, py_only: bool = True, reconcile: bool = False) -> Dict[str, Any]:
+    """
+    Build the change manifest of /tmp/{project_name}.
+
+    Changes come from the in-process change tracker, which follows the writes of the
+    editing tools. git is only used when the tracker cannot vouch for the repo (it was
+    never tracked, or a shell command may have modified it) or `reconcile` is set; the
+    result then becomes the tracker's new baseline.
+
+    Every change is tagged with its `language`; binary and generated files (lockfiles,
+    minified assets) are marked `skipped` and carry no content. Python hunks are also
+    annotated with their enclosing symbol, signature and symbol lines.
+    """
+    repo_path = os.path.join("/tmp", project_name)
+    manifest: Dict[str, Any] = {"changes": []}
+
+    changes = None if reconcile else change_tracker.changes(repo_path)
+    if changes is None:
+        changes = get_git_changes(repo_path, project_name)
+        change_tracker.mark_clean(repo_path, changes)
+    manifest["changes"] = changes
 
     # Optionally filter only Python files
     if py_only:
@@ -85,35 +253,109 @@ def get_manifest(project_name: str, py_only: bool = True) -> Dict[str, Any]:
             c for c in manifest["changes"] if c["file_path"].endswith(".py")
         ]
 
+    classify_changes(manifest["changes"])
+    annotate_symbols(manifest["changes"])
     return manifest
 
+def language_budgets() -> Dict[str, int]:
+    budgets = dict(DEFAULT_LANGUAGE_BUDGETS)
+    budgets.update(json.loads(os.getenv("MANIFEST_LANGUAGE_BUDGETS", "{}")))
+    return budgets
+
 def format_manifest_code_diffs(manifest: Dict[str, Any]) -> str:
-    """ Generate a human-readable code change summaries from a change manifest."""
-    combined_changes: List[str] = []
-    console = console_util.create()
+    """
+    Generate a human-readable code change summaries from a change manifest.
+
+    Hunks inside a class or function of at most SYMBOL_MAX_LINES lines are shown as the
+    whole symbol, once for all of its hunks, while the added lines stay within
+    SYMBOL_CONTEXT_BUDGET_LINES. Other hunks are shown on their own.
+
+    Content is fenced with the file's language and inlined up to that language's line
+    budget, followed by the lines the hunks removed; binary files, generated files and
+    changes over budget are listed without it.
+    """
+    blocks: List[Dict[str, Any]] = []
+    symbol_blocks: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
+    # Files of changes without `content` (e.g. manifests written by an agent) or with an expanded symbol, read once each.
+    file_lines: Dict[str, List[str]] = {}
+    budget = SYMBOL_CONTEXT_BUDGET_LINES
 
     for change in manifest.get("changes", []):
         file_path: str = change.get("file_path")
-        change_type: str = change.get("change_type")
-        start_line: int = change.get("start_line", 0)
-        end_line: int = change.get("end_line", 0)
-
-        file_content: List[str] = file_read.read_file_lines(
-            console=console,
-            file_path=file_path,
-            start_line=int(start_line),
-            end_line=int(end_line)
-        )
+        first, last = changed_lines(change)
 
-        if not file_content or all(line.strip() == "" for line in file_content):
+        if change.get("skipped"):
+            blocks.append({"change": change, "content": ""})
             continue
 
-        change_summary: str = (
-            f"File: {file_path}\n"
-            f"Change Type: {change_type}\n"
-            f"Lines: {start_line}-{end_line}\n"
-            f"Content:```python\n{''.join(file_content)}\n```\n\n"
-        )
-        combined_changes.append(change_summary)
+        if "symbol" in change:
+            key = (file_path, int(change["symbol_start_line"]), int(change["symbol_end_line"]))
+            symbol_size = key[2] - key[1] + 1
+            if key in symbol_blocks:
+                symbol_blocks[key]["changed"].append((first, last))
+                symbol_blocks[key]["removed"] += change.get("removed", "")
+                continue
+            if symbol_size <= min(SYMBOL_MAX_LINES, budget):
+                budget -= symbol_size
+                symbol_blocks[key] = {
+                    "change": change,
+                    "changed": [(first, last)],
+                    "content": "".join(read_lines(file_path, file_lines)[key[1] - 1:key[2]]),
+                    "removed": change.get("removed", ""),
+                }
+                blocks.append(symbol_blocks[key])
+                continue
+
+        content: Optional[str] = change.get("content")
+        if content is None:
+            lines = read_lines(file_path, file_lines)
+            if change.get("mode") == "full":
+                content = "".join(lines)
+            else:
+                content = "".join(lines[max(int(change.get("start_line", 0)), 0):int(change.get("end_line", 0))])
+        blocks.append({"change": change, "content": content, "removed": change.get("removed", "")})
+
+    budgets = language_budgets()
+    used: Dict[str, int] = {}
+    combined_changes: List[str] = []
+    for block in blocks:
+        change = block["change"]
+        content = block["content"]
+        removed = block.get("removed", "")
+        language = change.get("language") or detect_language(change.get("file_path", ""))
+        skipped = change.get("skipped")
+        if not skipped and not content.strip() and not removed.strip():
+            continue
+
+        header = f"File: {change.get('file_path')}\nChange Type: {change.get('change_type')}\n"
+        if "changed" in block:
+            changed = ", ".join(f"{a}-{b}" if b > a else str(a) for a, b in block["changed"])
+            header += (
+                f"Symbol: {change['signature']} (lines {change['symbol_start_line']}-{change['symbol_end_line']})\n"
+                f"Changed Lines: {changed}\n"
+            )
+        else:
+            if "signature" in change:
+                header += f"Symbol: {change['signature']}\n"
+            header += f"Lines: {change.get('start_line', 0)}-{change.get('end_line', 0)}\n"
+
+        if skipped:
+            combined_changes.append(f"{header}Content: omitted ({skipped} file)\n\n")
+            continue
+
+        line_count = content.count("\n") + 1 + removed.count("\n")
+        budget_key = language if language in budgets else "default"
+        if used.get(budget_key, 0) + line_count > budgets[budget_key]:
+            combined_changes.append(f"{header}Content: omitted ({language} budget exceeded, {line_count} lines)\n\n")
+            continue
+        used[budget_key] = used.get(budget_key, 0) + line_count
+
+        text = header
+        if content.strip() or not removed:
+            text += f"Content:```{language}\n{content}\n```\n"
+        if removed:
+            removed_text = removed.rstrip("\n")
+            text += f"Removed:```{language}\n{removed_text}\n```\n"
+        combined_changes.append(text + "\n")
 
-    return "".join(combined_changes)
\ No newline at end of file
+    return "".join(combined_changes)
@@ -5,6 +5,9 @@ from urllib.parse import urlparse
 
 from github import Github, Auth
 from utils.aws_secrets import get_github_pat_from_secrets_manager
+from utils.lint_engine import stop_mypy_daemon
+from custom_tools.utils.change_tracker import change_tracker
+from custom_tools.utils.undo_journal import undo_journal
 
 GIHUB_SECRET_ARN = 'arn:aws:secretsmanager:us-east-1:{aws_account_id}:secret:github_personal_access_token-mhV2eN'
 
@@ -35,12 +38,11 @@ class GitHubPRManager:
             print(f"⚠️ Repo path does not exist: {self.repo_path}")
             return
 
-        for root, _, files in os.walk(self.repo_path):
-            for file in files:
-                if file.endswith(".bak"):
-                    full_path = os.path.join(root, file)
-                    os.remove(full_path)
-                    print(f"🧹 Deleted backup file: {full_path}")
+        # The editor keeps undo history in memory, so there are no backup files to delete
+        undo_journal.discard(self.repo_path)
+        print(f"🧹 Cleared undo history of {self.repo_path}")
+
+        stop_mypy_daemon(self.repo_path)
 
     def get_pr_body(self):
         pr_md_file = os.path.join(self.repo_path, f"{self.story_id}.md")
@@ -124,6 +126,8 @@ class GitHubRepoCloner:
         self.run_cmd(["git", "pull", "origin", self.base_branch], cwd=self.repo_path)
 
         print(f"📁 Repo cloned to: {self.repo_path}")
+        # A fresh clone has no changes, so tool edits can be tracked without git from here on.
+        change_tracker.mark_clean(self.repo_path)
         return self.repo_path
 
     def validate_repo(self):
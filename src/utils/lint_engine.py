@@ -0,0 +1,323 @@
+import os
+import re
+import json
+import contextlib
+import shutil
+import hashlib
+import threading
+import subprocess
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+# mypy text output with --show-column-numbers --show-error-codes, e.g.
+# "pkg/a.py:2:10: error: Incompatible types in assignment  [assignment]"
+MYPY_MESSAGE = re.compile(
+    r"^(?P<path>[^:\n]+\.py):(?P<line>\d+):(?:(?P<column>\d+):)?\s*error:\s*(?P<message>.*?)(?:\s+\[(?P<code>[\w-]+)\])?$"
+)
+
+
+@dataclass
+class Diagnostic:
+    """One linter finding."""
+
+    file: str
+    line: int
+    column: int
+    code: str
+    message: str
+    backend: str
+
+
+class LintError(Exception):
+    """Raised when a lint backend fails to run or its output cannot be parsed."""
+
+
+class LintBackend(ABC):
+    """
+    A linter that checks a batch of Python files in one invocation.
+
+    Subclasses build the command and parse its output into diagnostics; paths in
+    the output may be relative to the repo root.
+    """
+
+    name = ""
+    executable = ""
+    # Exit codes that mean "ran fine" (with or without findings).
+    ok_returncodes: Tuple[int, ...] = (0, 1)
+
+    def available(self) -> bool:
+        return shutil.which(self.executable) is not None
+
+    @abstractmethod
+    def command(self, files: List[str], repo_root: str) -> List[str]:
+        """Command line that lints `files`, run from `repo_root`."""
+
+    @abstractmethod
+    def parse(self, result: subprocess.CompletedProcess) -> List[Diagnostic]:
+        """Diagnostics in the output of the command."""
+
+    def run(self, files: List[str], repo_root: str) -> Dict[str, List[Diagnostic]]:
+        """Lint all files at once and group the diagnostics by file."""
+        result = subprocess.run(self.command(files, repo_root), cwd=repo_root, capture_output=True, text=True)
+        if result.returncode not in self.ok_returncodes:
+            raise LintError(f"{self.name} exited with {result.returncode}: {(result.stderr or result.stdout).strip()}")
+
+        by_path = {os.path.abspath(f): f for f in files}
+        diagnostics: Dict[str, List[Diagnostic]] = {f: [] for f in files}
+        for diagnostic in self.parse(result):
+            file_path = by_path.get(os.path.abspath(os.path.join(repo_root, diagnostic.file)))
+            if file_path:
+                diagnostic.file = file_path
+                diagnostics[file_path].append(diagnostic)
+        return diagnostics
+
+
+class RuffBackend(LintBackend):
+    """ruff: sub-second checks with JSON output."""
+
+    name = "ruff"
+    executable = "ruff"
+
+    def command(self, files: List[str], repo_root: str) -> List[str]:
+        return ["ruff", "check", "--output-format=json", "--no-fix", "--quiet", *files]
+
+    def parse(self, result: subprocess.CompletedProcess) -> List[Diagnostic]:
+        try:
+            findings = json.loads(result.stdout or "[]")
+        except json.JSONDecodeError as e:
+            raise LintError(f"Invalid ruff output: {e}")
+        return [
+            Diagnostic(
+                file=finding["filename"],
+                line=finding["location"]["row"],
+                column=finding["location"]["column"],
+                code=finding.get("code") or "syntax-error",
+                message=finding["message"],
+                backend=self.name,
+            )
+            for finding in findings
+        ]
+
+
+class PylintBackend(LintBackend):
+    """pylint errors only, over all CPUs through `--jobs=0`."""
+
+    name = "pylint"
+    executable = "pylint"
+    # pylint exit codes are a bit mask of message categories; 32 is a usage error.
+    ok_returncodes = tuple(range(32))
+
+    def command(self, files: List[str], repo_root: str) -> List[str]:
+        return ["pylint", "--errors-only", "--jobs=0", "--score=n", "--output-format=json", *files]
+
+    def parse(self, result: subprocess.CompletedProcess) -> List[Diagnostic]:
+        try:
+            findings = json.loads(result.stdout or "[]")
+        except json.JSONDecodeError as e:
+            raise LintError(f"Invalid pylint output: {e}")
+        return [
+            Diagnostic(
+                file=finding["path"],
+                line=finding["line"],
+                column=finding["column"],
+                code=finding["message-id"],
+                message=f"{finding['message']} ({finding['symbol']})",
+                backend=self.name,
+            )
+            for finding in findings
+        ]
+
+
+class MypyBackend(LintBackend):
+    """
+    mypy type checks with a per-repo incremental cache.
+
+    Runs `mypy --incremental`, so repeated checks only re-analyse what changed. With
+    LINT_USE_DMYPY=true and `dmypy` installed, the mypy daemon is used instead; it
+    keeps running until `stop_mypy_daemon` is called for the repo.
+    """
+
+    name = "mypy"
+    executable = "mypy"
+
+    def command(self, files: List[str], repo_root: str) -> List[str]:
+        cache_dir = cache_dir_for(repo_root)
+        options = [
+            "--cache-dir", os.path.join(cache_dir, "mypy"),
+            "--show-column-numbers", "--show-error-codes", "--no-error-summary",
+        ]
+        if os.getenv("LINT_USE_DMYPY", "false").lower() == "true" and shutil.which("dmypy"):
+            return ["dmypy", "--status-file", dmypy_status_file(cache_dir), "run", "--", *options, *files]
+        return ["mypy", "--incremental", *options, *files]
+
+    def parse(self, result: subprocess.CompletedProcess) -> List[Diagnostic]:
+        diagnostics = []
+        for line in result.stdout.splitlines():
+            match = MYPY_MESSAGE.match(line)
+            if match:
+                diagnostics.append(Diagnostic(
+                    file=match.group("path"),
+                    line=int(match.group("line")),
+                    column=int(match.group("column") or 0),
+                    code=match.group("code") or "error",
+                    message=match.group("message"),
+                    backend=self.name,
+                ))
+        return diagnostics
+
+
+LINT_BACKENDS: Dict[str, LintBackend] = {
+    backend.name: backend for backend in (RuffBackend(), PylintBackend(), MypyBackend())
+}
+
+# (backend, path, content sha256) -> diagnostics of the whole file
+_result_cache: Dict[Tuple[str, str, str], List[Diagnostic]] = {}
+_result_cache_lock = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def find_repo_root(files: List[str]) -> str:
+    """Return the git toplevel of the files, or their common directory."""
+    common_dir = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in files])
+    result = subprocess.run(
+        ["git", "rev-parse", "--show-toplevel"], cwd=common_dir, capture_output=True, text=True
+    )
+    return result.stdout.strip() if result.returncode == 0 else common_dir
+
+
+def cache_dir_for(repo_root: str, create: bool = True) -> str:
+    """Per-repo directory for mypy's incremental cache and the dmypy status file."""
+    base = os.getenv("LINT_CACHE_DIR", "/tmp/.nemo_lint_cache")
+    path = os.path.join(base, os.path.basename(repo_root.rstrip("/")) or "root")
+    if create:
+        os.makedirs(path, exist_ok=True)
+    return path
+
+
+def dmypy_status_file(cache_dir: str) -> str:
+    return os.path.join(cache_dir, "dmypy.json")
+
+
+def stop_mypy_daemon(repo_root: str) -> None:
+    """Stop the dmypy daemon started for a repo, if there is one."""
+    status_file = dmypy_status_file(cache_dir_for(repo_root, create=False))
+    if not os.path.exists(status_file) or not shutil.which("dmypy"):
+        return
+    result = subprocess.run(["dmypy", "--status-file", status_file, "stop"], capture_output=True, text=True)
+    if result.returncode != 0:
+        # The daemon is gone already; drop its stale status file
+        with contextlib.suppress(OSError):
+            os.remove(status_file)
+
+
+def selected_backends() -> List[str]:
+    """
+    Backends named in LINT_BACKENDS (comma separated), e.g. "ruff,mypy".
+
+    Defaults to ruff when it is installed, otherwise pylint and mypy.
+    """
+    configured = os.getenv("LINT_BACKENDS")
+    if configured:
+        names = [name.strip() for name in configured.split(",") if name.strip()]
+        unknown = [name for name in names if name not in LINT_BACKENDS]
+        if unknown:
+            raise ValueError(f"Unknown lint backends {unknown}, expected some of {list(LINT_BACKENDS)}")
+        return names
+    return ["ruff"] if LINT_BACKENDS["ruff"].available() else ["pylint", "mypy"]
+
+
+def lint_files(
+    files: List[str], backends: Optional[List[str]] = None
+) -> Tuple[Dict[str, List[Diagnostic]], Dict[str, str]]:
+    """
+    Lint Python files with each backend, returning diagnostics per file and errors per backend.
+
+    Backends run concurrently, each in a single batched invocation over the files whose
+    content changed since they were last linted. Results are cached by content hash;
+    mypy results of unchanged files may miss errors caused by changes in their imports.
+    """
+    backends = backends or selected_backends()
+    files = sorted({f for f in files if os.path.isfile(f)})
+    diagnostics: Dict[str, List[Diagnostic]] = {f: [] for f in files}
+    errors: Dict[str, str] = {}
+    if not files:
+        return diagnostics, errors
+
+    digests = {f: file_digest(f) for f in files}
+    pending: Dict[str, List[str]] = {}
+    with _result_cache_lock:
+        for backend in backends:
+            for f in files:
+                cached = _result_cache.get((backend, f, digests[f]))
+                if cached is not None:
+                    diagnostics[f].extend(cached)
+                else:
+                    pending.setdefault(backend, []).append(f)
+
+    if pending:
+        repo_root = find_repo_root(files)
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            futures = {
+                backend: executor.submit(LINT_BACKENDS[backend].run, backend_files, repo_root)
+                for backend, backend_files in pending.items()
+            }
+            for backend, future in futures.items():
+                try:
+                    backend_diagnostics = future.result()
+                except (LintError, OSError) as e:
+                    errors[backend] = str(e)
+                    continue
+                for f, file_diagnostics in backend_diagnostics.items():
+                    diagnostics[f].extend(file_diagnostics)
+                    with _result_cache_lock:
+                        _result_cache[(backend, f, digests[f])] = file_diagnostics
+
+    for file_diagnostics in diagnostics.values():
+        file_diagnostics.sort(key=lambda d: (d.line, d.column, d.backend))
+    return diagnostics, errors
+
+
+def changed_line_ranges(manifest: Dict[str, Any]) -> Dict[str, List[Tuple[int, int]]]:
+    """Inclusive (start_line, end_line) ranges per file in a change manifest."""
+    ranges: Dict[str, List[Tuple[int, int]]] = {}
+    for change in manifest.get("changes", []):
+        ranges.setdefault(change["file_path"], []).append(
+            (int(change.get("start_line", 0)), int(change.get("end_line", 0)))
+        )
+    return ranges
+
+
+def lint_manifest(manifest: Dict[str, Any], backends: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Lint the Python files of a change manifest, keeping only diagnostics on changed lines.
+
+    Returns {"backends", "diagnostics": [{file, line, column, code, message, backend}],
+    "outside_changes": number of diagnostics filtered out, "errors": {backend: message}}.
+    """
+    ranges = {f: r for f, r in changed_line_ranges(manifest).items() if f.endswith(".py")}
+    backends = backends or selected_backends()
+    diagnostics, errors = lint_files(list(ranges), backends)
+
+    relevant: List[Dict[str, Any]] = []
+    outside_changes = 0
+    for f, file_diagnostics in diagnostics.items():
+        for diagnostic in file_diagnostics:
+            if any(start <= diagnostic.line <= end for start, end in ranges[f]):
+                relevant.append(asdict(diagnostic))
+            else:
+                outside_changes += 1
+
+    report: Dict[str, Any] = {
+        "backends": backends,
+        "diagnostics": relevant,
+        "outside_changes": outside_changes,
+    }
+    if errors:
+        report["errors"] = errors
+    return report
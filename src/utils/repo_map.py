@@ -0,0 +1,195 @@
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from custom_tools.utils.repo_inventory import get_inventory
+from custom_tools.utils.symbol_index import get_symbols
+
+# Size of the map in tokens, estimated at CHARS_PER_TOKEN characters per token.
+REPO_MAP_TOKEN_BUDGET = int(os.getenv("REPO_MAP_TOKEN_BUDGET", "4000"))
+CHARS_PER_TOKEN = 4
+
+# Top-level symbols listed per relevant file, and the largest Python file parsed for them.
+MAX_SYMBOLS_PER_FILE = int(os.getenv("REPO_MAP_MAX_SYMBOLS_PER_FILE", "12"))
+MAX_PARSED_FILE_BYTES = 256 * 1024
+
+# Subdirectories without any listed file that are still named in their parent.
+MAX_COLLAPSED_DIRS = 8
+
+# Relevance of a story term found in a file path and in a top-level symbol name.
+PATH_MATCH_WEIGHT = 3
+SYMBOL_MATCH_WEIGHT = 1
+
+STOP_WORDS = {
+    "the", "and", "for", "with", "that", "this", "from", "into", "should", "must", "when", "then",
+    "will", "can", "are", "has", "have", "not", "all", "any", "new", "add", "use", "using", "able",
+    "user", "story", "want", "need", "needs", "also", "make", "each", "per", "via", "our", "its",
+}
+
+WORD = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+@dataclass
+class MapEntry:
+    """A file of the repo map with its relevance to the story."""
+
+    path: str  # relative to the repo root
+    score: int = 0
+    symbols: List[str] = field(default_factory=list)
+
+
+@dataclass
+class MapDirectory:
+    """A directory of the repo map; `total` counts every file below it."""
+
+    name: str
+    total: int = 0
+    dirs: Dict[str, "MapDirectory"] = field(default_factory=dict)
+    files: List[str] = field(default_factory=list)
+
+
+def words(text: str) -> Set[str]:
+    """Lowercase words of identifiers and prose, split on case changes, digits and punctuation."""
+    return {w.lower() for w in WORD.findall(text) if len(w) >= 3}
+
+
+def story_terms(story: str) -> Set[str]:
+    return words(story) - STOP_WORDS
+
+
+def _matches(term: str, candidates: Set[str]) -> bool:
+    # Prefix matches let "payment" find "payments" and "config" find "configuration".
+    return any(
+        term == word or (len(term) >= 4 and len(word) >= 4 and (word.startswith(term) or term.startswith(word)))
+        for word in candidates
+    )
+
+
+def top_level_symbols(path: str) -> List[str]:
+    """Public classes and functions defined at the top of a Python file, e.g. ['class Ledger', 'def post']."""
+    try:
+        if os.path.getsize(path) > MAX_PARSED_FILE_BYTES:
+            return []
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            source = f.read()
+    except OSError:
+        return []
+    return [
+        f"{'class' if s.kind == 'class' else 'def'} {s.name}"
+        for s in get_symbols(source)
+        if s.parent is None and not s.name.startswith("_")
+    ]
+
+
+def rank_files(root: str, files: List[str], story: str) -> List[MapEntry]:
+    """Files ordered by relevance to the story; unrelated files follow, shallowest first."""
+    terms = story_terms(story)
+    entries = []
+    for path in files:
+        relative_path = os.path.relpath(path, root)
+        entry = MapEntry(path=relative_path)
+        if terms:
+            path_words = words(relative_path)
+            entry.score = PATH_MATCH_WEIGHT * sum(_matches(t, path_words) for t in terms)
+            if path.endswith(".py"):
+                entry.symbols = top_level_symbols(path)
+                symbol_words = [words(s.split(" ", 1)[1]) for s in entry.symbols]
+                entry.score += SYMBOL_MATCH_WEIGHT * sum(
+                    any(_matches(t, w) for w in symbol_words) for t in terms
+                )
+        entries.append(entry)
+    entries.sort(key=lambda e: (-e.score, e.path.count("/"), e.path))
+    return entries
+
+
+def _tree(entries: List[MapEntry], root_name: str) -> MapDirectory:
+    root = MapDirectory(name=root_name)
+    for entry in entries:
+        node = root
+        node.total += 1
+        *parts, _ = entry.path.split("/")
+        for part in parts:
+            node = node.dirs.setdefault(part, MapDirectory(name=part))
+            node.total += 1
+    return root
+
+
+def render_map(root: str, entries: List[MapEntry], shown: int) -> str:
+    """Render the directory tree with the first `shown` ranked entries listed by name."""
+    tree = _tree(entries, root.rstrip("/") + "/")
+    listed = {e.path: e for e in entries[:shown]}
+    listed_dirs: Set[str] = set()
+    for path in listed:
+        parts = path.split("/")[:-1]
+        listed_dirs.update("/".join(parts[:i]) for i in range(1, len(parts) + 1))
+    for entry in entries:
+        node = tree
+        for part in entry.path.split("/")[:-1]:
+            node = node.dirs[part]
+        if entry.path in listed:
+            node.files.append(entry.path)
+
+    lines = [f"{tree.name} ({tree.total} files, {len(listed)} listed)"]
+
+    def render(node: MapDirectory, prefix: str, depth: int) -> None:
+        indent = "  " * depth
+        collapsed = []
+        for name in sorted(node.dirs):
+            child = node.dirs[name]
+            if prefix + name in listed_dirs:
+                lines.append(f"{indent}{name}/ ({child.total} files)")
+                render(child, f"{prefix}{name}/", depth + 1)
+            else:
+                collapsed.append(child)
+        for path in sorted(node.files):
+            entry = listed[path]
+            line = f"{indent}{path.rsplit('/', 1)[-1]}"
+            if entry.score and entry.symbols:
+                symbols = entry.symbols[:MAX_SYMBOLS_PER_FILE]
+                more = len(entry.symbols) - len(symbols)
+                line += ": " + ", ".join(symbols) + (f", +{more} more" if more > 0 else "")
+            lines.append(line)
+        for child in collapsed[:MAX_COLLAPSED_DIRS]:
+            lines.append(f"{indent}{child.name}/ ({child.total} files)")
+        hidden_files = node.total - sum(d.total for d in node.dirs.values()) - len(node.files)
+        hidden_dirs = collapsed[MAX_COLLAPSED_DIRS:]
+        if hidden_files > 0 or hidden_dirs:
+            summary = [f"{hidden_files} more files"] if hidden_files > 0 else []
+            if hidden_dirs:
+                summary.append(f"{len(hidden_dirs)} more dirs ({sum(d.total for d in hidden_dirs)} files)")
+            lines.append(f"{indent}... {', '.join(summary)}")
+
+    render(tree, "", 1)
+    return "\n".join(lines)
+
+
+def build_repo_map(
+    directory: str, story: str = "", token_budget: Optional[int] = None, extensions: Optional[List[str]] = None
+) -> str:
+    """
+    Compressed map of a repository for the planner, within `token_budget` tokens.
+
+    Files are ranked by how many story terms their path and top-level symbol names
+    contain. The tree lists as many files as fit the budget, most relevant first,
+    with the top-level symbols of the relevant Python files; every directory shows
+    its file count and the files left out are summarised per directory.
+    """
+    token_budget = token_budget or REPO_MAP_TOKEN_BUDGET
+    root = os.path.abspath(directory)
+    files = get_inventory(root).files(root, extensions=extensions)
+    entries = rank_files(root, files, story)
+
+    # The rendered size grows with the number of listed files; find the most that fit.
+    max_chars = token_budget * CHARS_PER_TOKEN
+    low, high = 0, len(entries)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if len(render_map(root, entries, middle)) <= max_chars:
+            low = middle
+        else:
+            high = middle - 1
+
+    repo_map = render_map(root, entries, low)
+    print(f"Repo map of {directory}: {low}/{len(entries)} files listed in ~{len(repo_map) // CHARS_PER_TOKEN} tokens")
+    return repo_map
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The tools import `custom_tools` and the core modules import `src.`, as they do when run from the repo root.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "src")]
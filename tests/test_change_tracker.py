@@ -0,0 +1,55 @@
+import shutil
+import subprocess
+
+import pytest
+
+from custom_tools.utils.change_tracker import line_changes
+from src.utils.change_manifest import parse_diff
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def git_changes(repo, baseline, lines):
+    (repo / "f.txt").write_text("".join(baseline))
+    subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+    subprocess.run(["git", "add", "f.txt"], cwd=repo, check=True)
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "-m", "base"],
+        cwd=repo,
+        check=True,
+    )
+    (repo / "f.txt").write_text("".join(lines))
+    diff = subprocess.check_output(["git", "diff", "HEAD", "--unified=0"], cwd=repo, text=True)
+    return parse_diff(diff, repo.name)
+
+
+@pytest.mark.parametrize("deleted", [range(29, 32), range(0, 2), range(38, 40)])
+def test_deletion_matches_git(tmp_path, deleted):
+    baseline = [f"line {i}\n" for i in range(1, 41)]
+    lines = [line for i, line in enumerate(baseline) if i not in deleted]
+
+    expected = git_changes(tmp_path, baseline, lines)
+    changes = line_changes(expected[0]["file_path"], baseline, lines)
+
+    assert changes == expected
+    assert changes[0]["start_line"] == changes[0]["end_line"] == deleted[0]
+
+
+def test_replacement_matches_git(tmp_path):
+    baseline = [f"line {i}\n" for i in range(1, 41)]
+    lines = baseline[:10] + ["new a\n", "new b\n"] + baseline[11:]
+
+    expected = git_changes(tmp_path, baseline, lines)
+
+    assert line_changes(expected[0]["file_path"], baseline, lines) == expected
+
+
+def test_removed_lines_are_kept(tmp_path):
+    baseline = [f"line {i}\n" for i in range(1, 41)]
+    lines = baseline[:10] + ["new a\n"] + baseline[13:]
+
+    expected = git_changes(tmp_path, baseline, lines)
+
+    assert expected[0]["content"] == "new a\n"
+    assert expected[0]["removed"] == "line 11\nline 12\nline 13\n"
+    assert line_changes(expected[0]["file_path"], baseline, lines) == expected
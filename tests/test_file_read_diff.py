@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("strands")
+pytest.importorskip("rich")
+
+from custom_tools.file_read import file_read  # noqa: E402
+
+
+def test_diff_mode_compares_directories(tmp_path, monkeypatch):
+    monkeypatch.setenv("BYPASS_TOOL_CONSENT", "true")
+    base, workspace = tmp_path / "base", tmp_path / "workspace"
+    for root in (base, workspace):
+        (root / "pkg").mkdir(parents=True)
+        (root / "same.py").write_text("x = 1\n")
+    (base / "pkg" / "mod.py").write_text("a = 1\n")
+    (workspace / "pkg" / "mod.py").write_text("a = 2\n")
+    (workspace / "new.py").write_text("n = 1\n")
+
+    result = file_read(
+        {"toolUseId": "t", "input": {"path": str(base), "mode": "diff", "comparison_path": str(workspace)}}
+    )
+
+    assert result["status"] == "success"
+    assert len(result["content"]) == 1
+    text = result["content"][0]["text"]
+    assert "Both paths must be" not in text
+    assert "=== pkg/mod.py ===" in text and "+a = 2" in text
+    assert f"=== new.py ===\nOnly in {workspace}" in text
+    assert "2 files compared: 1 modified, 1 identical" in text
@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip("strands")
+pytest.importorskip("rich")
+
+from custom_tools.file_read import find_files  # noqa: E402
+from custom_tools.utils import repo_inventory  # noqa: E402
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    (tmp_path / "pkg" / "sub").mkdir(parents=True)
+    (tmp_path / "pkg" / "a.py").write_text("a = 1\n")
+    (tmp_path / "pkg" / "sub" / "b.py").write_text("b = 1\n")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_directory_without_recursion_does_not_walk_subdirectories(tree, monkeypatch):
+    walked = []
+    walk = repo_inventory.os.walk
+
+    def tracking_walk(top, *args, **kwargs):
+        for entry in walk(top, *args, **kwargs):
+            walked.append(entry[0])
+            yield entry
+
+    monkeypatch.setattr(repo_inventory.os, "walk", tracking_walk)
+
+    assert find_files(None, "pkg", recursive=False) == ["pkg/a.py"]
+    assert walked == [str(tree / "pkg")]
+
+
+def test_paths_keep_the_form_of_the_pattern(tree):
+    assert find_files(None, "pkg") == ["pkg/a.py", "pkg/sub/b.py"]
+    assert find_files(None, "pkg/*.py", recursive=False) == ["pkg/a.py"]
+    assert find_files(None, "*/a.py", recursive=False) == ["pkg/a.py"]
+    assert find_files(None, "**/b.py") == ["pkg/sub/b.py"]
+    assert find_files(None, f"{tree}/pkg/*.py") == [f"{tree}/pkg/a.py", f"{tree}/pkg/sub/b.py"]